@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Szybkie migawki bazy danych sklepu (eksport i przywracanie równoległe).
+
+W odróżnieniu od export_database.sh / import_database.sh (jeden mysqldump
+do jednego pliku .sql) migawka to katalog z:
+- schema.sql.<zst|gz> - struktura tabel (mysqldump --no-data),
+- data/<tabela>[.<n>].sql.<zst|gz> - dane każdej tabeli; duże tabele
+  z liczbowym kluczem głównym są dzielone na części po CHUNK_ROWS ID,
+- manifest.json - lista plików, liczby wierszy i czasy.
+
+Eksport uruchamia równolegle WORKERS procesów mysqldump w kontenerze bazy
+i kompresuje ich wyjście w locie (zstd, jeśli jest pakiet zstandard,
+w przeciwnym razie gzip). Przywracanie odtwarza strukturę bez indeksów
+pomocniczych, ładuje dane równolegle (bez sprawdzania kluczy obcych
+i unikalności, jedna transakcja na plik), a na końcu dodaje indeksy
+- jednym ALTER TABLE na tabelę. Dla każdej tabeli wypisywane są czasy.
+
+Tabele są zrzucane w osobnych transakcjach, więc migawkę należy robić,
+gdy sklep nie jest używany (np. między przebiegami importu).
+
+Przykład:
+    python db_snapshot.py export
+    python db_snapshot.py restore db-export/snapshot_2024-01-15_12-00
+"""
+
+import gzip
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CONFIG_DIR = Path(__file__).parent
+EXPORT_DIR = CONFIG_DIR / 'db-export'
+
+# Dane dostępowe jak w docker-compose.yml
+DB_NAME = os.getenv('DB_NAME', 'prestashop_db')
+DB_USER = os.getenv('DB_USER', 'prestashop_user')
+DB_PASSWORD = os.getenv('DB_PASSWORD', 'secure_user_password')
+# Polecenie uruchamiające klientów MySQL w kontenerze bazy
+DB_EXEC = shlex.split(os.getenv('DB_EXEC', 'docker compose exec -T db'))
+
+WORKERS = int(os.getenv('DB_SNAPSHOT_WORKERS', str(min(8, os.cpu_count() or 1))))
+CHUNK_ROWS = int(os.getenv('DB_SNAPSHOT_CHUNK_ROWS', '200000'))
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 4
+COPY_BUFFER = 1024 * 1024
+
+EXTENSIONS = {'zstd': '.sql.zst', 'gzip': '.sql.gz'}
+INTEGER_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'bigint')
+
+# Ustawienia sesji ładowania danych (dane z mysqldump są w UTC)
+LOAD_PRELUDE = (b"SET NAMES utf8mb4; SET time_zone = '+00:00'; SET sql_mode = 'NO_AUTO_VALUE_ON_ZERO';\n"
+                b"SET foreign_key_checks = 0; SET unique_checks = 0; SET autocommit = 0;\n")
+LOAD_TRAILER = b"\nCOMMIT;\n"
+
+CREATE_TABLE_RE = re.compile(r'CREATE TABLE `([^`]+)` \((.*?)\n\)([^;]*);', re.DOTALL)
+
+
+def mysql_command(*args, tool='mysql'):
+    return DB_EXEC + [tool, f'-u{DB_USER}', f'-p{DB_PASSWORD}', '--default-character-set=utf8mb4', *args]
+
+
+def query(sql):
+    """
+    Wykonuje zapytanie w bazie.
+
+    Returns:
+        Lista wierszy (krotek tekstów)
+    """
+    result = subprocess.run(mysql_command('-N', '-B', '-e', sql, DB_NAME), cwd=CONFIG_DIR,
+                            capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"Zapytanie nie powiodło się: {result.stderr.strip()}")
+    return [tuple(line.split('\t')) for line in result.stdout.splitlines()]
+
+
+def open_compressed(path, mode):
+    """Otwiera plik migawki do zapisu ('wb') lub odczytu ('rb') z (de)kompresją."""
+    if path.name.endswith(EXTENSIONS['zstd']):
+        if zstandard is None:
+            raise RuntimeError(f"Plik {path.name} wymaga pakietu zstandard (pip install zstandard)")
+        f = open(path, mode)
+        if mode == 'wb':
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(f, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+    return gzip.open(path, mode, compresslevel=GZIP_LEVEL) if mode == 'wb' else gzip.open(path, mode)
+
+
+# --- Eksport ---
+
+def list_tables():
+    """
+    Zwraca tabele bazy z szacowaną liczbą wierszy i kolumną klucza do podziału.
+
+    Returns:
+        Lista słowników {name, rows, bytes, key} (key - liczbowy klucz główny
+        jednokolumnowy albo None), od największej tabeli
+    """
+    tables = {
+        name: {'name': name, 'rows': int(rows or 0), 'bytes': int(size or 0), 'key': None}
+        for name, rows, size in query(
+            "SELECT table_name, table_rows, data_length FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_type = 'BASE TABLE'")
+    }
+    keys = query(
+        "SELECT k.table_name, MIN(k.column_name) FROM information_schema.key_column_usage k "
+        "JOIN information_schema.columns c ON c.table_schema = k.table_schema "
+        "AND c.table_name = k.table_name AND c.column_name = k.column_name "
+        "WHERE k.table_schema = DATABASE() AND k.constraint_name = 'PRIMARY' "
+        "GROUP BY k.table_name "
+        f"HAVING COUNT(*) = 1 AND MIN(c.data_type) IN ({', '.join(repr(t) for t in INTEGER_TYPES)})")
+    for name, column in keys:
+        if name in tables:
+            tables[name]['key'] = column
+    return sorted(tables.values(), key=lambda t: t['bytes'], reverse=True)
+
+
+def table_chunks(table):
+    """
+    Dzieli tabelę na zakresy klucza głównego po CHUNK_ROWS ID.
+
+    Returns:
+        Lista warunków WHERE (None - cała tabela w jednym pliku)
+    """
+    if not table['key'] or table['rows'] <= CHUNK_ROWS:
+        return [None]
+    (low, high), = query(f"SELECT MIN(`{table['key']}`), MAX(`{table['key']}`) FROM `{table['name']}`")
+    if low == 'NULL':
+        return [None]
+    bounds = list(range(int(low) + CHUNK_ROWS, int(high) + 1, CHUNK_ROWS))
+    if not bounds:
+        return [None]
+    key = f"`{table['key']}`"
+    # Pierwsza i ostatnia część są otwarte - obejmują też wiersze dodane po odczycie MIN/MAX
+    chunks = [f"{key} < {bounds[0]}"]
+    chunks += [f"{key} >= {a} AND {key} < {b}" for a, b in zip(bounds, bounds[1:])]
+    chunks.append(f"{key} >= {bounds[-1]}")
+    return chunks
+
+
+def dump_to_file(args, path):
+    """
+    Uruchamia mysqldump i zapisuje skompresowane wyjście (przez plik .part).
+
+    Returns:
+        Rozmiar pliku w bajtach
+    """
+    part = path.with_name(path.name + '.part')
+    process = subprocess.Popen(mysql_command(*args, tool='mysqldump'), cwd=CONFIG_DIR,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    with open_compressed(part, 'wb') as out:
+        while True:
+            block = process.stdout.read(COPY_BUFFER)
+            if not block:
+                break
+            out.write(block)
+    stderr = process.stderr.read().decode('utf-8', errors='replace')
+    if process.wait():
+        part.unlink(missing_ok=True)
+        raise RuntimeError(f"mysqldump zakończony kodem {process.returncode}: {stderr.strip()}")
+    os.replace(part, path)
+    return path.stat().st_size
+
+
+def dump_data(table, where, path):
+    """Zrzuca dane tabeli (lub zakresu WHERE) do pliku. Zwraca (czas, rozmiar)."""
+    args = ['--no-create-info', '--skip-triggers', '--compact', '--single-transaction', '--quick',
+            '--no-tablespaces', '--hex-blob', DB_NAME, table]
+    if where:
+        args.insert(0, f'--where={where}')
+    start = time.perf_counter()
+    size = dump_to_file(args, path)
+    return time.perf_counter() - start, size
+
+
+def export_snapshot(output_dir, compression):
+    """
+    Tworzy migawkę bazy w katalogu output_dir.
+
+    Returns:
+        Manifest migawki
+    """
+    extension = EXTENSIONS[compression]
+    (output_dir / 'data').mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    tables = list_tables()
+    dump_to_file(['--no-data', '--routines', '--triggers', '--no-tablespaces', DB_NAME],
+                 output_dir / f'schema{extension}')
+    print(f"✓ Struktura: {len(tables)} tabel ({time.perf_counter() - start:.1f} s)")
+
+    jobs = []
+    for table in tables:
+        chunks = table_chunks(table)
+        table['files'] = []
+        for i, where in enumerate(chunks):
+            name = f"{table['name']}{f'.{i}' if len(chunks) > 1 else ''}{extension}"
+            table['files'].append(f'data/{name}')
+            jobs.append((table, where, output_dir / 'data' / name))
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        futures = [(table, executor.submit(dump_data, table['name'], where, path))
+                   for table, where, path in jobs]
+        for table, future in futures:
+            seconds, size = future.result()
+            table['seconds'] = table.get('seconds', 0) + seconds
+            table['compressed_bytes'] = table.get('compressed_bytes', 0) + size
+
+    manifest = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'database': DB_NAME,
+        'compression': compression,
+        'schema': f'schema{extension}',
+        'tables': {table['name']: {key: table[key] for key in ('rows', 'files', 'seconds', 'compressed_bytes')}
+                   for table in tables},
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+    with open(output_dir / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# --- Przywracanie ---
+
+def split_deferred_indexes(schema):
+    """
+    Usuwa z CREATE TABLE indeksy, które można dodać po załadowaniu danych.
+
+    Zostają: klucz główny, indeksy FULLTEXT/SPATIAL (InnoDB tworzy je
+    pojedynczo) i indeksy zaczynające się od kolumny AUTO_INCREMENT
+    (wymagane przy tworzeniu tabeli).
+
+    Returns:
+        Krotka (zmieniona struktura, słownik tabela -> lista definicji indeksów)
+    """
+    deferred = {}
+
+    def strip_keys(match):
+        name, body, options = match.groups()
+        lines = [line.strip().rstrip(',') for line in body.strip('\n').split('\n')]
+        auto_increment = {line.split('`')[1] for line in lines
+                          if line.startswith('`') and 'AUTO_INCREMENT' in line}
+        kept, keys = [], []
+        for line in lines:
+            is_secondary = line.startswith(('KEY ', 'UNIQUE KEY '))
+            first_column = line.split('(', 1)[1].split('`')[1] if is_secondary else None
+            if is_secondary and first_column not in auto_increment:
+                keys.append(line)
+            else:
+                kept.append(line)
+        if keys:
+            deferred[name] = keys
+        return f"CREATE TABLE `{name}` (\n  " + ',\n  '.join(kept) + f"\n){options};"
+
+    return CREATE_TABLE_RE.sub(strip_keys, schema), deferred
+
+
+def run_sql(stream, label):
+    """
+    Przesyła strumień SQL do klienta mysql.
+
+    Args:
+        stream: Iterator bloków bajtów
+        label: Opis do komunikatu błędu
+    """
+    process = subprocess.Popen(mysql_command(DB_NAME), cwd=CONFIG_DIR,
+                               stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        for block in stream:
+            process.stdin.write(block)
+        process.stdin.close()
+    except BrokenPipeError:
+        # mysql przerwał pracę - przyczyna jest w stderr
+        pass
+    stderr = process.stderr.read().decode('utf-8', errors='replace')
+    if process.wait():
+        raise RuntimeError(f"{label}: mysql zakończony kodem {process.returncode}: {stderr.strip()}")
+
+
+def file_blocks(path):
+    with open_compressed(path, 'rb') as f:
+        while True:
+            block = f.read(COPY_BUFFER)
+            if not block:
+                return
+            yield block
+
+
+def load_data(path):
+    """Ładuje plik danych jedną transakcją. Zwraca czas w sekundach."""
+    def stream():
+        yield LOAD_PRELUDE
+        yield from file_blocks(path)
+        yield LOAD_TRAILER
+
+    start = time.perf_counter()
+    run_sql(stream(), path.name)
+    return time.perf_counter() - start
+
+
+def add_indexes(table, keys):
+    """Dodaje odłożone indeksy tabeli jednym ALTER TABLE. Zwraca czas w sekundach."""
+    sql = f"SET foreign_key_checks = 0; ALTER TABLE `{table}` " + ', '.join(f"ADD {key}" for key in keys) + ';'
+    start = time.perf_counter()
+    run_sql([sql.encode('utf-8')], f"indeksy {table}")
+    return time.perf_counter() - start
+
+
+def restore_snapshot(snapshot_dir):
+    """
+    Przywraca migawkę (nadpisuje tabele z migawki).
+
+    Returns:
+        Słownik tabela -> {'load': czas danych, 'index': czas indeksów}
+    """
+    with open(snapshot_dir / 'manifest.json', 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    start = time.perf_counter()
+    schema = b''.join(file_blocks(snapshot_dir / manifest['schema'])).decode('utf-8')
+    schema, deferred = split_deferred_indexes(schema)
+    run_sql([b"SET foreign_key_checks = 0;\n", schema.encode('utf-8')], 'struktura')
+    print(f"✓ Struktura: {len(manifest['tables'])} tabel ({time.perf_counter() - start:.1f} s), "
+          f"odłożone indeksy: {sum(len(keys) for keys in deferred.values())}")
+
+    timings = {name: {'load': 0.0, 'index': 0.0} for name in manifest['tables']}
+    # Największe pliki najpierw - krótszy ogon na końcu
+    jobs = sorted(((name, snapshot_dir / file) for name, table in manifest['tables'].items()
+                   for file in table['files']), key=lambda job: job[1].stat().st_size, reverse=True)
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        for name, seconds in zip([name for name, _ in jobs], executor.map(load_data, [path for _, path in jobs])):
+            timings[name]['load'] += seconds
+        print(f"✓ Dane: {len(jobs)} plików ({time.perf_counter() - start:.1f} s)")
+
+        tables = sorted(deferred, key=lambda name: manifest['tables'].get(name, {}).get('rows', 0), reverse=True)
+        for name, seconds in zip(tables, executor.map(lambda name: add_indexes(name, deferred[name]), tables)):
+            timings.setdefault(name, {'load': 0.0, 'index': 0.0})['index'] = seconds
+        print(f"✓ Indeksy: {len(tables)} tabel ({time.perf_counter() - start:.1f} s)")
+
+    return timings
+
+
+def print_timings(rows, headers, limit):
+    """Wypisuje tabelę czasów (najwolniejsze tabele najpierw)."""
+    print(f"\n  {'Tabela':<40}" + ''.join(f"{header:>12}" for header in headers))
+    for name, values in rows[:limit]:
+        print(f"  {name:<40}" + ''.join(f"{value:>12}" for value in values))
+    if len(rows) > limit:
+        print(f"  ... i {len(rows) - limit} więcej (--top)")
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Równoległy eksport i przywracanie bazy danych sklepu')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Utwórz migawkę bazy')
+    export_parser.add_argument('--output', type=Path,
+                               help='Katalog migawki (domyślnie db-export/snapshot_<data>)')
+    export_parser.add_argument('--compression', choices=sorted(EXTENSIONS),
+                               default='zstd' if zstandard is not None else 'gzip',
+                               help='Kompresja (domyślnie zstd, jeśli jest pakiet zstandard)')
+
+    restore_parser = subparsers.add_parser('restore', help='Przywróć migawkę (NADPISUJE bazę)')
+    restore_parser.add_argument('snapshot', type=Path, help='Katalog migawki')
+    restore_parser.add_argument('--yes', action='store_true', help='Nie pytaj o potwierdzenie')
+
+    for subparser in (export_parser, restore_parser):
+        subparser.add_argument('--top', type=int, default=20, help='Liczba tabel w raporcie czasów')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'export':
+            if args.compression == 'zstd' and zstandard is None:
+                print("BŁĄD: Kompresja zstd wymaga pakietu zstandard (pip install zstandard)", file=sys.stderr)
+                return 1
+            output = args.output or EXPORT_DIR / f"snapshot_{datetime.now():%Y-%m-%d_%H-%M}"
+            print(f"⏳ Eksport bazy do {output} ({args.compression}, {WORKERS} procesów)...")
+            manifest = export_snapshot(output, args.compression)
+            rows = sorted(manifest['tables'].items(), key=lambda item: item[1]['seconds'], reverse=True)
+            print_timings([(name, (table['rows'], f"{table['compressed_bytes'] / 1024 / 1024:.1f} MB",
+                                   f"{table['seconds']:.2f} s")) for name, table in rows],
+                          ['Wiersze', 'Rozmiar', 'Zrzut'], args.top)
+            print(f"\n✅ Gotowe w {manifest['seconds']:.1f} s: {output}")
+            return 0
+
+        if not (args.snapshot / 'manifest.json').exists():
+            print(f"BŁĄD: {args.snapshot} nie jest katalogiem migawki (brak manifest.json)", file=sys.stderr)
+            return 1
+        if not args.yes:
+            print("UWAGA: To polecenie NADPISZE tabele bazy danych danymi z migawki!")
+            if input("Czy na pewno chcesz kontynuować? (t/n): ").strip().lower() != 't':
+                print("Anulowano.")
+                return 0
+        print(f"⏳ Przywracanie {args.snapshot} ({WORKERS} procesów)...")
+        start = time.perf_counter()
+        timings = restore_snapshot(args.snapshot)
+        rows = sorted(timings.items(), key=lambda item: item[1]['load'] + item[1]['index'], reverse=True)
+        print_timings([(name, (f"{t['load']:.2f} s", f"{t['index']:.2f} s")) for name, t in rows],
+                      ['Dane', 'Indeksy'], args.top)
+        print(f"\n✅ Baza przywrócona w {time.perf_counter() - start:.1f} s. Możliwe, że trzeba wyczyścić cache.")
+        return 0
+    except RuntimeError as e:
+        print(f"BŁĄD: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
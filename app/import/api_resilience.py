@@ -0,0 +1,221 @@
+"""
+Wspólna warstwa odporności zapytań do webservice PrestaShop.
+
+Używana przez prestashop_api.py i prestashop_async.py:
+- klasyfikacja błędów - ponawiane są błędy przejściowe (429, 500, 502,
+  503, 504, zerwane połączenia i przekroczenia czasu), a błędy danych
+  (400, 401, 404...) zwracane od razu; POST (nieidempotentny) jest
+  ponawiany tylko, gdy sklep na pewno go nie wykonał (429, 503, brak
+  połączenia),
+- wykładnicze opóźnienie z losowym rozrzutem (full jitter) między próbami,
+  z uwzględnieniem nagłówka Retry-After,
+- bezpiecznik (circuit breaker) - po serii kolejnych błędów przejściowych
+  wszystkie wątki wstrzymują zapytania, aż przeciążony sklep odpocznie,
+- raport niepowodzeń - zapytania, które nie udały się mimo ponowień, są
+  dopisywane do <katalog raportów>/<id przebiegu>.jsonl, skąd
+  retry_failures.py może je wysłać ponownie.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+API_RETRIES = int(os.getenv('API_RETRIES', '4'))
+API_RETRY_DELAY = float(os.getenv('API_RETRY_DELAY', '0.5'))
+API_RETRY_MAX_DELAY = float(os.getenv('API_RETRY_MAX_DELAY', '30'))
+# Bezpiecznik: liczba kolejnych błędów przejściowych i czas wstrzymania w sekundach
+BREAKER_THRESHOLD = int(os.getenv('API_BREAKER_THRESHOLD', '10'))
+BREAKER_COOLDOWN = float(os.getenv('API_BREAKER_COOLDOWN', '5'))
+BREAKER_MAX_COOLDOWN = 120
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Kody, przy których sklep odrzucił zapytanie przed jego wykonaniem - tylko
+# te pozwalają bezpiecznie ponowić POST (500/502/504 mogą przyjść już po
+# utworzeniu zasobu, a ponowienie dałoby duplikat)
+POST_RETRY_STATUSES = {429, 503}
+
+# PrestaShop 1.7 zgłasza ten błąd (HTTP 500) już po utworzeniu zasobu
+PHP_NOTICE_MARKER = b'PHP Notice #8'
+
+FAILURES_DIR = Path(os.getenv('API_FAILURES_DIR', Path(__file__).parent.parent / 'data' / 'api_failures'))
+RUN_ID_ENV = 'IMPORT_RUN_ID'
+
+
+def is_php_notice(status, body):
+    """Czy odpowiedź to błąd PHP Notice #8 (zasób mimo błędu 500 został zapisany)."""
+    return status == 500 and body is not None and PHP_NOTICE_MARKER in body
+
+
+def is_transient(status, body=None):
+    """Czy kod odpowiedzi oznacza przejściowy problem sklepu (dla bezpiecznika)."""
+    return status in RETRY_STATUSES and not is_php_notice(status, body)
+
+
+def should_retry(method, status=None, sent=False, body=None):
+    """
+    Czy błąd jest przejściowy i zapytanie warto ponowić.
+
+    Args:
+        method: Metoda HTTP
+        status: Kod HTTP odpowiedzi (None - błąd połączenia, brak odpowiedzi)
+        sent: Przy błędzie połączenia - czy zapytanie mogło dotrzeć do sklepu
+              (zerwane połączenie lub przekroczony czas odpowiedzi). Takiego
+              POST nie ponawiamy, bo zasób mógł zostać utworzony
+        body: Treść odpowiedzi (rozpoznanie PHP Notice #8)
+
+    Returns:
+        True jeśli należy ponowić
+    """
+    if status is None:
+        return not (sent and method == 'POST')
+    if is_php_notice(status, body):
+        return False
+    if method == 'POST':
+        return status in POST_RETRY_STATUSES
+    return status in RETRY_STATUSES
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Zwraca czas oczekiwania przed kolejną próbą (full jitter).
+
+    Args:
+        attempt: Numer nieudanej próby (od 0)
+        retry_after: Wartość nagłówka Retry-After (sekundy), jeśli była
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), API_RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0, min(API_RETRY_MAX_DELAY, API_RETRY_DELAY * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Bezpiecznik wspólny dla wszystkich wątków (i klienta asynchronicznego).
+
+    Po BREAKER_THRESHOLD kolejnych błędach przejściowych otwiera się na
+    BREAKER_COOLDOWN sekund - w tym czasie każde zapytanie czeka. Jeśli
+    pierwsze zapytania po przerwie znów się nie udają, przerwa jest
+    podwajana (do BREAKER_MAX_COOLDOWN). Udane zapytanie zamyka bezpiecznik.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.open_until = 0.0
+        self.current_cooldown = cooldown
+        self.trips = 0
+
+    def wait_time(self):
+        """Zwraca, ile sekund trzeba jeszcze czekać (0 - zamknięty)."""
+        with self.lock:
+            return max(0.0, self.open_until - time.monotonic())
+
+    def wait(self):
+        """Blokuje wątek, dopóki bezpiecznik jest otwarty."""
+        delay = self.wait_time()
+        while delay > 0:
+            time.sleep(delay)
+            delay = self.wait_time()
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.current_cooldown = self.cooldown
+
+    def failure(self):
+        """Zapisuje błąd przejściowy; otwiera bezpiecznik po przekroczeniu progu."""
+        with self.lock:
+            self.failures += 1
+            now = time.monotonic()
+            if self.failures < self.threshold or self.open_until > now:
+                return
+            self.open_until = now + self.current_cooldown
+            self.trips += 1
+            print(f"  Sklep nie odpowiada poprawnie ({self.failures} błędów z rzędu) - "
+                  f"wstrzymanie zapytań na {self.current_cooldown:.0f} s", file=sys.stderr)
+            self.current_cooldown = min(self.current_cooldown * 2, BREAKER_MAX_COOLDOWN)
+            self.failures = 0
+
+
+breaker = CircuitBreaker()
+
+_failures_lock = threading.Lock()
+# Ścieżka raportu -> liczba zapisanych w nim zapytań (w bieżącym procesie)
+_failure_counts = {}
+
+
+def failures_path(run_id=None):
+    """Ścieżka raportu niepowodzeń przebiegu (domyślnie bieżącego)."""
+    if run_id is None:
+        run_id = os.environ.setdefault(RUN_ID_ENV, datetime.now().strftime('%Y%m%d-%H%M%S'))
+    return FAILURES_DIR / f"{run_id}.jsonl"
+
+
+def record_failure(method, endpoint, params=None, data=None, status=None, error=None, extra=None):
+    """
+    Dopisuje do raportu zapytanie, które nie udało się mimo ponowień.
+
+    Args:
+        method: Metoda HTTP
+        endpoint: Endpoint API
+        params: Parametry zapytania
+        data: Treść zapytania (XML) - potrzebna do ponownego wysłania
+        status: Kod HTTP ostatniej odpowiedzi
+        error: Opis błędu połączenia
+        extra: Dodatkowe dane do ponowienia (np. ścieżka wgrywanego zdjęcia)
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', errors='replace')
+    entry = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'script': Path(sys.argv[0]).stem,
+        'method': method,
+        'endpoint': endpoint,
+        'params': params or {},
+        'data': data if isinstance(data, str) else None,
+        'status': status,
+        'error': error,
+    }
+    entry.update(extra or {})
+    path = failures_path()
+    with _failures_lock:
+        FAILURES_DIR.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        _failure_counts[path] = _failure_counts.get(path, 0) + 1
+
+
+def failure_count():
+    """Liczba zapytań zapisanych w raporcie bieżącego przebiegu przez ten proces."""
+    path = failures_path()
+    with _failures_lock:
+        return _failure_counts.get(path, 0)
+
+
+def print_failure_summary():
+    """Wypisuje informację o raporcie niepowodzeń (jeśli coś się nie udało)."""
+    count = failure_count()
+    if count:
+        print(f"\n  Nieudanych zapytań: {count} - raport: {failures_path()}")
+        print(f"  (ponowienie: python retry_failures.py --run {failures_path().stem})")
+
+
+def read_failures(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def list_reports():
+    if not FAILURES_DIR.exists():
+        return []
+    return sorted(FAILURES_DIR.glob('*.jsonl'))
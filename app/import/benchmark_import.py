@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark skryptów importu na lokalnym zamienniku API (fake_prestashop.py).
+
+Dla każdego rozmiaru katalogu uruchamia kolejno import_categories,
+import_products, update_stocks_images i clean_prestashop (każdy etap
+w osobnym procesie) i mierzy:
+- czas wykonania,
+- liczbę zapytań do API i zapytania na sekundę,
+- szczytowe zużycie pamięci (RSS) procesu etapu.
+
+Wyniki są dopisywane do historii (benchmarks/import_history.jsonl)
+i porównywane z zapisaną linią bazową (benchmarks/import_baseline.json).
+Etap wolniejszy od linii bazowej o więcej niż --tolerance jest zgłaszany
+jako regresja (kod wyjścia 1). Etap zakończony błędem (niezerowy kod
+wyjścia lub zapytania nieudane mimo ponowień) też kończy benchmark kodem 1
+i nie trafia do linii bazowej.
+
+Przykład:
+    python benchmark_import.py --sizes 1000 --latency 0.005
+    python benchmark_import.py --sizes 1000 --latency 0.005 --save-baseline
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+RESULTS_DIR = BASE_DIR / 'benchmarks'
+HISTORY_FILE = RESULTS_DIR / 'import_history.jsonl'
+BASELINE_FILE = RESULTS_DIR / 'import_baseline.json'
+
+STAGES = ['import_categories', 'import_products', 'update_stocks_images', 'clean_prestashop']
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def build_catalog(size, catalog_file, images_dir):
+    """Tworzy syntetyczny katalog testowy o zadanym rozmiarze (generate_catalog.py)."""
+    from generate_catalog import generate_products, write_catalog
+
+    write_catalog(generate_products(size, seed=size), catalog_file, 'json', images_dir)
+
+
+def run_stage(stage, catalog_file, images_dir, result_file):
+    """
+    Uruchamia etap w bieżącym procesie (wywoływane w procesie potomnym).
+
+    Returns:
+        Kod wyjścia etapu
+    """
+    import resource
+    import importlib
+
+    import api_resilience
+
+    module = importlib.import_module(stage)
+    if hasattr(module, 'INPUT_FILE') and stage != 'import_categories':
+        module.INPUT_FILE = Path(catalog_file)
+    if hasattr(module, 'IMAGES_DIR'):
+        module.IMAGES_DIR = Path(images_dir)
+    # Skróty produktów importu należą do sklepu testowego, nie do app/data
+    import import_products
+    import_products.FINGERPRINTS_FILE = Path(images_dir).parent / 'import_fingerprints.json'
+
+    exit_code = module.main() or 0
+
+    # ru_maxrss jest w KB na Linuksie
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    with open(result_file, 'w') as f:
+        json.dump({'peak_rss_mb': round(peak_rss_mb, 1), 'failures': api_resilience.failure_count()}, f)
+    return exit_code
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+
+def fetch_stats(server):
+    with server.stats_lock:
+        return dict(server.stats)
+
+
+def benchmark(sizes, latency, jitter, error_rate, stages, verbose=False):
+    """
+    Uruchamia pomiary dla wszystkich rozmiarów i etapów.
+
+    Returns:
+        Lista słowników z wynikami
+    """
+    from fake_prestashop import start_server
+
+    results = []
+    commit = get_git_commit()
+
+    for size in sizes:
+        server = start_server(latency=latency, jitter=jitter, error_rate=error_rate, seed=size)
+        env = dict(os.environ, PRESTASHOP_URL=server.api_url, API_KEY='benchmark')
+
+        with tempfile.TemporaryDirectory(prefix='bench_import_') as tmp:
+            tmp_path = Path(tmp)
+            catalog_file = tmp_path / 'catalog.json'
+            images_dir = tmp_path / 'images'
+            # Dziennik importu i raport niepowodzeń też trafiają do katalogu tymczasowego
+            env['IMPORT_JOURNAL_DIR'] = str(tmp_path / 'import_journal')
+            env['API_FAILURES_DIR'] = str(tmp_path / 'api_failures')
+            print(f"\n► Katalog: {size} produktów (przygotowanie danych...)")
+            build_catalog(size, catalog_file, images_dir)
+
+            for stage in stages:
+                result_file = tmp_path / f'{stage}.json'
+                with server.stats_lock:
+                    server.stats.clear()
+
+                start = time.perf_counter()
+                process = subprocess.run(
+                    [sys.executable, __file__, '--run-stage', stage,
+                     '--catalog', str(catalog_file), '--images', str(images_dir),
+                     '--result', str(result_file)],
+                    cwd=BASE_DIR, env=env,
+                    stdout=None if verbose else subprocess.DEVNULL,
+                    stderr=None if verbose else subprocess.DEVNULL
+                )
+                wall_time = time.perf_counter() - start
+
+                stats = fetch_stats(server)
+                requests_count = stats.get('total', 0)
+                peak_rss = None
+                failures = None
+                if result_file.exists():
+                    stage_result = json.loads(result_file.read_text())
+                    peak_rss = stage_result['peak_rss_mb']
+                    failures = stage_result['failures']
+
+                result = {
+                    'timestamp': datetime.now().isoformat(timespec='seconds'),
+                    'commit': commit,
+                    'stage': stage,
+                    'size': size,
+                    'latency': latency,
+                    'error_rate': error_rate,
+                    'wall_time': round(wall_time, 3),
+                    'requests': requests_count,
+                    'requests_per_s': round(requests_count / wall_time, 1) if wall_time else 0,
+                    'megabytes': round(stats.get('bytes', 0) / 1024 / 1024, 2),
+                    'peak_rss_mb': peak_rss,
+                    'exit_code': process.returncode,
+                    'failures': failures,
+                }
+                results.append(result)
+                if process.returncode:
+                    print(f"  ✗ {stage} zakończony kodem {process.returncode} (szczegóły: --verbose)")
+                elif failures:
+                    print(f"  ✗ {stage}: nieudanych zapytań {failures} (szczegóły: --verbose)")
+                print(f"  {stage:<22} {wall_time:>9.2f} s  {requests_count:>8} zapytań  "
+                      f"{result['requests_per_s']:>8.1f} zap/s  {result['megabytes']:>7.2f} MB  RSS {peak_rss} MB")
+
+        server.shutdown()
+        server.server_close()
+
+    return results
+
+
+def result_key(result):
+    return f"{result['stage']}@{result['size']}@{result['latency']}"
+
+
+def is_failed(result):
+    """Czy etap zakończył się błędem (wynik nie nadaje się do porównań)."""
+    return bool(result['exit_code'] or result.get('failures'))
+
+
+def check_regressions(results, baseline, tolerance):
+    """Zwraca listę opisów regresji względem linii bazowej."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result_key(result))
+        if not base or is_failed(result):
+            continue
+        if result['wall_time'] > base['wall_time'] * (1 + tolerance):
+            regressions.append(
+                f"{result['stage']} ({result['size']}): {base['wall_time']:.2f} s → "
+                f"{result['wall_time']:.2f} s ({(result['wall_time'] / base['wall_time'] - 1) * 100:+.0f}%)"
+            )
+        if result['requests'] > base['requests']:
+            regressions.append(
+                f"{result['stage']} ({result['size']}): zapytań {base['requests']} → {result['requests']}"
+            )
+    return regressions
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark skryptów importu PrestaShop')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Rozmiary katalogu oddzielone przecinkami (domyślnie 1000,10000,100000)')
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help='Etapy do uruchomienia oddzielone przecinkami')
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='Opóźnienie odpowiedzi API w sekundach (domyślnie 0.005)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Dodatkowe losowe opóźnienie w sekundach')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Odsetek zapytań kończonych błędem 500')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Dopuszczalne spowolnienie względem linii bazowej (domyślnie 0.10)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Zapisz wyniki jako nową linię bazową')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Pokaż wyjście skryptów importu')
+    # Argumenty wewnętrzne - uruchomienie pojedynczego etapu w procesie potomnym
+    parser.add_argument('--run-stage', help=argparse.SUPPRESS)
+    parser.add_argument('--catalog', help=argparse.SUPPRESS)
+    parser.add_argument('--images', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        return run_stage(args.run_stage, args.catalog, args.images, args.result)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    stages = [s for s in args.stages.split(',') if s]
+
+    print("\n" + "="*70)
+    print("  BENCHMARK IMPORTU")
+    print("="*70)
+    print(f"Opóźnienie API: {args.latency * 1000:.1f} ms, błędy: {args.error_rate * 100:.1f}%")
+
+    results = benchmark(sizes, args.latency, args.jitter, args.error_rate, stages, args.verbose)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    with open(HISTORY_FILE, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result) + '\n')
+    print(f"\n✓ Wyniki dopisano do {HISTORY_FILE}")
+
+    baseline = {}
+    if BASELINE_FILE.exists():
+        baseline = json.loads(BASELINE_FILE.read_text(encoding='utf-8'))
+
+    regressions = check_regressions(results, baseline, args.tolerance)
+    compared = bool(baseline)
+
+    failed = [r for r in results if is_failed(r)]
+
+    if args.save_baseline:
+        baseline.update({result_key(r): r for r in results if not is_failed(r)})
+        BASELINE_FILE.write_text(json.dumps(baseline, indent=2), encoding='utf-8')
+        print(f"✓ Zapisano linię bazową: {BASELINE_FILE}"
+              + (f" (bez {len(failed)} nieudanych etapów)" if failed else ""))
+
+    if failed:
+        print("\n⚠ Etapy zakończone błędem (pominięte w porównaniu):")
+        for result in failed:
+            print(f"  • {result['stage']} ({result['size']}): kod {result['exit_code']}, "
+                  f"nieudanych zapytań {result.get('failures')}")
+
+    if regressions:
+        print(f"\n⚠ Wykryto regresje (tolerancja {args.tolerance * 100:.0f}%):")
+        for regression in regressions:
+            print(f"  • {regression}")
+        return 1
+    if failed:
+        return 1
+
+    if compared:
+        print("\n✓ Brak regresji względem linii bazowej")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
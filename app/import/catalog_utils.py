@@ -0,0 +1,149 @@
+"""
+Wspólne funkcje danych katalogu (products_with_details.json) i plików sklepu.
+
+Nie korzystają z webservice, więc mogą ich używać narzędzia działające bez
+klucza API (db_bulk_load.py) oraz skrypty importu przez API.
+"""
+
+import json
+import re
+from pathlib import Path
+
+# Katalog /var/www/html kontenera PrestaShop (wolumen z docker-compose.yml)
+SHOP_HTML_DIR = Path(__file__).parent.parent / 'config' / 'html'
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def clean_price(price_str):
+    """Przekształca '31.00 zł' na '31.00'."""
+    if not price_str: return "0.00"
+    price = re.sub(r'[^\d.]', '', price_str.replace(',', '.'))
+    return f"{float(price):.2f}" if price else "0.00"
+
+def get_weight_from_name(name):
+    """
+    Wyciąga wagę z nazwy produktu (np. 'Yerba 500g' -> '0.500').
+    Domyślnie zwraca '0.000'.
+    """
+    if not name: return "0.000"
+    
+    text = name.lower().replace(',', '.')
+    
+    match_kg = re.search(r'(\d+(?:\.\d+)?)\s*kg', text)
+    if match_kg:
+        weight = float(match_kg.group(1))
+        return f"{weight:.3f}"
+
+    match_g = re.search(r'(\d+)\s*g', text)
+    if match_g:
+        weight_g = float(match_g.group(1))
+        weight_kg = weight_g / 1000.0
+        return f"{weight_kg:.3f}"
+
+    return "0.000"
+
+def format_html(text):
+    """Formatuje tekst z \n na HTML. Słowa przed \n są pogrubiane."""
+    if not text: return ""
+    
+    text = re.sub(r'([A-ZĄĆĘŁŃÓŚŹŻ][a-ząćęłńóśźż\s]+)\n([a-ząćęłńóśźż])', r'<strong>\1</strong>\n\2', text)
+    
+    text = text.replace('\n\n', '|||PARAGRAPH|||')
+    text = text.replace('\n', ' ')
+    text = text.replace('|||PARAGRAPH|||', '</p><p>')
+    
+    text = re.sub(r'([a-ząćęłńóśźż\.]) <strong>', r'\1<br><strong>', text)
+    
+    return f"<p>{text}</p>"
+
+
+def build_description(details):
+    """Opis HTML produktu: opis ze strony + lista szczegółów."""
+    description = format_html(details.get('opis', ''))
+    szczegoly = details.get('szczegoly', {})
+    if szczegoly:
+        description += "\n<h3>Szczegóły produktu:</h3>\n<ul>\n"
+        for key, value in szczegoly.items():
+            if value:
+                description += f"<li><strong>{key}:</strong> {value}</li>\n"
+        description += "</ul>"
+    return description
+
+
+def product_source_fields(item):
+    """
+    Zbiera pola produktu wyliczane z pliku JSON (bez zapytań do API).
+
+    Returns:
+        Słownik: grupa pól -> wartość (price, description, weight,
+        manufacturer, categories, features)
+    """
+    details = item.get('szczegoly_produktu', {})
+    # Cena w JSON to cena BRUTTO - PrestaShop potrzebuje NETTO
+    cena_brutto = float(clean_price(details.get('cena', '0.00')))
+    return {
+        'price': f"{(cena_brutto / 1.23):.2f}",
+        'description': build_description(details),
+        'weight': get_weight_from_name(item.get('nazwa')),
+        'manufacturer': details.get('marka') or '',
+        'categories': item.get('kategoria_pelna_sciezka', ''),
+        'features': sorted((key, value) for key, value in details.get('szczegoly', {}).items() if value),
+    }
+
+
+def iter_catalog(path, chunk_size=READ_CHUNK_SIZE):
+    """
+    Czyta produkty z pliku katalogu po jednym, bez wczytywania całego pliku.
+
+    Obsługuje listę JSON (products_with_details.json, generate_catalog.py
+    --format json) oraz format jsonl (jeden produkt w wierszu). W pamięci
+    jest tylko bieżący fragment pliku i jeden produkt.
+
+    Yields:
+        Słowniki produktów
+    """
+    decoder = json.JSONDecoder()
+    separators = re.compile(r'[\s,]*')
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        is_list = buffer.startswith('[')
+        pos = 1 if is_list else 0
+        while True:
+            # Pomija białe znaki (i przecinki listy) przed kolejnym produktem
+            pos = separators.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == ']' and is_list:
+                return
+            try:
+                item, pos_end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Produkt urwany na granicy fragmentu (albo koniec pliku) - doczytaj dalej
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    if pos >= len(buffer):
+                        return
+                    raise
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            if not isinstance(item, dict):
+                raise ValueError(f"Nieoczekiwany element katalogu w {path}: {item!r}")
+            yield item
+            pos = pos_end
+
+
+def get_local_images(folder_path):
+    """Zwraca nazwy (bez rozszerzenia) zdjęć produktu w kolejności wgrywania."""
+    names = []
+    if (folder_path / "product.jpg").exists():
+        names.append("product")
+    i = 2
+    while (folder_path / f"product_{i}.jpg").exists():
+        names.append(f"product_{i}")
+        i += 1
+    return names
+
+
+def image_dir(image_id):
+    """Zwraca katalog zdjęcia w strukturze PrestaShop (np. img/p/1/2/3)."""
+    return SHOP_HTML_DIR / 'img' / 'p' / Path(*str(image_id))
@@ -5,8 +5,39 @@ Skrypt do czyszczenia danych w PrestaShop
 Usuwa wszystkie produkty, kategorie, producentów, cechy
 """
 
+import asyncio
+
 from tqdm import tqdm
-from prestashop_api import get_api_xml, delete_api_resource, test_connection, PRESTASHOP_URL
+import api_resilience
+from prestashop_api import get_api_records, delete_api_resource, test_connection, PRESTASHOP_URL
+import import_products
+
+
+def delete_resources(endpoint, ids, desc):
+    """
+    Usuwa zasoby o podanych ID.
+
+    Z pakietem aiohttp zapytania idą równolegle przez klienta asynchronicznego
+    (prestashop_async.py), bez niego - po kolei.
+
+    Returns:
+        Liczba usuniętych zasobów
+    """
+    try:
+        from prestashop_async import AsyncPrestaShopClient
+    except ImportError:
+        print("  (bez pakietu aiohttp - usuwanie po kolei; pip install -r requirements-optional.txt)")
+        return sum(1 for resource_id in tqdm(ids, desc=desc, ncols=80)
+                   if delete_api_resource(endpoint, resource_id))
+
+    async def delete_all():
+        with tqdm(total=len(ids), desc=desc, ncols=80) as progress:
+            async with AsyncPrestaShopClient() as client:
+                results = await client.map(lambda resource_id: client.delete(endpoint, resource_id),
+                                           ids, progress=progress.update)
+        return sum(1 for ok in results if ok)
+
+    return asyncio.run(delete_all())
 
 
 def delete_all_products():
@@ -14,25 +45,24 @@ def delete_all_products():
     print("\n" + "─"*60)
     print("► Usuwanie produktów...")
     
-    xml = get_api_xml('products')
-    if xml is None:
+    products = get_api_records('products')
+    if products is None:
         print(" Nie udało się pobrać listy produktów")
         return 0
     
-    products = xml.findall('.//product')
     total = len(products)
     
     if total == 0:
         print("  ✓ Brak produktów do usunięcia")
         return 0
     
-    deleted = 0
-    for product in tqdm(products, desc="  Produkty", ncols=80):
-        product_id = product.get('id')
-        if delete_api_resource('products', product_id):
-            deleted += 1
+    deleted = delete_resources('products', [product.id for product in products], "  Produkty")
     
     print(f"  ✓ Usunięto produktów: {deleted}/{total}")
+
+    # Zapisane skróty dotyczą usuniętych produktów - import --upsert musi je utworzyć od nowa
+    if import_products.FINGERPRINTS_FILE.exists():
+        import_products.FINGERPRINTS_FILE.unlink()
     return deleted
 
 
@@ -41,23 +71,18 @@ def delete_all_manufacturers():
     print("\n" + "─"*60)
     print("► Usuwanie producentów...")
     
-    xml = get_api_xml('manufacturers')
-    if xml is None:
+    manufacturers = get_api_records('manufacturers')
+    if manufacturers is None:
         print(" Nie udało się pobrać listy producentów")
         return 0
     
-    manufacturers = xml.findall('.//manufacturer')
     total = len(manufacturers)
     
     if total == 0:
         print("  ✓ Brak producentów do usunięcia")
         return 0
     
-    deleted = 0
-    for manufacturer in tqdm(manufacturers, desc="  Producenci", ncols=80):
-        manufacturer_id = manufacturer.get('id')
-        if delete_api_resource('manufacturers', manufacturer_id):
-            deleted += 1
+    deleted = delete_resources('manufacturers', [manufacturer.id for manufacturer in manufacturers], "  Producenci")
     
     print(f"  ✓ Usunięto producentów: {deleted}/{total}")
     return deleted
@@ -68,24 +93,23 @@ def delete_custom_categories():
     print("\n" + "─"*60)
     print("► Usuwanie kategorii...")
     
-    xml = get_api_xml('categories')
-    if xml is None:
+    all_categories = get_api_records('categories')
+    if all_categories is None:
         print(" Nie udało się pobrać listy kategorii")
         return 0
     
-    all_categories = xml.findall('.//category')
-    categories = [c for c in all_categories if int(c.get('id')) > 2]
+    categories = [c for c in all_categories if int(c.id) > 2]
     total = len(categories)
     
     if total == 0:
         print("  ✓ Brak kategorii do usunięcia")
         return 0
     
-    categories.sort(key=lambda c: int(c.get('id')), reverse=True)
+    categories.sort(key=lambda c: int(c.id), reverse=True)
     
     deleted = 0
     for category in tqdm(categories, desc="  Kategorie", ncols=80):
-        category_id = category.get('id')
+        category_id = category.id
         if delete_api_resource('categories', category_id):
             deleted += 1
     
@@ -98,23 +122,18 @@ def delete_all_features():
     print("\n" + "─"*60)
     print("► Usuwanie cech produktów...")
     
-    xml = get_api_xml('product_features')
-    if xml is None:
+    features = get_api_records('product_features')
+    if features is None:
         print(" Nie udało się pobrać listy cech")
         return 0
     
-    features = xml.findall('.//product_feature')
     total = len(features)
     
     if total == 0:
         print("  ✓ Brak cech do usunięcia")
         return 0
     
-    deleted = 0
-    for feature in tqdm(features, desc="  Cechy", ncols=80):
-        feature_id = feature.get('id')
-        if delete_api_resource('product_features', feature_id):
-            deleted += 1
+    deleted = delete_resources('product_features', [feature.id for feature in features], "  Cechy")
     
     print(f"  ✓ Usunięto cech: {deleted}/{total}")
     return deleted
@@ -148,6 +167,7 @@ def main():
     print("\n" + "="*60)
     print("  ✓ CZYSZCZENIE ZAKOŃCZONE")
     print("="*60 + "\n")
+    api_resilience.print_failure_summary()
     
     return 0
 
@@ -0,0 +1,786 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ładowanie katalogu bezpośrednio do bazy MariaDB PrestaShop (pierwszy import).
+
+Alternatywa dla import_categories / import_products / update_stocks_images
+przy pustym sklepie: zamiast kilku zapytań webservice na produkt (i budowania
+obiektów PHP) wiersze kategorii, producentów, cech, produktów, stanów
+magazynowych i zdjęć są wstawiane do tabel schematu PrestaShop 1.7.8
+wielowierszowymi INSERT-ami (executemany), partiami po BATCH_SIZE produktów
+- każda partia w osobnej transakcji.
+
+Przed zatwierdzeniem każdej partii:
+- zdjęcia jej produktów są kopiowane do img/p sklepu razem z miniaturami
+  wszystkich typów obrazów produktów (image_type), w puli procesów,
+- budowany jest jej indeks wyszukiwarki (search_word/search_index)
+  z wagami z konfiguracji sklepu.
+Na końcu przeliczane jest drzewo kategorii (nleft/nright/level_depth).
+
+Istniejące kategorie, producenci i cechy są używane ponownie, a produkty,
+których reference (id_produktu) jest już w bazie, pomijane - przerwane
+ładowanie można uruchomić ponownie. Ponowne uruchomienie uzupełnia też
+brakujące pliki zdjęć i indeks wyszukiwarki produktów załadowanych
+wcześniej. Produkty bez id_produktu są pomijane (nie da się ich rozpoznać
+przy ponownym uruchomieniu). Zmiany nie trafiają do dziennika importu
+(rollback_import.py) - przed ładowaniem warto zrobić kopię bazy.
+
+Połączenie: DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, DB_PREFIX
+(plik .env; domyślnie baza z docker-compose.yml wystawiona na 127.0.0.1:3306).
+Wymaga pakietu pymysql (pip install pymysql).
+
+Przykład:
+    python db_bulk_load.py --limit 100
+    python db_bulk_load.py
+    python db_bulk_load.py --skip-images
+"""
+
+import functools
+import html
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+from PIL import Image
+from slugify import slugify
+from text_unidecode import unidecode
+
+try:
+    import pymysql
+except ImportError:
+    pymysql = None
+
+from catalog_utils import SHOP_HTML_DIR, get_local_images, image_dir, product_source_fields
+
+load_dotenv(Path(__file__).parent / '.env')
+
+DB_HOST = os.getenv('DB_HOST', '127.0.0.1')
+DB_PORT = int(os.getenv('DB_PORT', '3306'))
+DB_NAME = os.getenv('DB_NAME', 'prestashop_db')
+DB_USER = os.getenv('DB_USER', 'prestashop_user')
+DB_PASSWORD = os.getenv('DB_PASSWORD', 'secure_user_password')
+DB_PREFIX = os.getenv('DB_PREFIX', 'ps_')
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+CATEGORIES_FILE = DATA_DIR / 'categories.json'
+INPUT_FILE = DATA_DIR / 'products_with_details.json'
+IMAGES_DIR = DATA_DIR / 'images'
+
+ID_LANG = 1
+ID_SHOP = 1
+ID_TAX_RULES_GROUP = 1
+HOME_CATEGORY_ID = 2
+# Liczba produktów w jednej transakcji
+BATCH_SIZE = int(os.getenv('DB_BATCH_SIZE', '1000'))
+JPEG_QUALITY = 90
+
+# Wagi indeksu wyszukiwarki, gdy nie ma ich w konfiguracji sklepu (domyślne PrestaShop)
+SEARCH_DEFAULTS = {
+    'PS_SEARCH_WEIGHT_PNAME': 6,
+    'PS_SEARCH_WEIGHT_REF': 10,
+    'PS_SEARCH_WEIGHT_SHORTDESC': 1,
+    'PS_SEARCH_WEIGHT_DESC': 1,
+    'PS_SEARCH_WEIGHT_CNAME': 3,
+    'PS_SEARCH_WEIGHT_MNAME': 3,
+    'PS_SEARCH_WEIGHT_FEATURE': 2,
+    'PS_SEARCH_MINWORDLEN': 3,
+}
+SEARCH_MAX_WORD_LENGTH = 30
+
+
+def table(name):
+    return f"`{DB_PREFIX}{name}`"
+
+
+def connect():
+    return pymysql.connect(host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD,
+                           database=DB_NAME, charset='utf8mb4', autocommit=False)
+
+
+def insert_rows(cursor, table_name, columns, rows, suffix=''):
+    """
+    Wstawia wiersze wielowierszowymi INSERT-ami.
+
+    pymysql zamienia executemany() z INSERT ... VALUES na jedno zapytanie
+    z wieloma krotkami (do limitu długości zapytania).
+
+    Args:
+        cursor: Kursor pymysql
+        table_name: Nazwa tabeli bez prefiksu
+        columns: Nazwy kolumn
+        rows: Lista krotek wartości
+        suffix: Dodatkowa klauzula (np. ON DUPLICATE KEY UPDATE ...)
+    """
+    if not rows:
+        return
+    column_list = ', '.join(f"`{column}`" for column in columns)
+    placeholders = ', '.join(['%s'] * len(columns))
+    query = f"INSERT INTO {table(table_name)} ({column_list}) VALUES ({placeholders}){suffix}"
+    for start in range(0, len(rows), BATCH_SIZE):
+        cursor.executemany(query, rows[start:start + BATCH_SIZE])
+
+
+def next_id(cursor, table_name, column):
+    cursor.execute(f"SELECT COALESCE(MAX(`{column}`), 0) + 1 FROM {table(table_name)}")
+    return cursor.fetchone()[0]
+
+
+def load_categories(cursor, tree, now):
+    """
+    Wstawia brakujące kategorie drzewa z categories.json (pod kategorią Home).
+
+    Returns:
+        Krotka (słownik {(nazwa złożona casefold, ID rodzica): ID}, liczba utworzonych)
+    """
+    cursor.execute(f"SELECT c.id_category, c.id_parent, c.level_depth, cl.name FROM {table('category')} c "
+                   f"JOIN {table('category_lang')} cl ON cl.id_category = c.id_category "
+                   f"AND cl.id_lang = %s AND cl.id_shop = %s", (ID_LANG, ID_SHOP))
+    categories, depths = {}, {}
+    for category_id, parent_id, depth, name in cursor.fetchall():
+        categories.setdefault((name.casefold(), parent_id), category_id)
+        depths[category_id] = depth
+
+    cursor.execute(f"SELECT id_parent, MAX(position) FROM {table('category')} GROUP BY id_parent")
+    positions = {parent_id: position for parent_id, position in cursor.fetchall()}
+    cursor.execute(f"SELECT id_group FROM {table('group')}")
+    groups = [row[0] for row in cursor.fetchall()]
+
+    new_id = next_id(cursor, 'category', 'id_category')
+    rows = {'category': [], 'category_lang': [], 'category_shop': [], 'category_group': []}
+    level = [(category, HOME_CATEGORY_ID) for category in tree]
+    while level:
+        next_level = []
+        for category, parent_id in level:
+            name = (category.get('name') or '').strip()
+            if not name:
+                continue
+            key = (name.casefold(), parent_id)
+            if key not in categories:
+                category_id = new_id
+                new_id += 1
+                categories[key] = category_id
+                depths[category_id] = depths.get(parent_id, 1) + 1
+                position = positions.get(parent_id, -1) + 1
+                positions[parent_id] = position
+                rows['category'].append((category_id, parent_id, ID_SHOP, depths[category_id], 0, 0, 1,
+                                         now, now, position, 0))
+                rows['category_lang'].append((category_id, ID_SHOP, ID_LANG, name, '', slugify(name)))
+                rows['category_shop'].append((category_id, ID_SHOP, position))
+                rows['category_group'].extend((category_id, group_id) for group_id in groups)
+            next_level.extend((sub, categories[key]) for sub in category.get('subcategories') or [])
+        level = next_level
+
+    insert_rows(cursor, 'category', ('id_category', 'id_parent', 'id_shop_default', 'level_depth', 'nleft',
+                                     'nright', 'active', 'date_add', 'date_upd', 'position', 'is_root_category'),
+                rows['category'])
+    insert_rows(cursor, 'category_lang', ('id_category', 'id_shop', 'id_lang', 'name', 'description',
+                                          'link_rewrite'), rows['category_lang'])
+    insert_rows(cursor, 'category_shop', ('id_category', 'id_shop', 'position'), rows['category_shop'])
+    insert_rows(cursor, 'category_group', ('id_category', 'id_group'), rows['category_group'])
+    return categories, len(rows['category'])
+
+
+def category_ids_for_path(path_str, categories):
+    """
+    Zamienia ścieżkę "Kat1/Kat2" na ID kategorii (jak get_category_id_by_path
+    w import_products.py).
+
+    Returns:
+        Krotka (ID kategorii domyślnej, lista ID wszystkich kategorii ścieżki z Home)
+    """
+    parent_id = HOME_CATEGORY_ID
+    all_ids = [parent_id]
+    for part in (p.strip() for p in (path_str or '').split('/') if p.strip()):
+        category_id = categories.get((part.casefold(), parent_id))
+        if category_id is None:
+            break
+        parent_id = category_id
+        all_ids.append(category_id)
+    return parent_id, all_ids
+
+
+def load_references(cursor, items, now):
+    """
+    Wstawia brakujących producentów, cechy i wartości cech z katalogu.
+
+    Returns:
+        Krotka (słownik map {'manufacturers', 'features', 'values'}, liczniki utworzonych)
+    """
+    manufacturers, features, values = set(), set(), set()
+    for item in items:
+        fields = item['fields']
+        if fields['manufacturer']:
+            manufacturers.add(fields['manufacturer'])
+        for key, value in fields['features']:
+            features.add(key)
+            values.add((key, value))
+
+    cursor.execute(f"SELECT id_manufacturer, name FROM {table('manufacturer')}")
+    manufacturer_ids = {name.casefold(): manufacturer_id for manufacturer_id, name in cursor.fetchall()}
+    cursor.execute(f"SELECT id_feature, name FROM {table('feature_lang')} WHERE id_lang = %s", (ID_LANG,))
+    feature_ids = {name.casefold(): feature_id for feature_id, name in cursor.fetchall()}
+    cursor.execute(f"SELECT v.id_feature_value, v.id_feature, vl.value FROM {table('feature_value')} v "
+                   f"JOIN {table('feature_value_lang')} vl ON vl.id_feature_value = v.id_feature_value "
+                   f"AND vl.id_lang = %s WHERE v.custom = 0", (ID_LANG,))
+    value_ids = {(feature_id, value.casefold()): value_id for value_id, feature_id, value in cursor.fetchall()}
+
+    created = {'manufacturers': 0, 'features': 0, 'feature_values': 0}
+
+    rows = []
+    new_id = next_id(cursor, 'manufacturer', 'id_manufacturer')
+    for name in sorted(manufacturers):
+        if name.casefold() not in manufacturer_ids:
+            manufacturer_ids[name.casefold()] = new_id
+            rows.append((new_id, name, now, now, 1))
+            new_id += 1
+    insert_rows(cursor, 'manufacturer', ('id_manufacturer', 'name', 'date_add', 'date_upd', 'active'), rows)
+    insert_rows(cursor, 'manufacturer_lang', ('id_manufacturer', 'id_lang'), [(row[0], ID_LANG) for row in rows])
+    insert_rows(cursor, 'manufacturer_shop', ('id_manufacturer', 'id_shop'), [(row[0], ID_SHOP) for row in rows])
+    created['manufacturers'] = len(rows)
+
+    rows = []
+    new_id = next_id(cursor, 'feature', 'id_feature')
+    cursor.execute(f"SELECT COALESCE(MAX(position) + 1, 0) FROM {table('feature')}")
+    position = cursor.fetchone()[0]
+    for name in sorted(features):
+        if name.casefold() not in feature_ids:
+            feature_ids[name.casefold()] = new_id
+            rows.append((new_id, position, name))
+            new_id += 1
+            position += 1
+    insert_rows(cursor, 'feature', ('id_feature', 'position'), [row[:2] for row in rows])
+    insert_rows(cursor, 'feature_lang', ('id_feature', 'id_lang', 'name'),
+                [(row[0], ID_LANG, row[2]) for row in rows])
+    insert_rows(cursor, 'feature_shop', ('id_feature', 'id_shop'), [(row[0], ID_SHOP) for row in rows])
+    created['features'] = len(rows)
+
+    rows = []
+    new_id = next_id(cursor, 'feature_value', 'id_feature_value')
+    for key, value in sorted(values):
+        feature_id = feature_ids[key.casefold()]
+        if (feature_id, value.casefold()) not in value_ids:
+            value_ids[(feature_id, value.casefold())] = new_id
+            rows.append((new_id, feature_id, value))
+            new_id += 1
+    insert_rows(cursor, 'feature_value', ('id_feature_value', 'id_feature', 'custom'),
+                [(row[0], row[1], 0) for row in rows])
+    insert_rows(cursor, 'feature_value_lang', ('id_feature_value', 'id_lang', 'value'),
+                [(row[0], ID_LANG, row[2]) for row in rows])
+    created['feature_values'] = len(rows)
+
+    return {'manufacturers': manufacturer_ids, 'features': feature_ids, 'values': value_ids}, created
+
+
+def find_local_images(product_key, folders):
+    """Zwraca ścieżki zdjęć produktu (product.jpg, product_2.jpg, ...) z katalogu IMAGES_DIR."""
+    folder = folders.get(str(product_key))
+    if not folder:
+        return []
+    return [IMAGES_DIR / folder / f"{name}.jpg" for name in get_local_images(IMAGES_DIR / folder)]
+
+
+def image_folders():
+    """Zwraca słownik id_produktu -> katalog zdjęć w IMAGES_DIR."""
+    folders = {}
+    if IMAGES_DIR.exists():
+        for entry in os.listdir(IMAGES_DIR):
+            folders.setdefault(entry.split('_', 1)[0], entry)
+    return folders
+
+
+def search_entry(product_id, item, default_category):
+    """Dane produktu potrzebne do indeksu wyszukiwarki (index_batch)."""
+    fields = item['fields']
+    return {
+        'id': product_id, 'name': item['name'], 'reference': item['reference'],
+        'description_short': fields['description'][:150], 'description': fields['description'],
+        'category': default_category, 'manufacturer': fields['manufacturer'],
+        'features': [value for _, value in fields['features']],
+    }
+
+
+def load_products(connection, cursor, items, categories, references, now, loader):
+    """
+    Wstawia produkty partiami po BATCH_SIZE (każda partia w jednej transakcji).
+
+    Zdjęcia i indeks wyszukiwarki partii są tworzone przed jej zatwierdzeniem,
+    więc zatwierdzony produkt ma zawsze pliki zdjęć i wpisy w indeksie.
+
+    Args:
+        loader: ProductExtras - zdjęcia i indeks wyszukiwarki
+
+    Returns:
+        Liczba załadowanych produktów
+    """
+    cursor.execute(f"SELECT id_category, MAX(position) FROM {table('category_product')} GROUP BY id_category")
+    positions = {category_id: position for category_id, position in cursor.fetchall()}
+
+    product_id = next_id(cursor, 'product', 'id_product')
+    image_id = next_id(cursor, 'image', 'id_image')
+
+    for start in range(0, len(items), BATCH_SIZE):
+        rows = {name: [] for name in ('product', 'product_shop', 'product_lang', 'category_product',
+                                      'feature_product', 'stock_available', 'image', 'image_shop', 'image_lang')}
+        batch, image_jobs = [], []
+        for item in items[start:start + BATCH_SIZE]:
+            fields = item['fields']
+            name = item['name']
+            reference = item['reference']
+            manufacturer_id = references['manufacturers'].get(fields['manufacturer'].casefold(), 0) \
+                if fields['manufacturer'] else 0
+            default_category, category_ids = category_ids_for_path(fields['categories'], categories)
+            description = fields['description']
+            # Jak update_stocks_images.set_stock - losowy stan 1-9 szt.
+            quantity = random.randint(1, 9)
+
+            rows['product'].append((product_id, manufacturer_id, default_category, ID_SHOP, ID_TAX_RULES_GROUP,
+                                    reference, fields['price'], fields['weight'], quantity, 1, 1, 1, 1, 0,
+                                    'both', 1, now, now))
+            rows['product_shop'].append((product_id, ID_SHOP, default_category, ID_TAX_RULES_GROUP,
+                                         fields['price'], 1, 1, 1, 1, 0, 'both', now, now))
+            rows['product_lang'].append((product_id, ID_SHOP, ID_LANG, description, description[:150],
+                                         slugify(name), name))
+            for category_id in category_ids:
+                position = positions.get(category_id, -1) + 1
+                positions[category_id] = position
+                rows['category_product'].append((category_id, product_id, position))
+            for key, value in fields['features']:
+                feature_id = references['features'][key.casefold()]
+                rows['feature_product'].append(
+                    (feature_id, product_id, references['values'][(feature_id, value.casefold())]))
+            rows['stock_available'].append((product_id, 0, ID_SHOP, 0, quantity, quantity, 0, 0, 2, ''))
+
+            images = find_local_images(reference, loader.folders) if loader.with_images else []
+            for position, image_path in enumerate(images, start=1):
+                cover = 1 if position == 1 else None
+                rows['image'].append((image_id, product_id, position, cover))
+                rows['image_shop'].append((product_id, image_id, ID_SHOP, cover))
+                rows['image_lang'].append((image_id, ID_LANG, name))
+                image_jobs.append((str(image_path), image_id))
+                image_id += 1
+
+            batch.append(search_entry(product_id, item, default_category))
+            product_id += 1
+
+        insert_rows(cursor, 'product', (
+            'id_product', 'id_manufacturer', 'id_category_default', 'id_shop_default', 'id_tax_rules_group',
+            'reference', 'price', 'weight', 'quantity', 'minimal_quantity', 'active', 'available_for_order',
+            'show_price', 'indexed', 'visibility', 'state', 'date_add', 'date_upd'), rows['product'])
+        insert_rows(cursor, 'product_shop', (
+            'id_product', 'id_shop', 'id_category_default', 'id_tax_rules_group', 'price', 'minimal_quantity',
+            'active', 'available_for_order', 'show_price', 'indexed', 'visibility', 'date_add', 'date_upd'),
+            rows['product_shop'])
+        insert_rows(cursor, 'product_lang', ('id_product', 'id_shop', 'id_lang', 'description',
+                                             'description_short', 'link_rewrite', 'name'), rows['product_lang'])
+        insert_rows(cursor, 'category_product', ('id_category', 'id_product', 'position'), rows['category_product'])
+        insert_rows(cursor, 'feature_product', ('id_feature', 'id_product', 'id_feature_value'),
+                    rows['feature_product'])
+        insert_rows(cursor, 'stock_available', (
+            'id_product', 'id_product_attribute', 'id_shop', 'id_shop_group', 'quantity', 'physical_quantity',
+            'reserved_quantity', 'depends_on_stock', 'out_of_stock', 'location'), rows['stock_available'])
+        insert_rows(cursor, 'image', ('id_image', 'id_product', 'position', 'cover'), rows['image'])
+        insert_rows(cursor, 'image_shop', ('id_product', 'id_image', 'id_shop', 'cover'), rows['image_shop'])
+        insert_rows(cursor, 'image_lang', ('id_image', 'id_lang', 'legend'), rows['image_lang'])
+        loader.install_images(image_jobs)
+        loader.index(cursor, batch)
+        connection.commit()
+        print(f"  Produkty: {min(start + BATCH_SIZE, len(items))}/{len(items)}")
+
+    return len(items)
+
+
+def repair_products(connection, cursor, items, existing, categories, loader):
+    """
+    Uzupełnia produkty załadowane wcześniej (np. przez przerwane ładowanie):
+    brakujące pliki zdjęć w img/p i indeks wyszukiwarki (indexed = 0).
+
+    Args:
+        items: Produkty katalogu, które są już w bazie
+        existing: Słownik reference -> (ID produktu, indexed)
+
+    Returns:
+        Krotka (liczba ponownie zaindeksowanych produktów, liczba odtworzonych zdjęć)
+    """
+    by_id = {existing[item['reference']][0]: item for item in items}
+
+    jobs = []
+    if loader.with_images and by_id:
+        cursor.execute(f"SELECT id_image, id_product, position FROM {table('image')}")
+        for image_id, product_id, position in cursor.fetchall():
+            item = by_id.get(product_id)
+            if item is None or (image_dir(image_id) / f"{image_id}.jpg").exists():
+                continue
+            images = find_local_images(item['reference'], loader.folders)
+            if 0 < position <= len(images):
+                jobs.append((str(images[position - 1]), image_id))
+    for start in range(0, len(jobs), BATCH_SIZE):
+        loader.install_images(jobs[start:start + BATCH_SIZE])
+
+    unindexed = [item for item in items if not existing[item['reference']][1]]
+    for start in range(0, len(unindexed), BATCH_SIZE):
+        batch = []
+        for item in unindexed[start:start + BATCH_SIZE]:
+            default_category, _ = category_ids_for_path(item['fields']['categories'], categories)
+            batch.append(search_entry(existing[item['reference']][0], item, default_category))
+        loader.index(cursor, batch)
+        connection.commit()
+
+    return len(unindexed), len(jobs)
+
+
+def regenerate_category_tree(cursor):
+    """
+    Przelicza nleft, nright i level_depth wszystkich kategorii
+    (odpowiednik Category::regenerateEntireNtree()).
+
+    Returns:
+        Liczba kategorii
+    """
+    cursor.execute(f"SELECT c.id_category, c.id_parent FROM {table('category')} c "
+                   f"LEFT JOIN {table('category_shop')} cs ON cs.id_category = c.id_category AND cs.id_shop = %s "
+                   f"ORDER BY c.id_parent, cs.position, c.id_category", (ID_SHOP,))
+    children = {}
+    for category_id, parent_id in cursor.fetchall():
+        children.setdefault(parent_id, []).append(category_id)
+
+    updates = []
+    counter = 1
+    # Stos (ID, głębokość, czy zamknięcie węzła) - bez rekurencji dla głębokich drzew
+    stack = [(category_id, 0, False) for category_id in reversed(children.get(0, []))]
+    lefts = {}
+    while stack:
+        category_id, depth, closing = stack.pop()
+        if closing:
+            updates.append((lefts.pop(category_id), counter, depth, category_id))
+            counter += 1
+            continue
+        lefts[category_id] = counter
+        counter += 1
+        stack.append((category_id, depth, True))
+        stack.extend((child, depth + 1, False) for child in reversed(children.get(category_id, [])))
+
+    cursor.executemany(f"UPDATE {table('category')} SET nleft = %s, nright = %s, level_depth = %s "
+                       f"WHERE id_category = %s", updates)
+    return len(updates)
+
+
+def search_settings(cursor):
+    """
+    Odczytuje wagi indeksu wyszukiwarki, minimalną długość słowa i czarną listę.
+
+    Returns:
+        Krotka (słownik ustawień, zbiór słów z czarnej listy)
+    """
+    names = list(SEARCH_DEFAULTS)
+    cursor.execute(f"SELECT name, value FROM {table('configuration')} WHERE name IN ({', '.join(['%s'] * len(names))}) "
+                   f"ORDER BY id_shop IS NOT NULL, id_shop_group IS NOT NULL", names)
+    settings = dict(SEARCH_DEFAULTS)
+    seen = set()
+    for name, value in cursor.fetchall():
+        # Wartość globalna (bez sklepu) ma pierwszeństwo
+        if name not in seen and value not in (None, ''):
+            settings[name] = int(value)
+            seen.add(name)
+
+    cursor.execute(f"SELECT cl.value FROM {table('configuration')} c "
+                   f"JOIN {table('configuration_lang')} cl ON cl.id_configuration = c.id_configuration "
+                   f"WHERE c.name = 'PS_SEARCH_BLACKLIST' AND cl.id_lang = %s", (ID_LANG,))
+    row = cursor.fetchone()
+    blacklist_text = row[0] if row and row[0] else ''
+    blacklist = {sanitized for word in blacklist_text.split('|') for sanitized in search_words(word, 1, set())}
+    return settings, blacklist
+
+
+def search_words(text, min_length, blacklist):
+    """
+    Dzieli tekst na słowa indeksu jak Search::sanitize() PrestaShop:
+    bez HTML, małe litery, bez polskich znaków, liczby z separatorem
+    sklejone (1,5 -> 15), słowa krótsze niż min_length i z czarnej listy
+    pominięte.
+    """
+    text = html.unescape(re.sub(r'<[^>]+>', ' ', text or '')).lower()
+    text = re.sub(r'(\d)[.,](?=\d)', r'\1', text)
+    return [word[:SEARCH_MAX_WORD_LENGTH] for token in re.findall(r'[^\W_]+', text)
+            for word in _ascii_words(token)
+            if len(word) >= min_length and word not in blacklist]
+
+
+@functools.lru_cache(maxsize=65536)
+def _ascii_words(token):
+    """Zamienia słowo na ASCII (unidecode jest wolne, a słowa się powtarzają)."""
+    if token.isascii():
+        return (token,)
+    return tuple(re.findall(r'[a-z0-9]+', unidecode(token).lower()))
+
+
+def index_batch(cursor, batch, settings, blacklist, category_names):
+    """
+    Buduje indeks wyszukiwarki partii produktów i oznacza je jako
+    zaindeksowane (indexed = 1). Nie zatwierdza transakcji.
+
+    Args:
+        batch: Słowniki produktów (search_entry)
+        settings: Ustawienia wyszukiwarki (search_settings)
+        blacklist: Słowa pomijane w indeksie
+        category_names: Słownik ID kategorii -> nazwa
+
+    Returns:
+        Liczba wpisów search_index
+    """
+    if not batch:
+        return 0
+    min_length = settings['PS_SEARCH_MINWORDLEN']
+    weights = {}
+    for product in batch:
+        sources = [
+            (product['name'], settings['PS_SEARCH_WEIGHT_PNAME']),
+            (product['reference'], settings['PS_SEARCH_WEIGHT_REF']),
+            (product['description_short'], settings['PS_SEARCH_WEIGHT_SHORTDESC']),
+            (product['description'], settings['PS_SEARCH_WEIGHT_DESC']),
+            (category_names.get(product['category'], ''), settings['PS_SEARCH_WEIGHT_CNAME']),
+            (product['manufacturer'], settings['PS_SEARCH_WEIGHT_MNAME']),
+            (' '.join(product['features']), settings['PS_SEARCH_WEIGHT_FEATURE']),
+        ]
+        for text, weight in sources:
+            if not weight:
+                continue
+            for word in search_words(text, min_length, blacklist):
+                key = (product['id'], word)
+                weights[key] = weights.get(key, 0) + weight
+
+    ids = [product['id'] for product in batch]
+    placeholders = ', '.join(['%s'] * len(ids))
+    # Wpisy z przerwanego wcześniej indeksowania są budowane od nowa
+    cursor.execute(f"DELETE FROM {table('search_index')} WHERE id_product IN ({placeholders})", ids)
+
+    words = sorted({word for _, word in weights})
+    cursor.executemany(f"INSERT IGNORE INTO {table('search_word')} (id_shop, id_lang, word) VALUES (%s, %s, %s)",
+                       [(ID_SHOP, ID_LANG, word) for word in words])
+    word_ids = {}
+    for word_start in range(0, len(words), BATCH_SIZE):
+        chunk = words[word_start:word_start + BATCH_SIZE]
+        cursor.execute(f"SELECT id_word, word FROM {table('search_word')} WHERE id_shop = %s AND id_lang = %s "
+                       f"AND word IN ({', '.join(['%s'] * len(chunk))})", [ID_SHOP, ID_LANG] + chunk)
+        word_ids.update((word.lower(), id_word) for id_word, word in cursor.fetchall())
+
+    insert_rows(cursor, 'search_index', ('id_product', 'id_word', 'weight'),
+                [(product_id, word_ids[word], weight) for (product_id, word), weight in weights.items()
+                 if word in word_ids],
+                suffix=' ON DUPLICATE KEY UPDATE weight = weight + VALUES(weight)')
+    cursor.execute(f"UPDATE {table('product')} SET indexed = 1 WHERE id_product IN ({placeholders})", ids)
+    cursor.execute(f"UPDATE {table('product_shop')} SET indexed = 1 WHERE id_product IN ({placeholders})", ids)
+    return len(weights)
+
+
+def product_image_types(cursor):
+    """Zwraca typy obrazów produktów [(nazwa, szerokość, wysokość)] z tabeli image_type."""
+    cursor.execute(f"SELECT name, width, height FROM {table('image_type')} WHERE products = 1")
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def install_image(job):
+    """
+    Kopiuje zdjęcie do img/p sklepu i tworzy jego miniatury.
+
+    Miniatura ma dokładnie rozmiar typu obrazu - zdjęcie jest zmniejszane
+    z zachowaniem proporcji i wyśrodkowane na białym tle, jak robi to
+    PrestaShop przy wgrywaniu.
+
+    Args:
+        job: Krotka (ścieżka zdjęcia, ID zdjęcia, typy obrazów)
+
+    Returns:
+        ID zdjęcia
+    """
+    source, image_id, image_types = job
+    target_dir = image_dir(image_id)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(source, target_dir / f"{image_id}.jpg")
+    with Image.open(source) as img:
+        img = img.convert('RGB')
+        for name, width, height in image_types:
+            thumbnail = img.copy()
+            thumbnail.thumbnail((width, height), Image.LANCZOS)
+            canvas = Image.new('RGB', (width, height), (255, 255, 255))
+            canvas.paste(thumbnail, ((width - thumbnail.width) // 2, (height - thumbnail.height) // 2))
+            canvas.save(target_dir / f"{image_id}-{name}.jpg", 'JPEG', quality=JPEG_QUALITY)
+    return image_id
+
+
+class ProductExtras:
+    """
+    Zdjęcia i indeks wyszukiwarki tworzone dla partii produktów przed jej
+    zatwierdzeniem (load_products, repair_products).
+    """
+
+    def __init__(self, cursor, executor, with_images):
+        """
+        Args:
+            cursor: Kursor bazy (po załadowaniu kategorii)
+            executor: Pula procesów tworzących miniatury
+            with_images: Czy ładować zdjęcia
+        """
+        self.executor = executor
+        self.with_images = with_images
+        self.folders = image_folders() if with_images else {}
+        self.image_types = product_image_types(cursor) if with_images else []
+        self.settings, self.blacklist = search_settings(cursor)
+        cursor.execute(f"SELECT id_category, name FROM {table('category_lang')} "
+                       f"WHERE id_lang = %s AND id_shop = %s", (ID_LANG, ID_SHOP))
+        self.category_names = dict(cursor.fetchall())
+        self.images = self.failed = self.index_entries = 0
+        self.image_seconds = self.index_seconds = 0.0
+
+    def install_images(self, jobs):
+        """Kopiuje zdjęcia (ścieżka, ID zdjęcia) do img/p i tworzy miniatury."""
+        start = time.perf_counter()
+        futures = [self.executor.submit(install_image, (path, image_id, self.image_types))
+                   for path, image_id in jobs]
+        for (path, _), future in zip(jobs, futures):
+            try:
+                future.result()
+                self.images += 1
+            except (OSError, ValueError) as e:
+                # Wiersz image zostaje - ponowne uruchomienie odtworzy brakujący plik
+                self.failed += 1
+                print(f"  ✗ {path}: {e}", file=sys.stderr)
+        self.image_seconds += time.perf_counter() - start
+
+    def index(self, cursor, batch):
+        """Buduje indeks wyszukiwarki partii produktów (bez zatwierdzania)."""
+        start = time.perf_counter()
+        self.index_entries += index_batch(cursor, batch, self.settings, self.blacklist, self.category_names)
+        self.index_seconds += time.perf_counter() - start
+
+
+def read_catalog(limit=None):
+    """
+    Wczytuje produkty z pliku katalogu (tylko te ze szczegółami).
+
+    Returns:
+        Lista słowników {name, reference, fields}
+    """
+    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    items = []
+    for item in data:
+        if not item.get('szczegoly_produktu') or not item.get('nazwa'):
+            continue
+        items.append({'name': item['nazwa'], 'reference': str(item.get('id_produktu', '')),
+                      'fields': product_source_fields(item)})
+        if limit and len(items) >= limit:
+            break
+    return items
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Ładowanie katalogu bezpośrednio do bazy PrestaShop')
+    parser.add_argument('--limit', type=int, help='Załaduj tylko pierwsze N produktów')
+    parser.add_argument('--skip-images', action='store_true', help='Nie ładuj zdjęć')
+    parser.add_argument('--workers', type=int, help='Liczba procesów tworzących miniatury (domyślnie liczba CPU)')
+    args = parser.parse_args()
+
+    if pymysql is None:
+        print("BŁĄD: Ładowanie do bazy wymaga pakietu pymysql (pip install pymysql)", file=sys.stderr)
+        return 1
+    with_images = not args.skip_images
+    if with_images and not (SHOP_HTML_DIR / 'img' / 'p').exists():
+        print(f"BŁĄD: Nie znaleziono katalogu zdjęć sklepu {SHOP_HTML_DIR / 'img' / 'p'} "
+              f"(użyj --skip-images)", file=sys.stderr)
+        return 1
+
+    try:
+        with open(CATEGORIES_FILE, 'r', encoding='utf-8') as f:
+            tree = json.load(f)
+        items = read_catalog(args.limit)
+    except FileNotFoundError as e:
+        print(f"BŁĄD: Nie znaleziono pliku {e.filename}", file=sys.stderr)
+        return 1
+
+    try:
+        connection = connect()
+    except pymysql.err.OperationalError as e:
+        print(f"BŁĄD: Nie udało się połączyć z bazą {DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}: {e}", file=sys.stderr)
+        return 1
+
+    missing_reference = sum(1 for item in items if not item['reference'])
+    if missing_reference:
+        print(f"Pominięto produkty bez id_produktu: {missing_reference}")
+        items = [item for item in items if item['reference']]
+
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    timings = {}
+    try:
+        with connection.cursor() as cursor, ProcessPoolExecutor(max_workers=args.workers) as executor:
+            start = time.perf_counter()
+            categories, created_categories = load_categories(cursor, tree, now)
+            connection.commit()
+            timings['Kategorie'] = time.perf_counter() - start
+            print(f"Kategorie: utworzono {created_categories}")
+
+            cursor.execute(f"SELECT reference, id_product, indexed FROM {table('product')} WHERE reference <> ''")
+            existing = {reference: (product_id, indexed) for reference, product_id, indexed in cursor.fetchall()}
+            new_items = [item for item in items if item['reference'] not in existing]
+            print(f"Produktów w katalogu: {len(items)}, już w bazie: {len(items) - len(new_items)}")
+
+            loader = ProductExtras(cursor, executor, with_images)
+            if len(new_items) < len(items):
+                start = time.perf_counter()
+                reindexed, restored = repair_products(
+                    connection, cursor, [item for item in items if item['reference'] in existing],
+                    existing, categories, loader)
+                timings['Naprawa'] = time.perf_counter() - start
+                print(f"Naprawa wcześniej załadowanych: zaindeksowano {reindexed}, odtworzono zdjęć {restored}")
+
+            start = time.perf_counter()
+            references, created = load_references(cursor, new_items, now)
+            connection.commit()
+            timings['Producenci i cechy'] = time.perf_counter() - start
+            print(f"Producenci: utworzono {created['manufacturers']}, cechy: {created['features']}, "
+                  f"wartości cech: {created['feature_values']}")
+
+            start = time.perf_counter()
+            image_seconds, index_seconds = loader.image_seconds, loader.index_seconds
+            loaded = load_products(connection, cursor, new_items, categories, references, now, loader)
+            timings['Zdjęcia'] = loader.image_seconds - image_seconds
+            timings['Indeks wyszukiwarki'] = loader.index_seconds - index_seconds
+            timings['Produkty'] = time.perf_counter() - start - timings['Zdjęcia'] - timings['Indeks wyszukiwarki']
+
+            start = time.perf_counter()
+            category_count = regenerate_category_tree(cursor)
+            connection.commit()
+            timings['Drzewo kategorii'] = time.perf_counter() - start
+            print(f"Drzewo kategorii przeliczone ({category_count} kategorii)")
+            print(f"Indeks wyszukiwarki: {loader.index_entries} wpisów")
+    except pymysql.err.MySQLError as e:
+        connection.rollback()
+        print(f"BŁĄD bazy danych: {e}", file=sys.stderr)
+        print("Zatwierdzone partie zostają w bazie - ponowne uruchomienie pominie załadowane produkty "
+              "i uzupełni ich zdjęcia oraz indeks wyszukiwarki", file=sys.stderr)
+        return 1
+    finally:
+        connection.close()
+
+    if loader.failed:
+        print(f"Nieudanych zdjęć: {loader.failed} (ponowne uruchomienie spróbuje je odtworzyć)", file=sys.stderr)
+    print("\n--- Zakończono ładowanie ---")
+    print(f"Załadowano produktów: {loaded}, zdjęć: {loader.images}")
+    for stage, seconds in timings.items():
+        print(f"  {stage:<22} {seconds:8.2f} s")
+    print("Wyczyść pamięć podręczną sklepu (Zaawansowane → Wydajność), aby zobaczyć zmiany")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kopiuje pochodne WebP/AVIF zdjęć (scraper/image_derivatives.py) do katalogu
+zdjęć PrestaShop, obok plików JPEG wygenerowanych przez sklep.
+
+PrestaShop przechowuje zdjęcie o ID 123 jako img/p/1/2/3/123-<typ>.jpg.
+Kolejność ID zdjęć produktu odpowiada kolejności wgrania przez
+update_stocks_images.py (product.jpg, product_2.jpg, ...), więc pochodne
+można przypisać bez zmian w bazie danych.
+"""
+
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from catalog_utils import SHOP_HTML_DIR, get_local_images, image_dir
+from prestashop_api import get_all_product_image_ids, get_api_xml, get_product_image_ids
+
+INPUT_FILE = Path(__file__).parent.parent / 'data' / 'products_with_details.json'
+IMAGES_DIR = Path(__file__).parent.parent / 'data' / 'images'
+DERIVATIVES_DIR = Path(__file__).parent.parent / 'data' / 'derivatives'
+
+
+def main():
+    print("Rozpoczynanie wdrażania pochodnych WebP/AVIF zdjęć...")
+
+    if not DERIVATIVES_DIR.exists():
+        print(f"BŁĄD: Brak katalogu {DERIVATIVES_DIR}. Uruchom najpierw scraper/image_derivatives.py",
+              file=sys.stderr)
+        return 1
+
+    if not (SHOP_HTML_DIR / 'img' / 'p').exists():
+        print(f"BŁĄD: Nie znaleziono katalogu zdjęć sklepu {SHOP_HTML_DIR / 'img' / 'p'}",
+              file=sys.stderr)
+        return 1
+
+    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    all_products_xml = get_api_xml('products', {'display': '[id,name]'})
+    if all_products_xml is None:
+        print("BŁĄD: Nie udało się pobrać listy produktów", file=sys.stderr)
+        return 1
+
+    products_map = {}
+    for product in all_products_xml.findall('.//product'):
+        prod_name_elem = product.find('.//language')
+        if prod_name_elem is not None:
+            products_map[prod_name_elem.text] = product.find('id').text
+
+    folders = {f.split('_', 1)[0]: f for f in os.listdir(DERIVATIVES_DIR)}
+    image_inventory = get_all_product_image_ids()
+
+    copied = 0
+    missing = 0
+    for item in data:
+        product_id = products_map.get(item.get('nazwa'))
+        folder = folders.get(item.get('id_produktu', ''))
+        if not product_id or not folder:
+            continue
+
+        if image_inventory is not None:
+            image_ids = sorted(image_inventory.get(product_id, []), key=int)
+        else:
+            image_ids = sorted(get_product_image_ids(product_id), key=int)
+        local_images = get_local_images(IMAGES_DIR / folder)
+
+        for image_id, image_name in zip(image_ids, local_images):
+            target_dir = image_dir(image_id)
+            if not target_dir.exists():
+                missing += 1
+                continue
+            for derivative in (DERIVATIVES_DIR / folder).glob(f"{image_name}-*.*"):
+                # product-home_default.webp -> 123-home_default.webp
+                suffix = derivative.name[len(image_name):]
+                shutil.copyfile(derivative, target_dir / f"{image_id}{suffix}")
+                copied += 1
+
+    print("\n--- Zakończono wdrażanie ---")
+    print(f"Skopiowano plików: {copied}")
+    if missing:
+        print(f"Brak katalogu w img/p dla zdjęć: {missing}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
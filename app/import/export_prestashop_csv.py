@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Eksport katalogu do plików CSV importera PrestaShop (Zaawansowane > Import).
+
+Importer CSV z panelu administracyjnego tworzy produkty wielokrotnie
+szybciej niż pojedyncze zapytania webservice, ale wymaga plików w swoim
+formacie. Skrypt zamienia products_with_details.json (lub katalog z
+generate_catalog.py, także jsonl) na:
+- categories.csv - kategorie z categories.json i ścieżek produktów, z ID
+  nadanymi od --first-category-id (rodzice zawsze przed dziećmi),
+- products.csv   - produkty z ceną netto, wagą z nazwy, producentem,
+  kategoriami (po ID - nazwy kategorii w sklepie się powtarzają),
+  adresami zdjęć i cechami w postaci Nazwa:Wartość:Pozycja.
+
+Plik katalogu jest czytany strumieniowo, a produkty zapisywane od razu,
+więc zużycie pamięci nie zależy od rozmiaru katalogu (w pamięci są tylko
+kategorie i nazwy cech).
+
+Ustawienia importu w PrestaShop:
+- separator pól ';', separator wielu wartości '|' (--multiple-separator),
+- categories.csv: zaznacz "Wymuś wszystkie numery ID" (ID z pliku są
+  używane w products.csv),
+- products.csv: zaznacz "Użyj indeksu produktu jako klucza" - reference
+  to id_produktu, jak przy imporcie przez API.
+
+Przykład:
+    python export_prestashop_csv.py
+    python export_prestashop_csv.py --input ../data/catalog_50k.jsonl --output-dir ../data/csv_50k
+"""
+
+import csv
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+from slugify import slugify
+
+from catalog_utils import get_local_images, iter_catalog, product_source_fields
+
+INPUT_FILE = Path(__file__).parent.parent / 'data' / 'products_with_details.json'
+CATEGORIES_FILE = Path(__file__).parent.parent / 'data' / 'categories.json'
+IMAGES_DIR = Path(__file__).parent.parent / 'data' / 'images'
+OUTPUT_DIR = Path(__file__).parent.parent / 'data' / 'prestashop_csv'
+
+HOME_CATEGORY_ID = 2
+# Pierwsze wolne ID w sklepie bez danych demonstracyjnych (1 - Root, 2 - Home)
+FIRST_CATEGORY_ID = 3
+# Grupa reguł podatkowych jak w import_products.py (PL 23%)
+TAX_RULES_GROUP_ID = 1
+CSV_DELIMITER = ';'
+MULTIPLE_SEPARATOR = '|'
+# feature_value_lang.value to VARCHAR(255)
+MAX_FEATURE_VALUE_LENGTH = 255
+PROGRESS_EVERY = 10000
+
+CATEGORY_COLUMNS = ['ID', 'Active (0/1)', 'Name *', 'Parent category', 'Root category (0/1)',
+                    'URL rewritten']
+PRODUCT_COLUMNS = ['Active (0/1)', 'Name *', 'Categories (x,y,z...)', 'Price tax excluded',
+                   'Tax rules ID', 'Reference #', 'Manufacturer', 'Weight', 'Quantity',
+                   'Description', 'URL rewritten', 'Image URLs (x,y,z...)',
+                   'Delete existing images (0 = No, 1 = Yes)', 'Feature(Name:Value:Position)']
+
+
+class CategoryTree:
+    """
+    Kategorie eksportu: (ścieżka nazw) -> ID, nadawane przy pierwszym wystąpieniu.
+
+    Kategorie są porównywane bez rozróżniania wielkości liter, jak w
+    import_categories.py.
+    """
+
+    def __init__(self, first_id=FIRST_CATEGORY_ID):
+        self.next_id = first_id
+        # (nazwy.casefold(),) -> (ID, nazwa, ID rodzica, głębokość)
+        self.nodes = {}
+
+    def add_path(self, parts):
+        """
+        Dodaje brakujące kategorie ścieżki.
+
+        Args:
+            parts: Nazwy kategorii od najwyższej (bez Home)
+
+        Returns:
+            Lista ID kategorii ścieżki (od Home)
+        """
+        ids = [HOME_CATEGORY_ID]
+        key = ()
+        for name in parts:
+            key += (name.casefold(),)
+            node = self.nodes.get(key)
+            if node is None:
+                node = (self.next_id, name, ids[-1], len(key))
+                self.nodes[key] = node
+                self.next_id += 1
+            ids.append(node[0])
+        return ids
+
+    def add_tree(self, categories, parents=()):
+        """Dodaje kategorie z categories.json (także te bez produktów)."""
+        for category in categories:
+            path = parents + (category['name'].strip(),)
+            self.add_path(path)
+            self.add_tree(category.get('subcategories', []), path)
+
+    def rows(self):
+        """Wiersze categories.csv - rodzice przed dziećmi."""
+        for category_id, name, parent_id, _ in sorted(self.nodes.values(), key=lambda n: (n[3], n[0])):
+            yield [category_id, 1, name, parent_id, 0, slugify(name)]
+
+
+def split_category_path(path_str):
+    """'Kat1/Kat2' -> ['Kat1', 'Kat2'] (jak get_category_id_by_path w import_products.py)."""
+    return [part.strip() for part in (path_str or '').split('/') if part.strip()]
+
+
+def feature_text(text):
+    """Usuwa z nazwy/wartości cechy znaki, które importer traktuje jako separatory."""
+    return ' '.join(text.replace(':', ' -').replace(MULTIPLE_SEPARATOR, '/').split())
+
+
+def image_urls(item, image_folders, image_base_url):
+    """
+    Adresy zdjęć produktu (pierwsze - okładka).
+
+    Domyślnie adresy ze sklepu źródłowego, a z --image-base-url pliki
+    pobrane przez scraper (IMAGES_DIR), udostępnione pod tym adresem.
+    """
+    if image_base_url:
+        folder = image_folders.get(str(item.get('id_produktu', '')))
+        if not folder:
+            return []
+        return [f"{image_base_url}/{folder}/{name}.jpg" for name in get_local_images(IMAGES_DIR / folder)]
+    return list(item.get('szczegoly_produktu', {}).get('zdjecia', []))
+
+
+def product_row(item, categories, feature_positions, image_folders, image_base_url):
+    """Wiersz products.csv (None dla produktu bez szczegółów)."""
+    if not item.get('szczegoly_produktu') or not item.get('nazwa'):
+        return None
+    fields = product_source_fields(item)
+
+    category_ids = categories.add_path(split_category_path(fields['categories']))
+    # Importer ustawia pierwszą kategorię z listy jako domyślną
+    category_ids = [category_ids[-1]] + category_ids[:-1]
+
+    features = []
+    for name, value in fields['features']:
+        name = feature_text(name)
+        position = feature_positions.setdefault(name, len(feature_positions))
+        features.append(f"{name}:{feature_text(value)[:MAX_FEATURE_VALUE_LENGTH]}:{position}")
+
+    return [
+        1,
+        item['nazwa'],
+        MULTIPLE_SEPARATOR.join(map(str, category_ids)),
+        fields['price'],
+        TAX_RULES_GROUP_ID,
+        item.get('id_produktu', ''),
+        fields['manufacturer'],
+        fields['weight'],
+        # Losowy stan jak w update_stocks_images.set_stock
+        random.randint(1, 9),
+        fields['description'],
+        slugify(item['nazwa']),
+        MULTIPLE_SEPARATOR.join(image_urls(item, image_folders, image_base_url)),
+        1,
+        MULTIPLE_SEPARATOR.join(features),
+    ]
+
+
+def export(input_file, output_dir, first_category_id=FIRST_CATEGORY_ID, image_base_url=None, limit=None):
+    """
+    Zapisuje categories.csv i products.csv.
+
+    Returns:
+        Słownik ze statystykami
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    categories = CategoryTree(first_category_id)
+    if CATEGORIES_FILE.exists():
+        with open(CATEGORIES_FILE, 'r', encoding='utf-8') as f:
+            categories.add_tree(json.load(f))
+
+    image_folders = {}
+    if image_base_url and IMAGES_DIR.exists():
+        for entry in os.listdir(IMAGES_DIR):
+            image_folders.setdefault(entry.split('_', 1)[0], entry)
+
+    feature_positions = {}
+    stats = {'products': 0, 'skipped': 0}
+
+    with open(output_dir / 'products.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=CSV_DELIMITER)
+        writer.writerow(PRODUCT_COLUMNS)
+        for item in iter_catalog(input_file):
+            row = product_row(item, categories, feature_positions, image_folders, image_base_url)
+            if row is None:
+                stats['skipped'] += 1
+                continue
+            writer.writerow(row)
+            stats['products'] += 1
+            if stats['products'] % PROGRESS_EVERY == 0:
+                print(f"  Produkty: {stats['products']}")
+            if limit and stats['products'] >= limit:
+                break
+
+    with open(output_dir / 'categories.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=CSV_DELIMITER)
+        writer.writerow(CATEGORY_COLUMNS)
+        writer.writerows(categories.rows())
+
+    stats['categories'] = len(categories.nodes)
+    stats['features'] = len(feature_positions)
+    return stats
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Eksport katalogu do plików CSV importera PrestaShop')
+    parser.add_argument('--input', type=Path, default=INPUT_FILE,
+                        help='Plik katalogu JSON lub jsonl (domyślnie products_with_details.json)')
+    parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR,
+                        help='Katalog plików CSV (domyślnie data/prestashop_csv)')
+    parser.add_argument('--first-category-id', type=int, default=FIRST_CATEGORY_ID,
+                        help=f'ID pierwszej eksportowanej kategorii (domyślnie {FIRST_CATEGORY_ID})')
+    parser.add_argument('--image-base-url',
+                        help='Adres, pod którym udostępniono data/images (domyślnie adresy ze sklepu źródłowego)')
+    parser.add_argument('--limit', type=int, help='Eksportuj tylko pierwsze N produktów')
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        print(f"BŁĄD: Nie znaleziono pliku {args.input}", file=sys.stderr)
+        return 1
+
+    print(f"Eksport {args.input} do {args.output_dir}...")
+    stats = export(args.input, args.output_dir, args.first_category_id,
+                   args.image_base_url.rstrip('/') if args.image_base_url else None, args.limit)
+
+    print("\n--- Zakończono eksport ---")
+    print(f"Produkty: {stats['products']} (pominięte bez szczegółów: {stats['skipped']})")
+    print(f"Kategorie: {stats['categories']}, cechy: {stats['features']}")
+    print(f"Pliki: {args.output_dir / 'categories.csv'}, {args.output_dir / 'products.csv'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lokalny zamiennik webservice PrestaShop do testów wydajności importu.
+
+Implementuje podzbiór API używany przez skrypty importu (prestashop_api.py):
+products, categories, manufacturers, product_features,
+product_feature_values, stock_availables oraz images/products, z obsługą
+parametrów filter[...], display, limit, sort i output_format=JSON.
+Odpowiedzi są kompresowane gzipem, gdy klient wysyła Accept-Encoding: gzip.
+
+Dane są trzymane w pamięci. Opóźnienie odpowiedzi i losowe błędy 500 są
+konfigurowalne, więc import_products, update_stocks_images
+i clean_prestashop można mierzyć powtarzalnie bez Dockera.
+
+Uruchomienie:
+    python fake_prestashop.py --port 8081 --latency 0.02 --error-rate 0.01
+
+i w pliku .env (lub zmiennych środowiskowych):
+    PRESTASHOP_URL=http://127.0.0.1:8081/api
+    API_KEY=dowolny
+
+Statystyki zapytań: GET /__stats, zerowanie: POST /__reset.
+"""
+
+import copy
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+XLINK = 'http://www.w3.org/1999/xlink'
+
+# Zasób -> nazwa pojedynczego elementu w XML
+RESOURCES = {
+    'products': 'product',
+    'categories': 'category',
+    'manufacturers': 'manufacturer',
+    'product_features': 'product_feature',
+    'product_feature_values': 'product_feature_value',
+    'stock_availables': 'stock_available',
+}
+
+
+def field_value(element):
+    """Zwraca wartość pola (dla pól wielojęzycznych - tekst języka 1)."""
+    if element is None:
+        return None
+    language = element.find('language')
+    if language is not None:
+        return (language.text or '').strip()
+    return (element.text or '').strip()
+
+
+def to_json(element):
+    """Zamienia rekord XML na słownik w formacie output_format=JSON webservice."""
+    data = {}
+    for child in element:
+        if child.tag == 'associations':
+            data['associations'] = {group.tag: [to_json(item) for item in group] for group in child}
+        elif child.find('language') is not None:
+            data[child.tag] = [{'id': lang.get('id'), 'value': lang.text or ''}
+                               for lang in child.findall('language')]
+        else:
+            data[child.tag] = child.text or ''
+    if element.get('id') and 'id' not in data:
+        data['id'] = int(element.get('id'))
+    return data
+
+
+# Mniejszych odpowiedzi nie opłaca się kompresować
+GZIP_MIN_SIZE = 512
+
+
+def matches_filter(value, expression):
+    """
+    Sprawdza wartość pola względem filtra w składni PrestaShop.
+
+    Obsługiwane: 'x' (równość), '[a|b]' (lista), '[1,10]' (przedział),
+    '%[x]%', '[x]%', '%[x]' (LIKE), '>[x]', '<[x]'.
+    """
+    if value is None:
+        return False
+    like = re.fullmatch(r'(%?)\[(.*)\](%?)', expression)
+    if like and (like.group(1) or like.group(3)):
+        needle = like.group(2).lower()
+        haystack = value.lower()
+        if like.group(1) and like.group(3):
+            return needle in haystack
+        if like.group(3):
+            return haystack.startswith(needle)
+        return haystack.endswith(needle)
+    compare = re.fullmatch(r'([<>])\[(.*)\]', expression)
+    if compare:
+        try:
+            left, right = float(value), float(compare.group(2))
+        except ValueError:
+            return False
+        return left > right if compare.group(1) == '>' else left < right
+    bracket = re.fullmatch(r'\[(.*)\]', expression)
+    if bracket:
+        inner = bracket.group(1)
+        if ',' in inner and '|' not in inner:
+            low, high = inner.split(',', 1)
+            try:
+                return float(low) <= float(value) <= float(high)
+            except ValueError:
+                return False
+        return value in inner.split('|')
+    return value == expression
+
+
+class FakeStore:
+    """Magazyn zasobów w pamięci."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.resources = {name: {} for name in RESOURCES}
+        self.next_ids = {name: 1 for name in RESOURCES}
+        self.images = {}  # id produktu -> lista (id zdjęcia, rozmiar w bajtach)
+        self.next_image_id = 1
+        self._add_default_categories()
+
+    def _add_default_categories(self):
+        for category_id, parent_id, name in ((1, 0, 'Root'), (2, 1, 'Home')):
+            element = ET.Element('category')
+            ET.SubElement(element, 'id').text = str(category_id)
+            ET.SubElement(element, 'id_parent').text = str(parent_id)
+            ET.SubElement(element, 'active').text = '1'
+            name_el = ET.SubElement(element, 'name')
+            ET.SubElement(name_el, 'language', id='1').text = name
+            self.resources['categories'][category_id] = element
+        self.next_ids['categories'] = 3
+
+    def create(self, resource, element):
+        with self.lock:
+            record_id = self.next_ids[resource]
+            self.next_ids[resource] += 1
+            for old_id in element.findall('id'):
+                element.remove(old_id)
+            id_el = ET.Element('id')
+            id_el.text = str(record_id)
+            element.insert(0, id_el)
+            self.resources[resource][record_id] = element
+            if resource == 'products':
+                self._create_stock(record_id)
+            return element
+
+    def _create_stock(self, product_id):
+        stock = ET.Element('stock_available')
+        for name, value in (('id_product', product_id), ('id_product_attribute', 0),
+                            ('id_shop', 1), ('quantity', 0), ('depends_on_stock', 0),
+                            ('out_of_stock', 2)):
+            ET.SubElement(stock, name).text = str(value)
+        self.create('stock_availables', stock)
+
+    def update(self, resource, record_id, element):
+        with self.lock:
+            if record_id not in self.resources[resource]:
+                return None
+            for old_id in element.findall('id'):
+                element.remove(old_id)
+            id_el = ET.Element('id')
+            id_el.text = str(record_id)
+            element.insert(0, id_el)
+            self.resources[resource][record_id] = element
+            return element
+
+    def delete(self, resource, record_id):
+        with self.lock:
+            if self.resources[resource].pop(record_id, None) is None:
+                return False
+            if resource == 'products':
+                self.images.pop(record_id, None)
+                stocks = self.resources['stock_availables']
+                for stock_id in [sid for sid, stock in stocks.items()
+                                 if field_value(stock.find('id_product')) == str(record_id)]:
+                    del stocks[stock_id]
+            return True
+
+    def query(self, resource, filters, sort=None, limit=None):
+        with self.lock:
+            records = list(self.resources[resource].items())
+        for field, expression in filters.items():
+            records = [(rid, el) for rid, el in records
+                       if matches_filter(str(rid) if field == 'id' else field_value(el.find(field)),
+                                         expression)]
+        if sort:
+            match = re.fullmatch(r'\[?(\w+?)_(ASC|DESC)\]?', sort)
+            if match:
+                field, direction = match.groups()
+
+                def sort_key(item):
+                    value = str(item[0]) if field == 'id' else field_value(item[1].find(field)) or ''
+                    return (0, float(value), '') if re.fullmatch(r'-?\d+(\.\d+)?', value) else (1, 0, value)
+
+                records.sort(key=sort_key, reverse=direction == 'DESC')
+        if limit:
+            parts = [int(p) for p in limit.split(',')]
+            offset, count = (parts[0], parts[1]) if len(parts) == 2 else (0, parts[0])
+            records = records[offset:offset + count]
+        return records
+
+    def add_image(self, product_id, size):
+        with self.lock:
+            if product_id not in self.resources['products']:
+                return None
+            image_id = self.next_image_id
+            self.next_image_id += 1
+            self.images.setdefault(product_id, []).append((image_id, size))
+            return image_id
+
+    def delete_image(self, product_id, image_id):
+        with self.lock:
+            images = self.images.get(product_id, [])
+            remaining = [img for img in images if img[0] != image_id]
+            if len(remaining) == len(images):
+                return False
+            self.images[product_id] = remaining
+            return True
+
+
+class FakePrestaShopServer(ThreadingHTTPServer):
+    """Serwer HTTP z magazynem, opóźnieniem i wstrzykiwaniem błędów."""
+
+    daemon_threads = True
+    # Klienci asynchroniczni otwierają setki połączeń naraz (domyślnie 5)
+    request_queue_size = 1024
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        super().__init__(address, FakePrestaShopHandler)
+        self.store = FakeStore()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {}
+
+    @property
+    def api_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def count(self, method):
+        with self.stats_lock:
+            self.stats[method] = self.stats.get(method, 0) + 1
+            self.stats['total'] = self.stats.get('total', 0) + 1
+
+    def count_bytes(self, size):
+        with self.stats_lock:
+            self.stats['bytes'] = self.stats.get('bytes', 0) + size
+
+    def draw(self):
+        """Zwraca (opóźnienie, czy wstrzyknąć błąd) dla jednego zapytania."""
+        with self.random_lock:
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self.random.random() < self.error_rate
+        return delay, fail
+
+
+class FakePrestaShopHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Nagłówki i treść idą osobnymi zapisami - bez TCP_NODELAY każde
+    # zapytanie keep-alive czekałoby ~40 ms na opóźnione ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    # --- Odpowiedzi ---
+
+    def send_body(self, status, body, content_type='text/xml;charset=utf-8'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if len(body) >= GZIP_MIN_SIZE and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=5)
+            self.send_header('Content-Encoding', 'gzip')
+        self.server.count_bytes(len(body))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_body(status, body, 'application/json;charset=utf-8')
+
+    def send_xml(self, status, root):
+        root.set('xmlns:xlink', XLINK)
+        body = b'<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(root, encoding='utf-8')
+        self.send_body(status, body)
+
+    def send_error_xml(self, status, message):
+        root = ET.Element('prestashop')
+        errors = ET.SubElement(root, 'errors')
+        error = ET.SubElement(errors, 'error')
+        ET.SubElement(error, 'code').text = str(status)
+        ET.SubElement(error, 'message').text = message
+        self.send_xml(status, root)
+
+    # --- Obsługa zapytań ---
+
+    def handle_any(self, method):
+        parsed = urlparse(self.path)
+        body = b''
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length)
+
+        if parsed.path == '/__stats':
+            with self.server.stats_lock:
+                payload = dict(self.server.stats)
+            return self.send_body(200, json.dumps(payload).encode(), 'application/json')
+        if parsed.path == '/__reset':
+            with self.server.stats_lock:
+                self.server.stats.clear()
+            return self.send_body(200, b'{}', 'application/json')
+
+        self.server.count(method)
+        delay, fail = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self.send_error_xml(500, 'Wstrzyknięty błąd serwera')
+
+        parts = [p for p in parsed.path.split('/') if p]
+        if not parts or parts[0] != 'api':
+            return self.send_error_xml(404, 'Nieznany adres')
+        parts = parts[1:]
+        params = dict(parse_qsl(parsed.query, keep_blank_values=True))
+
+        if not parts:
+            root = ET.Element('prestashop')
+            api = ET.SubElement(root, 'api', shopName='fake')
+            for name in list(RESOURCES) + ['images']:
+                ET.SubElement(api, name)
+            return self.send_xml(200, root)
+
+        if parts[0] == 'images':
+            return self.handle_images(method, parts[1:], body)
+        if parts[0] not in RESOURCES:
+            return self.send_error_xml(404, f'Nieznany zasób {parts[0]}')
+
+        resource = parts[0]
+        record_id = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+
+        if method == 'GET':
+            return self.handle_get(resource, record_id, params)
+        if method == 'POST' and record_id is None:
+            return self.handle_write(resource, None, body)
+        if method == 'PUT' and record_id is not None:
+            return self.handle_write(resource, record_id, body)
+        if method == 'DELETE' and record_id is not None:
+            if self.server.store.delete(resource, record_id):
+                return self.send_body(200, b'')
+            return self.send_error_xml(404, 'Zasób nie istnieje')
+        return self.send_error_xml(405, 'Metoda nieobsługiwana')
+
+    def render(self, resource, record_id, element, display):
+        """Przygotowuje kopię rekordu do wysłania (z polami wg display)."""
+        element = copy.deepcopy(element)
+        if resource == 'products':
+            associations = element.find('associations')
+            if associations is None:
+                associations = ET.SubElement(element, 'associations')
+            for old in associations.findall('images'):
+                associations.remove(old)
+            images_el = ET.SubElement(associations, 'images')
+            for image_id, _ in self.server.store.images.get(record_id, []):
+                image_el = ET.SubElement(images_el, 'image')
+                ET.SubElement(image_el, 'id').text = str(image_id)
+        if display and display != 'full':
+            fields = display.strip('[]').split(',')
+            for child in list(element):
+                if child.tag not in fields:
+                    element.remove(child)
+        return element
+
+    def handle_get(self, resource, record_id, params):
+        store = self.server.store
+        singular = RESOURCES[resource]
+        as_json = (params.get('output_format') or params.get('io_format') or '').upper() == 'JSON'
+        if record_id is not None:
+            with store.lock:
+                element = store.resources[resource].get(record_id)
+            if element is None:
+                return self.send_error_xml(404, 'Zasób nie istnieje')
+            rendered = self.render(resource, record_id, element, 'full')
+            if as_json:
+                return self.send_json(200, {singular: to_json(rendered)})
+            root = ET.Element('prestashop')
+            root.append(rendered)
+            return self.send_xml(200, root)
+
+        filters = {key[7:-1]: value for key, value in params.items()
+                   if key.startswith('filter[') and key.endswith(']')}
+        records = store.query(resource, filters, params.get('sort'), params.get('limit'))
+        display = params.get('display')
+
+        if as_json:
+            # Jak PrestaShop: pusta lista to [], bez display - same ID
+            if not records:
+                return self.send_json(200, [])
+            items = [to_json(self.render(resource, rid, element, display)) if display else {'id': rid}
+                     for rid, element in records]
+            return self.send_json(200, {resource: items})
+
+        root = ET.Element('prestashop')
+        listing = ET.SubElement(root, resource)
+        for rid, element in records:
+            if display:
+                listing.append(self.render(resource, rid, element, display))
+            else:
+                ET.SubElement(listing, singular, id=str(rid),
+                              **{'xlink:href': f"{self.server.api_url}/{resource}/{rid}"})
+        return self.send_xml(200, root)
+
+    def handle_write(self, resource, record_id, body):
+        singular = RESOURCES[resource]
+        try:
+            root = ET.fromstring(body)
+        except ET.ParseError as e:
+            return self.send_error_xml(400, f'Niepoprawny XML: {e}')
+        element = root.find(singular) if root.tag == 'prestashop' else root
+        if element is None:
+            return self.send_error_xml(400, f'Brak elementu {singular}')
+
+        store = self.server.store
+        if record_id is None:
+            saved = store.create(resource, element)
+            status = 201
+        else:
+            saved = store.update(resource, record_id, element)
+            if saved is None:
+                return self.send_error_xml(404, 'Zasób nie istnieje')
+            status = 200
+        response = ET.Element('prestashop')
+        response.append(self.render(resource, int(saved.find('id').text), saved, 'full'))
+        return self.send_xml(status, response)
+
+    def handle_images(self, method, parts, body):
+        store = self.server.store
+        if not parts or parts[0] != 'products':
+            return self.send_error_xml(404, 'Obsługiwane są tylko zdjęcia produktów')
+        product_id = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else None
+        image_id = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else None
+
+        if method == 'GET' and product_id is None:
+            root = ET.Element('prestashop')
+            listing = ET.SubElement(root, 'images')
+            with store.lock:
+                product_ids = sorted(pid for pid, images in store.images.items() if images)
+            for pid in product_ids:
+                ET.SubElement(listing, 'image', id=str(pid),
+                              **{'xlink:href': f"{self.server.api_url}/images/products/{pid}"})
+            return self.send_xml(200, root)
+
+        if method == 'GET' and image_id is None:
+            with store.lock:
+                images = list(store.images.get(product_id, []))
+            if not images:
+                return self.send_error_xml(404, 'Produkt nie ma zdjęć')
+            root = ET.Element('prestashop')
+            image_el = ET.SubElement(root, 'image', id=str(product_id))
+            for iid, _ in images:
+                ET.SubElement(image_el, 'declination', id=str(iid),
+                              **{'xlink:href': f"{self.server.api_url}/images/products/{product_id}/{iid}"})
+            return self.send_xml(200, root)
+
+        if method == 'POST' and product_id is not None and image_id is None:
+            size = self.parse_upload_size(body)
+            if size is None:
+                return self.send_error_xml(400, 'Brak pliku w polu image')
+            new_id = store.add_image(product_id, size)
+            if new_id is None:
+                return self.send_error_xml(404, 'Produkt nie istnieje')
+            root = ET.Element('prestashop')
+            image_el = ET.SubElement(root, 'image')
+            ET.SubElement(image_el, 'id').text = str(new_id)
+            ET.SubElement(image_el, 'id_product').text = str(product_id)
+            return self.send_xml(200, root)
+
+        if method == 'DELETE' and image_id is not None:
+            if store.delete_image(product_id, image_id):
+                return self.send_body(200, b'')
+            return self.send_error_xml(404, 'Zdjęcie nie istnieje')
+
+        return self.send_error_xml(405, 'Metoda nieobsługiwana')
+
+    def parse_upload_size(self, body):
+        """Zwraca rozmiar pliku z pola 'image' zapytania multipart."""
+        content_type = self.headers.get('Content-Type', '')
+        if 'multipart/form-data' not in content_type:
+            return None
+        message = BytesParser(policy=default_policy).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        for part in message.iter_parts():
+            if part.get_param('name', header='content-disposition') == 'image':
+                return len(part.get_payload(decode=True) or b'')
+        return None
+
+    def do_GET(self):
+        self.handle_any('GET')
+
+    def do_POST(self):
+        self.handle_any('POST')
+
+    def do_PUT(self):
+        self.handle_any('PUT')
+
+    def do_DELETE(self):
+        self.handle_any('DELETE')
+
+
+def start_server(host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+    """
+    Uruchamia serwer w wątku w tle.
+
+    Returns:
+        Obiekt FakePrestaShopServer (adres API: server.api_url)
+    """
+    server = FakePrestaShopServer((host, port), latency, jitter, error_rate, seed)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Lokalny zamiennik webservice PrestaShop do testów importu',
+        epilog="""
+Przykłady:
+  # Serwer bez opóźnień
+  python fake_prestashop.py
+
+  # 20 ms opóźnienia (+ do 10 ms losowo) i 1% błędów 500
+  python fake_prestashop.py --latency 0.02 --jitter 0.01 --error-rate 0.01 --seed 42
+        """
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Adres nasłuchiwania')
+    parser.add_argument('--port', type=int, default=8081, help='Port (domyślnie 8081)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Stałe opóźnienie odpowiedzi w sekundach')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Dodatkowe losowe opóźnienie (0..jitter) w sekundach')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Odsetek zapytań kończonych błędem 500 (0..1)')
+    parser.add_argument('--seed', type=int, help='Ziarno losowości (powtarzalne błędy)')
+    args = parser.parse_args()
+
+    server = FakePrestaShopServer((args.host, args.port), args.latency, args.jitter,
+                                  args.error_rate, args.seed)
+    print(f"Zamiennik API PrestaShop działa pod adresem: {server.api_url}")
+    print("Ustaw PRESTASHOP_URL na ten adres. Ctrl+C kończy pracę.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nZatrzymano serwer")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
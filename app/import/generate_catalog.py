@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generator syntetycznych katalogów produktów do testów w dużej skali.
+
+Prawdziwe dane (products_with_details.json, ~1100 produktów) służą jako
+wzorce. Każdy syntetyczny produkt powstaje ze wzorca wylosowanego z tym
+samym rozkładem kategorii i zachowuje cechy danych, od których zależy
+wydajność importu:
+- nazwy: marka wzorca + człon nazwy innego produktu z tej samej kategorii
+  + gramatura spotykana w tej kategorii (np. 'Amanda Despalada 1kg'),
+- ścieżki kategorii i URL-e w tym samym układzie co na dobreziele.pl,
+- szczegoly: zestaw kluczy wzorca, wartości losowane z wartości tej cechy
+  w tej samej kategorii (liczność wartości cech jak w prawdziwych danych),
+- liczba zdjęć wzorca - opcjonalnie z plikami zdjęć (twarde dowiązania
+  do zdjęć wzorca w katalogu w układzie ImageDownloadera).
+
+Formaty wyjściowe:
+- json    - lista jak products_with_details.json (czytana przez importery),
+- jsonl   - jeden produkt w wierszu,
+- parquet - kolumnowy (wymaga pakietu pyarrow).
+
+Przykład:
+    python generate_catalog.py --size 50000 --output ../data/catalog_50k.json
+    python generate_catalog.py --size 50000 --format parquet --output catalog.parquet
+"""
+
+import json
+import os
+import random
+import re
+import shutil
+import sys
+from pathlib import Path
+
+from slugify import slugify
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+SOURCE_FILE = DATA_DIR / 'products_with_details.json'
+SOURCE_IMAGES_DIR = DATA_DIR / 'images'
+
+FORMATS = ('json', 'jsonl', 'parquet')
+PARQUET_BATCH_SIZE = 10000
+
+WEIGHT_PATTERN = re.compile(r'\s*\b\d+(?:[.,]\d+)?\s*(?:kg|g|ml|l)\b', re.IGNORECASE)
+
+
+def split_name(name):
+    """
+    Dzieli nazwę na markę, człon środkowy i gramaturę.
+
+    'Amanda con palo 500g' -> ('Amanda', 'con palo', '500g')
+    """
+    weight_match = WEIGHT_PATTERN.search(name)
+    weight = weight_match.group(0).strip() if weight_match else ''
+    base = WEIGHT_PATTERN.sub('', name).strip()
+    brand, _, middle = base.partition(' ')
+    return brand, middle, weight
+
+
+def sanitize_folder_name(name):
+    """Nazwa katalogu zdjęć jak w ImageDownloader.sanitize_filename()."""
+    name = re.sub(r'[^\w\s-]', '', name)
+    name = re.sub(r'[-\s]+', '_', name)
+    return name[:100]
+
+
+def load_templates(source_file=SOURCE_FILE):
+    """
+    Wczytuje wzorce i buduje pule wartości dla każdej kategorii.
+
+    Returns:
+        Krotka (wzorce, pule) gdzie pule[kategoria] zawiera listy członów
+        nazw, gramatur i wartości cech
+    """
+    with open(source_file, 'r', encoding='utf-8') as f:
+        templates = [p for p in json.load(f) if p.get('szczegoly_produktu')]
+
+    pools = {}
+    for product in templates:
+        category = product.get('kategoria_pelna_sciezka', '')
+        pool = pools.setdefault(category, {'middles': [], 'weights': [], 'features': {}})
+        _, middle, weight = split_name(product['nazwa'])
+        if middle:
+            pool['middles'].append(middle)
+        if weight:
+            pool['weights'].append(weight)
+        for key, value in product['szczegoly_produktu'].get('szczegoly', {}).items():
+            pool['features'].setdefault(key, []).append(value)
+
+    return templates, pools
+
+
+def cross_middles(rng, middles):
+    """Łączy początek członu nazwy jednego produktu z końcem innego."""
+    first = rng.choice(middles).split()
+    second = rng.choice(middles).split()
+    return ' '.join(first[:rng.randint(1, len(first))] + second[rng.randint(0, len(second)):])
+
+
+def synthesize_name(rng, template, pool, used_names):
+    """Tworzy unikalną, realistyczną nazwę produktu na podstawie wzorca."""
+    brand, middle, weight = split_name(template['nazwa'])
+    for attempt in range(20):
+        new_middle = middle
+        if pool['middles']:
+            # Po kilku nieudanych próbach krzyżujemy człony, aby uzyskać nowe nazwy
+            new_middle = cross_middles(rng, pool['middles']) if attempt >= 3 else rng.choice(pool['middles'])
+        new_weight = rng.choice(pool['weights']) if weight and pool['weights'] else weight
+        name = ' '.join(part for part in (brand, new_middle, new_weight) if part)
+        if name not in used_names:
+            used_names.add(name)
+            return name
+    # Wszystkie kombinacje zajęte - kolejna seria tego samego produktu
+    series = 2
+    while f"{name} seria {series}" in used_names:
+        series += 1
+    name = f"{name} seria {series}"
+    used_names.add(name)
+    return name
+
+
+def generate_products(size, seed=0, source_file=SOURCE_FILE):
+    """
+    Generuje syntetyczne produkty w formacie products_with_details.json.
+
+    Args:
+        size: Liczba produktów
+        seed: Ziarno generatora losowego (ten sam seed = ten sam katalog)
+        source_file: Plik z produktami wzorcowymi
+
+    Yields:
+        Krotka (produkt, id produktu wzorcowego)
+    """
+    rng = random.Random(seed)
+    templates, pools = load_templates(source_file)
+    used_names = set()
+    used_urls = set()
+    first_id = max(int(p['id_produktu']) for p in templates if p.get('id_produktu', '').isdigit()) + 1
+
+    for i in range(size):
+        template = rng.choice(templates)
+        details = template['szczegoly_produktu']
+        category = template.get('kategoria_pelna_sciezka', '')
+        pool = pools[category]
+
+        product_id = str(first_id + i)
+        name = synthesize_name(rng, template, pool, used_names)
+        category_url = template.get('url_kategorii', '')
+        product_url = f"{category_url}/{slugify(name)}"
+        # Sklep dodaje do powtarzających się adresów przyrostek, np. aguamate-500g-2
+        suffix = 2
+        base_url = product_url
+        while product_url in used_urls:
+            product_url = f"{base_url}-{suffix}"
+            suffix += 1
+        used_urls.add(product_url)
+
+        price = float(re.sub(r'[^\d.]', '', (details.get('cena') or '0').replace(',', '.')) or 0)
+        price = round(price * rng.uniform(0.85, 1.15) * 2) / 2
+
+        image_urls = []
+        for n in range(len(details.get('zdjecia', []))):
+            prefix = 'b_shop_' if n == 0 else f'b_shop_{n - 1}_'
+            image_urls.append(f"https://dobreziele.pl/!data/shop/{prefix}{product_id}.jpg")
+
+        features = {
+            key: rng.choice(pool['features'].get(key) or [value])
+            for key, value in details.get('szczegoly', {}).items()
+        }
+
+        yield {
+            'url_produktu': product_url,
+            'nazwa': name,
+            'id_produktu': product_id,
+            'kategoria': template.get('kategoria', ''),
+            'kategoria_pelna_sciezka': category,
+            'url_kategorii': category_url,
+            'szczegoly_produktu': {
+                'url': product_url,
+                'nazwa': name,
+                'cena': f"{price:.2f} zł",
+                'opis': details.get('opis'),
+                'marka': details.get('marka'),
+                'kategoria': details.get('kategoria'),
+                'zdjecia': image_urls,
+                'szczegoly': features,
+            },
+        }, template.get('id_produktu', '')
+
+
+def link_product_images(product, template_id, images_dir, template_folders):
+    """
+    Tworzy katalog zdjęć produktu z dowiązaniami do zdjęć wzorca.
+
+    Returns:
+        Liczba utworzonych plików
+    """
+    source = template_folders.get(template_id)
+    if source is None:
+        return 0
+    target = images_dir / f"{product['id_produktu']}_{sanitize_folder_name(product['nazwa'])}"
+    target.mkdir(parents=True, exist_ok=True)
+    created = 0
+    for image in source.glob('product*.jpg'):
+        try:
+            os.link(image, target / image.name)
+        except FileExistsError:
+            continue
+        except OSError:
+            shutil.copyfile(image, target / image.name)
+        created += 1
+    return created
+
+
+def find_template_folders(source_images_dir=SOURCE_IMAGES_DIR):
+    """Zwraca mapę: id produktu -> katalog jego zdjęć."""
+    if not source_images_dir.exists():
+        return {}
+    return {entry.name.split('_', 1)[0]: entry
+            for entry in source_images_dir.iterdir() if entry.is_dir()}
+
+
+def flatten_for_parquet(product):
+    details = product['szczegoly_produktu']
+    return {
+        'id_produktu': product['id_produktu'],
+        'nazwa': product['nazwa'],
+        'url_produktu': product['url_produktu'],
+        'kategoria': product['kategoria'],
+        'kategoria_pelna_sciezka': product['kategoria_pelna_sciezka'],
+        'url_kategorii': product['url_kategorii'],
+        'cena': details['cena'],
+        'opis': details['opis'],
+        'marka': details['marka'],
+        'kategoria_okruszki': details['kategoria'],
+        'zdjecia': details['zdjecia'],
+        'szczegoly': list(details['szczegoly'].items()),
+    }
+
+
+def write_catalog(products, output_file, fmt='json', images_dir=None):
+    """
+    Zapisuje produkty strumieniowo (bez trzymania całego katalogu w pamięci).
+
+    Args:
+        products: Iterator krotek (produkt, id wzorca) z generate_products()
+        output_file: Plik wynikowy
+        fmt: Format ('json', 'jsonl' lub 'parquet')
+        images_dir: Katalog na zdjęcia (None = bez zdjęć)
+
+    Returns:
+        Słownik ze statystykami
+    """
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    template_folders = find_template_folders() if images_dir else {}
+    stats = {'products': 0, 'images': 0}
+
+    def each_product():
+        for product, template_id in products:
+            if images_dir:
+                stats['images'] += link_product_images(product, template_id, Path(images_dir),
+                                                       template_folders)
+            stats['products'] += 1
+            yield product
+
+    if fmt == 'json':
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write('[\n')
+            for i, product in enumerate(each_product()):
+                if i:
+                    f.write(',\n')
+                json.dump(product, f, ensure_ascii=False)
+            f.write('\n]\n')
+
+    elif fmt == 'jsonl':
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for product in each_product():
+                f.write(json.dumps(product, ensure_ascii=False) + '\n')
+
+    elif fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            (name, pa.string()) for name in (
+                'id_produktu', 'nazwa', 'url_produktu', 'kategoria', 'kategoria_pelna_sciezka',
+                'url_kategorii', 'cena', 'opis', 'marka', 'kategoria_okruszki')
+        ] + [
+            ('zdjecia', pa.list_(pa.string())),
+            ('szczegoly', pa.map_(pa.string(), pa.string())),
+        ])
+        with pq.ParquetWriter(output_file, schema, compression='zstd') as writer:
+            batch = []
+            for product in each_product():
+                batch.append(flatten_for_parquet(product))
+                if len(batch) >= PARQUET_BATCH_SIZE:
+                    writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                    batch = []
+            if batch:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+    else:
+        raise ValueError(f"Nieznany format: {fmt}")
+
+    return stats
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Generator syntetycznych katalogów produktów do testów w dużej skali',
+        epilog="""
+Przykłady:
+  # 50 tys. produktów w formacie importerów
+  python generate_catalog.py --size 50000 --output ../data/catalog_50k.json
+
+  # Ze zdjęciami (twarde dowiązania do zdjęć wzorców)
+  python generate_catalog.py --size 50000 --output ../data/catalog_50k.json --images ../data/images_50k
+
+  # Format kolumnowy
+  python generate_catalog.py --size 50000 --format parquet --output catalog_50k.parquet
+        """
+    )
+
+    parser.add_argument('--size', type=int, required=True,
+                        help='Liczba produktów')
+    parser.add_argument('--output', required=True,
+                        help='Plik wynikowy')
+    parser.add_argument('--format', choices=FORMATS,
+                        help='Format wyjściowy (domyślnie według rozszerzenia pliku)')
+    parser.add_argument('--images',
+                        help='Katalog na zdjęcia produktów (domyślnie bez zdjęć)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Ziarno generatora losowego (domyślnie 0)')
+    parser.add_argument('--source', default=str(SOURCE_FILE),
+                        help='Plik z produktami wzorcowymi')
+
+    args = parser.parse_args()
+
+    fmt = args.format or Path(args.output).suffix.lstrip('.')
+    if fmt not in FORMATS:
+        print(f"BŁĄD: Nieznany format '{fmt}' (dostępne: {', '.join(FORMATS)})", file=sys.stderr)
+        return 1
+
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("BŁĄD: Format parquet wymaga pakietu pyarrow (pip install pyarrow)", file=sys.stderr)
+            return 1
+
+    print(f"Generowanie katalogu: {args.size} produktów ({fmt})...")
+    stats = write_catalog(generate_products(args.size, args.seed, Path(args.source)),
+                          args.output, fmt, args.images)
+
+    print(f"✓ Zapisano {stats['products']} produktów do {args.output}")
+    if args.images:
+        print(f"✓ Utworzono {stats['images']} plików zdjęć w {args.images}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,51 @@
 import json
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from slugify import slugify
-from prestashop_api import get_api_xml, post_api_xml
+from prestashop_api import API_WORKERS, get_api_records, post_api_xml
+import api_resilience
+import import_journal
 
 INPUT_FILE = Path(__file__).parent.parent / 'data' / 'categories.json'
 ID_KATEGORII_GLOWNEJ = 2
 
+# (nazwa, ID rodzica) -> ID kategorii
 created_categories = {}
+# To samo bez rozróżniania wielkości liter (jak filter[name] webservice)
+_folded_categories = {}
 
-def get_or_create_category(name, parent_id):
-    cache_key = (name, parent_id)
-    if cache_key in created_categories:
-        return created_categories[cache_key]
-
-    options = {'filter[name]': name, 'filter[id_parent]': parent_id, 'display': 'full'}
-    xml = get_api_xml('categories', options)
-    
-    if xml is not None and xml.find('.//category') is not None:
-        category_id = xml.find('.//category/id').text
-        print(f"  Kategoria '{name}' już istnieje (ID: {category_id}).")
-        created_categories[cache_key] = category_id
-        return category_id
-    
+
+def _remember(name, parent_id, category_id):
+    created_categories.setdefault((name, str(parent_id)), category_id)
+    _folded_categories.setdefault((name.casefold(), str(parent_id)), category_id)
+
+
+def prefetch_categories():
+    """
+    Wypełnia pamięć podręczną wszystkimi istniejącymi kategoriami (jedno zapytanie).
+
+    Returns:
+        Liczba wczytanych kategorii lub None w przypadku błędu
+    """
+    categories = get_api_records('categories', {'display': '[id,name,id_parent]'})
+    if categories is None:
+        return None
+    for category in categories:
+        _remember(category.get('name', ''), category.get('id_parent', ''), category.id)
+    return len(categories)
+
+
+def find_cached_category(name, parent_id):
+    """Szuka kategorii w pamięci podręcznej (bez rozróżniania wielkości liter, jak filter[name])."""
+    return (created_categories.get((name, str(parent_id)))
+            or _folded_categories.get((name.casefold(), str(parent_id))))
+
+
+def create_category(name, parent_id):
     print(f"  Tworzenie kategorii: '{name}' (Rodzic ID: {parent_id})")
-    
+
     xml_data = f"""
     <prestashop>
       <category>
@@ -35,51 +56,105 @@ def get_or_create_category(name, parent_id):
       </category>
     </prestashop>
     """
-    
+
     new_xml = post_api_xml('categories', xml_data)
-    
+
     if new_xml is not None:
         new_category_id = new_xml.find('.//category/id').text
-        print(f"  Utworzono kategorię (ID: {new_category_id})")
-        created_categories[cache_key] = new_category_id
+        _remember(name, parent_id, new_category_id)
         return new_category_id
     else:
         print(f"  BŁĄD: Nie udało się utworzyć kategorii '{name}'")
         return None
 
 
-def process_categories_recursively(category_list, parent_id):
-    if not category_list:
-        return
+def import_tree_by_levels(category_list, root_id):
+    """
+    Importuje drzewo kategorii wszerz - poziom po poziomie.
+
+    Kategorie jednego poziomu są tworzone równolegle, gdy istnieją już
+    wszyscy ich rodzice, więc czas importu zależy od głębokości drzewa,
+    a nie od liczby kategorii.
+
+    Args:
+        category_list: Drzewo kategorii z categories.json
+        root_id: ID kategorii nadrzędnej dla pierwszego poziomu
+
+    Returns:
+        Lista statystyk poziomów
+    """
+    level_stats = []
+    level = [(category, str(root_id)) for category in category_list]
+    depth = 1
+
+    with ThreadPoolExecutor(max_workers=API_WORKERS) as executor:
+        while level:
+            start = time.perf_counter()
 
-    for category_data in category_list:
-        name = category_data.get('name')
-        if not name:
-            continue
-            
-        new_category_id = get_or_create_category(name, parent_id)
-        
-        if new_category_id:
-            subcategories = category_data.get('subcategories')
-            if subcategories:
-                process_categories_recursively(subcategories, new_category_id)
+            # Ta sama kategoria może wystąpić w drzewie kilka razy - tworzymy ją raz
+            nodes = {}
+            for category, parent_id in level:
+                name = category.get('name')
+                if name:
+                    nodes.setdefault((name, parent_id), []).append(category)
+
+            resolved = {key: find_cached_category(*key) for key in nodes}
+            missing = [key for key, category_id in resolved.items() if not category_id]
+            for key, category_id in zip(missing, executor.map(lambda key: create_category(*key), missing)):
+                resolved[key] = category_id
+
+            next_level = []
+            for key, categories in nodes.items():
+                if not resolved[key]:
+                    continue
+                for category in categories:
+                    next_level.extend((sub, resolved[key]) for sub in category.get('subcategories') or [])
+
+            stats = {
+                'level': depth,
+                'categories': len(nodes),
+                'existing': len(nodes) - len(missing),
+                'created': sum(1 for key in missing if resolved[key]),
+                'errors': sum(1 for key in missing if not resolved[key]),
+                'time': time.perf_counter() - start,
+            }
+            level_stats.append(stats)
+            print(f"  Poziom {depth}: kategorii {stats['categories']}, istniejących {stats['existing']}, "
+                  f"utworzonych {stats['created']}, błędów {stats['errors']} ({stats['time']:.2f} s)")
+
+            level = next_level
+            depth += 1
+
+    return level_stats
 
 
 def main():
     print(f"Rozpoczynanie importu drzewa kategorii z pliku: {INPUT_FILE}")
+    import_journal.enable('import_categories')
     try:
         with open(INPUT_FILE, 'r', encoding='utf-8') as f:
             categories_data = json.load(f)
     except FileNotFoundError:
         print(f"BŁĄD: Nie znaleziono pliku {INPUT_FILE}", file=sys.stderr)
-        return
+        return 1
     except json.JSONDecodeError:
         print(f"BŁĄD: Plik {INPUT_FILE} nie jest poprawnym plikiem JSON.", file=sys.stderr)
-        return
+        return 1
+
+    if prefetch_categories() is None:
+        print("BŁĄD: Nie udało się pobrać listy kategorii", file=sys.stderr)
+        return 1
 
     print(f"Przetwarzanie kategorii głównych (Rodzic: {ID_KATEGORII_GLOWNEJ})...")
-    process_categories_recursively(categories_data, ID_KATEGORII_GLOWNEJ)
+    start = time.perf_counter()
+    level_stats = import_tree_by_levels(categories_data, ID_KATEGORII_GLOWNEJ)
     print("\n--- Zakończono import kategorii ---")
+    print(f"Utworzono: {sum(s['created'] for s in level_stats)}, "
+          f"istniejących: {sum(s['existing'] for s in level_stats)}, "
+          f"błędów: {sum(s['errors'] for s in level_stats)}, "
+          f"poziomów: {len(level_stats)}, czas: {time.perf_counter() - start:.2f} s")
+    api_resilience.print_failure_summary()
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Dziennik importu - zapis każdego zasobu utworzonego lub zmienionego w PrestaShop.
+
+Skrypty importu (import_categories, import_products, update_stocks_images)
+włączają dziennik funkcją enable(). Każda udana zmiana w API (hooki
+w prestashop_api.py) dopisywana jest jako jeden wiersz JSON do pliku
+<katalog dziennika>/<id przebiegu>.jsonl. Plik jest tylko dopisywany,
+więc przerwany import zostawia kompletny zapis dotychczasowych zmian.
+
+ID przebiegu pochodzi ze zmiennej środowiskowej IMPORT_RUN_ID (main.py
+ustawia jedno ID dla wszystkich skryptów pełnego importu), a bez niej
+jest tworzone z bieżącej daty. Przebieg cofa skrypt rollback_import.py.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import xml.etree.ElementTree as ET
+
+from prestashop_api import register_change_hook
+
+RUN_ID_ENV = 'IMPORT_RUN_ID'
+JOURNAL_DIR = Path(os.getenv('IMPORT_JOURNAL_DIR', Path(__file__).parent.parent / 'data' / 'import_journal'))
+
+_lock = threading.Lock()
+_journal_file = None
+
+
+def get_run_id():
+    """Zwraca ID bieżącego przebiegu (ustawia je w środowisku dla procesów potomnych)."""
+    if not os.getenv(RUN_ID_ENV):
+        os.environ[RUN_ID_ENV] = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return os.environ[RUN_ID_ENV]
+
+
+def journal_path(run_id):
+    return JOURNAL_DIR / f"{run_id}.jsonl"
+
+
+def append_entry(run_id, entry):
+    """Dopisuje wpis do dziennika przebiegu."""
+    global _journal_file
+    with _lock:
+        if _journal_file is None or _journal_file.name != str(journal_path(run_id)):
+            JOURNAL_DIR.mkdir(parents=True, exist_ok=True)
+            _journal_file = open(journal_path(run_id), 'a', encoding='utf-8')
+        _journal_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        _journal_file.flush()
+
+
+def enable(script):
+    """
+    Włącza zapis zmian w API do dziennika bieżącego przebiegu.
+
+    Args:
+        script: Nazwa skryptu zapisywana przy każdym wpisie
+
+    Returns:
+        ID przebiegu
+    """
+    run_id = get_run_id()
+
+    def record_change(action, resource, resource_id, before=None, record=None):
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'script': script,
+            'action': action,
+            'resource': resource,
+            'id': str(resource_id),
+        }
+        if before is not None:
+            entry['before'] = before.decode('utf-8') if isinstance(before, bytes) else before
+        if record is not None and record.findtext('id_parent'):
+            entry['parent'] = record.findtext('id_parent')
+        append_entry(run_id, entry)
+
+    register_change_hook(record_change)
+    print(f"Dziennik importu: {journal_path(run_id)}")
+    return run_id
+
+
+def snapshot(xml):
+    """Zwraca zasób pobrany z API jako tekst XML do zapisania w dzienniku."""
+    return ET.tostring(xml, encoding='unicode')
+
+
+def read_journal(run_id):
+    """Wczytuje wszystkie wpisy przebiegu."""
+    with open(journal_path(run_id), 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def list_runs():
+    """Zwraca ID zapisanych przebiegów od najstarszego."""
+    if not JOURNAL_DIR.exists():
+        return []
+    return sorted(path.stem for path in JOURNAL_DIR.glob('*.jsonl'))
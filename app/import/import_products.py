@@ -1,74 +1,52 @@
+import hashlib
 import json
+import os
 import xml.etree.ElementTree as ET
-import re
 from slugify import slugify
 import sys
-from prestashop_api import get_api_xml, post_api_xml, put_api_xml
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from prestashop_api import API_WORKERS, get_api_records, get_api_xml, post_api_xml, put_api_xml
+from catalog_utils import product_source_fields
+import api_resilience
+import import_journal
 
 INPUT_FILE = '../data/products_with_details.json'
+# Skróty pól zaimportowanych produktów (tryb --upsert)
+FINGERPRINTS_FILE = Path(__file__).parent.parent / 'data' / 'import_fingerprints.json'
+
+# Pola zwracane przez API, których nie można wysłać w PUT
+READONLY_PRODUCT_FIELDS = ('manufacturer_name', 'quantity', 'position_in_category')
+# Grupy pól, które wymagają zamiany nazw na ID przez API
+RESOLVED_GROUPS = {'manufacturer', 'categories', 'features'}
 
 manufacturers_cache = {}
 categories_cache = {}
 features_cache = {}
 feature_values_cache = {}
+# Blokady tworzenia pojedynczych rekordów (_reference_lock)
+_reference_locks = {}
+_reference_locks_guard = threading.Lock()
 
 
-def clean_price(price_str):
-    """Przekształca '31.00 zł' na '31.00'."""
-    if not price_str: return "0.00"
-    price = re.sub(r'[^\d.]', '', price_str.replace(',', '.'))
-    return f"{float(price):.2f}" if price else "0.00"
-
-def get_weight_from_name(name):
+def _reference_lock(*key):
     """
-    Wyciąga wagę z nazwy produktu (np. 'Yerba 500g' -> '0.500').
-    Domyślnie zwraca '0.000'.
+    Zwraca blokadę jednego producenta, cechy lub wartości cechy.
+
+    Gdy tworzenie rekordu w prefetch_references się nie powiedzie, kilka
+    wątków importu może jednocześnie nie znaleźć go w pamięci podręcznej.
+    Pod blokadą tylko pierwszy z nich szuka i tworzy rekord, a kolejne
+    znajdują go już w pamięci podręcznej. Nazwy są porównywane bez
+    wielkości liter, jak w filtrze webservice.
     """
-    if not name: return "0.000"
-    
-    text = name.lower().replace(',', '.')
-    
-    match_kg = re.search(r'(\d+(?:\.\d+)?)\s*kg', text)
-    if match_kg:
-        weight = float(match_kg.group(1))
-        return f"{weight:.3f}"
-
-    match_g = re.search(r'(\d+)\s*g', text)
-    if match_g:
-        weight_g = float(match_g.group(1))
-        weight_kg = weight_g / 1000.0
-        return f"{weight_kg:.3f}"
-
-    return "0.000"
-
-def format_html(text):
-    """Formatuje tekst z \n na HTML. Słowa przed \n są pogrubiane."""
-    if not text: return ""
-    
-    text = re.sub(r'([A-ZĄĆĘŁŃÓŚŹŻ][a-ząćęłńóśźż\s]+)\n([a-ząćęłńóśźż])', r'<strong>\1</strong>\n\2', text)
-    
-    text = text.replace('\n\n', '|||PARAGRAPH|||')
-    text = text.replace('\n', ' ')
-    text = text.replace('|||PARAGRAPH|||', '</p><p>')
-    
-    text = re.sub(r'([a-ząćęłńóśźż\.]) <strong>', r'\1<br><strong>', text)
-    
-    return f"<p>{text}</p>"
+    key = tuple(part.casefold() if isinstance(part, str) else part for part in key)
+    with _reference_locks_guard:
+        return _reference_locks.setdefault(key, threading.Lock())
 
 
-def get_or_create_manufacturer(name):
-    if not name: return '0'
-    if name in manufacturers_cache: return manufacturers_cache[name]
-    
-    print(f"  Producent: {name}")
-    options = {'filter[name]': name, 'display': 'full'}
-    xml = get_api_xml('manufacturers', options)
-    
-    if xml is not None and xml.find('.//manufacturer') is not None:
-        id = xml.find('.//manufacturer/id').text
-        manufacturers_cache[name] = id
-        return id
-    
+def create_manufacturer(name):
+    """Tworzy producenta i zapisuje jego ID w pamięci podręcznej."""
     print(f"    Tworzenie producenta: {name}")
     xml_data = f"""<prestashop><manufacturer>
         <active>1</active>
@@ -82,10 +60,28 @@ def get_or_create_manufacturer(name):
     manufacturers_cache[name] = id
     return id
 
+def get_or_create_manufacturer(name):
+    if not name: return '0'
+    if name in manufacturers_cache: return manufacturers_cache[name]
+    
+    with _reference_lock('manufacturer', name):
+        if name in manufacturers_cache: return manufacturers_cache[name]
+        
+        print(f"  Producent: {name}")
+        options = {'filter[name]': name, 'display': '[id]'}
+        records = get_api_records('manufacturers', options)
+        
+        if records:
+            id = records[0].id
+            manufacturers_cache[name] = id
+            return id
+        
+        return create_manufacturer(name)
+
 def get_category_id_by_path(path_str):
     """Znajduje ID kategorii na podstawie ścieżki "Kat1/Kat2"."""
     print(f"  Kategorie: {path_str}")
-    parent_id = 2 # Zaczynamy od "Home"
+    parent_id = '2' # Zaczynamy od "Home"
     
     if not path_str: return parent_id, [parent_id]
         
@@ -97,11 +93,11 @@ def get_category_id_by_path(path_str):
         if cache_key in categories_cache:
             parent_id = categories_cache[cache_key]
         else:
-            options = {'filter[name]': part, 'filter[id_parent]': parent_id, 'display': 'full'}
-            xml = get_api_xml('categories', options)
+            options = {'filter[name]': part, 'filter[id_parent]': parent_id, 'display': '[id]'}
+            records = get_api_records('categories', options)
             
-            if xml is not None and xml.find('.//category') is not None:
-                parent_id = xml.find('.//category/id').text
+            if records:
+                parent_id = records[0].id
                 categories_cache[cache_key] = parent_id
             else:
                 print(f"    Ostrzeżenie: Nie znaleziono kategorii '{part}' w rodzicu {parent_id}.")
@@ -112,19 +108,8 @@ def get_category_id_by_path(path_str):
     return parent_id, list(all_ids) # Zwraca ID ostatniej kategorii i listę wszystkich ID
 
 
-def get_or_create_feature(name):
-    """Znajduje lub tworzy cechę (feature) po nazwie."""
-    if name in features_cache:
-        return features_cache[name]
-    
-    options = {'filter[name]': name, 'display': 'full'}
-    xml = get_api_xml('product_features', options)
-    
-    if xml is not None and xml.find('.//product_feature') is not None:
-        feature_id = xml.find('.//product_feature/id').text
-        features_cache[name] = feature_id
-        return feature_id
-    
+def create_feature(name):
+    """Tworzy cechę i zapisuje jej ID w pamięci podręcznej."""
     xml_data = f"""<?xml version="1.0" encoding="UTF-8"?>
 <prestashop xmlns:xlink="http://www.w3.org/1999/xlink">
 <product_feature>
@@ -141,20 +126,28 @@ def get_or_create_feature(name):
     return feature_id
 
 
-def get_or_create_feature_value(feature_id, value):
-    """Znajduje lub tworzy wartość cechy (feature value)."""
-    cache_key = (feature_id, value)
-    if cache_key in feature_values_cache:
-        return feature_values_cache[cache_key]
-    
-    options = {'filter[id_feature]': feature_id, 'filter[value]': value, 'display': 'full'}
-    xml = get_api_xml('product_feature_values', options)
-    
-    if xml is not None and xml.find('.//product_feature_value') is not None:
-        value_id = xml.find('.//product_feature_value/id').text
-        feature_values_cache[cache_key] = value_id
-        return value_id
+def get_or_create_feature(name):
+    """Znajduje lub tworzy cechę (feature) po nazwie."""
+    if name in features_cache:
+        return features_cache[name]
     
+    with _reference_lock('feature', name):
+        if name in features_cache:
+            return features_cache[name]
+        
+        options = {'filter[name]': name, 'display': '[id]'}
+        records = get_api_records('product_features', options)
+        
+        if records:
+            feature_id = records[0].id
+            features_cache[name] = feature_id
+            return feature_id
+        
+        return create_feature(name)
+
+
+def create_feature_value(feature_id, value):
+    """Tworzy wartość cechy i zapisuje jej ID w pamięci podręcznej."""
     xml_data = f"""<?xml version="1.0" encoding="UTF-8"?>
 <prestashop xmlns:xlink="http://www.w3.org/1999/xlink">
 <product_feature_value>
@@ -168,90 +161,187 @@ def get_or_create_feature_value(feature_id, value):
         return None
     
     value_id = new_xml.find('.//product_feature_value/id').text
-    feature_values_cache[cache_key] = value_id
+    feature_values_cache[(feature_id, value)] = value_id
     return value_id
 
 
-
-
-def main():
-    print("Rozpoczynanie importu produktów...")
-    try:
-        with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        print(f"BŁĄD: Nie znaleziono pliku {INPUT_FILE}", file=sys.stderr)
-        return
+def get_or_create_feature_value(feature_id, value):
+    """Znajduje lub tworzy wartość cechy (feature value)."""
+    cache_key = (feature_id, value)
+    if cache_key in feature_values_cache:
+        return feature_values_cache[cache_key]
     
-    for i, item in enumerate(data):
-        details = item.get('szczegoly_produktu', {})
-        if not details:
-            continue
-            
-        name = item.get('nazwa')
-        print(f"\n--- Przetwarzanie produktu {i+1}/{len(data)}: {name} ---")
+    with _reference_lock('feature_value', feature_id, value):
+        if cache_key in feature_values_cache:
+            return feature_values_cache[cache_key]
         
-        # 1. Sprawdź  czy produkt już istnieje
-        options = {'filter[name]': name, 'display': 'full'}
-        xml = get_api_xml('products', options)
-        if xml is not None and xml.find('.//product') is not None:
-            print("  Produkt już istnieje. Pomijanie.")
-            continue
-
-        # 2. Zbierz dane
-        # Cena w JSON to cena BRUTTO - PrestaShop potrzebuje NETTO
-        cena_brutto = float(clean_price(details.get('cena', '0.00')))
-        price = f"{(cena_brutto / 1.23):.2f}"  # Przelicz na netto
+        options = {'filter[id_feature]': feature_id, 'filter[value]': value, 'display': '[id]'}
+        records = get_api_records('product_feature_values', options)
         
-        # Opis + szczegóły produktu
-        description = format_html(details.get('opis', ''))
-        szczegoly = details.get('szczegoly', {})
-        if szczegoly:
-            description += "\n<h3>Szczegóły produktu:</h3>\n<ul>\n"
-            for key, value in szczegoly.items():
-                if value:
-                    description += f"<li><strong>{key}:</strong> {value}</li>\n"
-            description += "</ul>"
-        manufacturer_id = get_or_create_manufacturer(details.get('marka'))
+        if records:
+            value_id = records[0].id
+            feature_values_cache[cache_key] = value_id
+            return value_id
         
-        # 3. Kategorie
-        default_category_id, category_ids = get_category_id_by_path(item.get('kategoria_pelna_sciezka', ''))
-        categories_xml = "".join(f"<category><id>{cid}</id></category>" for cid in category_ids)
-
-        # 4. Przygotuj cechy produktu
-        print("  Tworzenie cech produktu...")
-        features_xml = ""
-        if szczegoly:
-            feature_items = []
-            for key, value in szczegoly.items():
-                if value:
-                    feature_id = get_or_create_feature(key)
-                    if feature_id:
-                        value_id = get_or_create_feature_value(feature_id, value)
-                        if value_id:
-                            feature_items.append(f"<product_feature><id>{feature_id}</id><id_feature_value>{value_id}</id_feature_value></product_feature>")
-            
-            if feature_items:
-                features_xml = "".join(feature_items)
+        return create_feature_value(feature_id, value)
 
-#     5. Przygotuj pole manufacturer
-        manufacturer_xml = f"<id_manufacturer>{manufacturer_id}</id_manufacturer>" if manufacturer_id != '0' else ""
-        
-        # --- Oblicz wagę ---
-        weight = get_weight_from_name(name)
-        print(f"    Wykryta waga: {weight} kg")
-        
-        product_xml = f"""<?xml version="1.0" encoding="UTF-8"?>
+
+def _match_existing(names, existing):
+    """
+    Dopasowuje nazwy do istniejących rekordów {nazwa: id}.
+
+    Filtr webservice (filter[name]) nie rozróżnia wielkości liter, więc
+    dopasowanie bez niej zachowuje się tak samo jak wyszukiwanie pojedyncze.
+
+    Returns:
+        Krotka (znalezione {nazwa: id}, lista brakujących nazw)
+    """
+    folded = {}
+    for name, record_id in existing.items():
+        folded.setdefault(name.casefold(), record_id)
+    found, missing = {}, []
+    for name in names:
+        record_id = existing.get(name) or folded.get(name.casefold())
+        if record_id:
+            found[name] = record_id
+        else:
+            missing.append(name)
+    return found, missing
+
+
+def _create_all(executor, create, args_list):
+    """Wykonuje create(*args) równolegle; zwraca liczbę błędów."""
+    return sum(1 for result in executor.map(lambda args: create(*args), args_list) if not result)
+
+
+def prefetch_references(items):
+    """
+    Wstępny przebieg przed importem produktów.
+
+    Zbiera z całego katalogu unikalnych producentów, cechy, pary
+    (cecha, wartość) i ścieżki kategorii, pobiera istniejące rekordy kilkoma
+    zapytaniami listującymi i równolegle tworzy brakujące. Po nim
+    resolve_product_fields() korzysta już tylko z pamięci podręcznej.
+
+    Args:
+        items: Produkty z pliku JSON
+
+    Returns:
+        Słownik z liczbą utworzonych rekordów i błędów
+    """
+    manufacturers, features, values = set(), set(), set()
+    for item in items:
+        fields = product_source_fields(item)
+        if fields['manufacturer']:
+            manufacturers.add(fields['manufacturer'])
+        for key, value in fields['features']:
+            features.add(key)
+            values.add((key, value))
+
+    stats = {'manufacturers': 0, 'features': 0, 'feature_values': 0, 'errors': 0}
+
+    # Kategorie tworzy import_categories.py - tu tylko wypełniamy pamięć podręczną
+    for category in get_api_records('categories', {'display': '[id,name,id_parent]'}) or []:
+        categories_cache[(category.get('name', ''), category.get('id_parent', ''))] = category.id
+
+    existing = {m.get('name', ''): m.id for m in get_api_records('manufacturers', {'display': '[id,name]'}) or []}
+    found, missing_manufacturers = _match_existing(sorted(manufacturers), existing)
+    manufacturers_cache.update(found)
+
+    existing = {f.get('name', ''): f.id for f in get_api_records('product_features', {'display': '[id,name]'}) or []}
+    found, missing_features = _match_existing(sorted(features), existing)
+    features_cache.update(found)
+
+    print(f"  Producenci: {len(manufacturers)} (do utworzenia: {len(missing_manufacturers)}), "
+          f"cechy: {len(features)} (do utworzenia: {len(missing_features)})")
+
+    with ThreadPoolExecutor(max_workers=API_WORKERS) as executor:
+        stats['errors'] += _create_all(executor, create_manufacturer, [(name,) for name in missing_manufacturers])
+        stats['errors'] += _create_all(executor, create_feature, [(name,) for name in missing_features])
+        stats['manufacturers'] = len(missing_manufacturers)
+        stats['features'] = len(missing_features)
+
+        existing_values = {}
+        for value in get_api_records('product_feature_values', {'display': '[id,id_feature,value]'}) or []:
+            existing_values.setdefault(value.get('id_feature', ''), {})[value.get('value', '')] = value.id
+
+        missing_values = []
+        by_feature = {}
+        for key, value in sorted(values):
+            feature_id = features_cache.get(key)
+            if feature_id:
+                by_feature.setdefault(feature_id, []).append(value)
+        for feature_id, feature_values in by_feature.items():
+            found, missing = _match_existing(feature_values, existing_values.get(feature_id, {}))
+            for value, value_id in found.items():
+                feature_values_cache[(feature_id, value)] = value_id
+            missing_values.extend((feature_id, value) for value in missing)
+
+        print(f"  Wartości cech: {len(values)} (do utworzenia: {len(missing_values)})")
+        stats['errors'] += _create_all(executor, create_feature_value, missing_values)
+        stats['feature_values'] = len(missing_values)
+
+    return stats
+
+
+def fingerprint(fields):
+    """Zwraca skrót każdej grupy pól (do wykrywania zmian bez pobierania produktu)."""
+    return {
+        group: hashlib.sha1(json.dumps(value, ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+        for group, value in fields.items()
+    }
+
+
+def resolve_product_fields(fields):
+    """
+    Zamienia nazwy producenta, kategorii i cech na ID PrestaShop
+    (tworząc brakujących producentów i cechy).
+
+    Returns:
+        Słownik z id_manufacturer, id_category_default, category_ids i features
+    """
+    manufacturer_id = get_or_create_manufacturer(fields['manufacturer'])
+    default_category_id, category_ids = get_category_id_by_path(fields['categories'])
+
+    features = []
+    for key, value in fields['features']:
+        feature_id = get_or_create_feature(key)
+        if feature_id:
+            value_id = get_or_create_feature_value(feature_id, value)
+            if value_id:
+                features.append((str(feature_id), str(value_id)))
+
+    return {
+        'id_manufacturer': str(manufacturer_id),
+        'id_category_default': str(default_category_id),
+        'category_ids': [str(cid) for cid in category_ids],
+        'features': features,
+    }
+
+
+def build_product_xml(name, fields, resolved, reference=''):
+    """Buduje XML nowego produktu (reference - stały klucz produktu, id_produktu z pliku)."""
+    description = fields['description']
+    categories_xml = "".join(f"<category><id>{cid}</id></category>" for cid in resolved['category_ids'])
+    features_xml = "".join(
+        f"<product_feature><id>{feature_id}</id><id_feature_value>{value_id}</id_feature_value></product_feature>"
+        for feature_id, value_id in resolved['features']
+    )
+    manufacturer_xml = (f"<id_manufacturer>{resolved['id_manufacturer']}</id_manufacturer>"
+                        if resolved['id_manufacturer'] != '0' else "")
+
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
 <prestashop xmlns:xlink="http://www.w3.org/1999/xlink">
 <product>
     <name><language id="1"><![CDATA[{name}]]></language></name>
+    <reference><![CDATA[{reference}]]></reference>
     <link_rewrite><language id="1"><![CDATA[{slugify(name)}]]></language></link_rewrite>
     <description><language id="1"><![CDATA[{description}]]></language></description>
     <description_short><language id="1"><![CDATA[{description[:150]}]]></language></description_short>
     {manufacturer_xml}
-    <id_category_default>{default_category_id}</id_category_default>
-    <price>{price}</price>
-    <weight>{weight}</weight>
+    <id_category_default>{resolved['id_category_default']}</id_category_default>
+    <price>{fields['price']}</price>
+    <weight>{fields['weight']}</weight>
     <id_tax_rules_group>1</id_tax_rules_group>
     <active>1</active>
     <available_for_order>1</available_for_order>
@@ -265,16 +355,285 @@ def main():
     </associations>
 </product>
 </prestashop>"""
-        
-        print("  Tworzenie produktu...")
-        new_product_xml = post_api_xml('products', product_xml)
+
+
+def _text(element, path):
+    found = element.find(path)
+    return (found.text or '').strip() if found is not None else ''
+
+
+def changed_groups_live(product, fields, resolved):
+    """
+    Porównuje produkt z API z danymi z pliku.
+
+    Returns:
+        Lista grup pól, które się różnią
+    """
+    live_features = sorted(
+        (_text(feature, 'id'), _text(feature, 'id_feature_value'))
+        for feature in product.findall('associations/product_features/product_feature')
+    )
+    live_categories = {_text(category, 'id') for category in product.findall('associations/categories/category')}
+
+    def as_float(value):
+        try:
+            return round(float(value or 0), 3)
+        except ValueError:
+            return None
+
+    changed = []
+    if as_float(_text(product, 'price')) != as_float(fields['price']):
+        changed.append('price')
+    # Porównanie bez różnic w białych znakach (XML zamienia \r\n na \n)
+    if _text(product, 'description/language').split() != fields['description'].split():
+        changed.append('description')
+    if as_float(_text(product, 'weight')) != as_float(fields['weight']):
+        changed.append('weight')
+    if (_text(product, 'id_manufacturer') or '0') != resolved['id_manufacturer']:
+        changed.append('manufacturer')
+    if (_text(product, 'id_category_default') != resolved['id_category_default']
+            or live_categories != set(resolved['category_ids'])):
+        changed.append('categories')
+    if live_features != sorted(resolved['features']):
+        changed.append('features')
+    # Produkt wyłączony przez prune_products.py wrócił do katalogu
+    if _text(product, 'active') == '0':
+        changed.append('active')
+    return changed
+
+
+def _set_text(parent, tag, value, language=False):
+    element = parent.find(tag)
+    if element is None:
+        element = ET.SubElement(parent, tag)
+    if language:
+        lang = element.find('language')
+        if lang is None:
+            lang = ET.SubElement(element, 'language', id='1')
+        element = lang
+    element.text = value
+
+
+def _replace_association(product, name, item_tag, items):
+    associations = product.find('associations')
+    if associations is None:
+        associations = ET.SubElement(product, 'associations')
+    old = associations.find(name)
+    if old is not None:
+        associations.remove(old)
+    new = ET.SubElement(associations, name)
+    for values in items:
+        item = ET.SubElement(new, item_tag)
+        for tag, value in values:
+            ET.SubElement(item, tag).text = value
+
+
+def update_product(product_id, changed, fields, resolved):
+    """
+    Aktualizuje w produkcie tylko zmienione grupy pól.
+
+    Webservice PrestaShop 1.7 przyjmuje w PUT pełny zasób, więc produkt jest
+    pobierany, zmieniane są tylko elementy ze zmienionych grup, a pola tylko
+    do odczytu są usuwane przed wysłaniem.
+
+    Returns:
+        True jeśli sukces
+    """
+    xml = get_api_xml(f'products/{product_id}')
+    product = xml.find('product') if xml is not None else None
+    if product is None:
+        return False
+    before = import_journal.snapshot(xml)
+
+    if 'price' in changed:
+        _set_text(product, 'price', fields['price'])
+    if 'description' in changed:
+        _set_text(product, 'description', fields['description'], language=True)
+        _set_text(product, 'description_short', fields['description'][:150], language=True)
+    if 'weight' in changed:
+        _set_text(product, 'weight', fields['weight'])
+    if 'manufacturer' in changed:
+        _set_text(product, 'id_manufacturer', resolved['id_manufacturer'])
+    if 'categories' in changed:
+        _set_text(product, 'id_category_default', resolved['id_category_default'])
+        _replace_association(product, 'categories', 'category',
+                             [[('id', cid)] for cid in resolved['category_ids']])
+    if 'features' in changed:
+        _replace_association(product, 'product_features', 'product_feature',
+                             [[('id', fid), ('id_feature_value', vid)] for fid, vid in resolved['features']])
+    if 'active' in changed:
+        _set_text(product, 'active', '1')
+
+    for tag in READONLY_PRODUCT_FIELDS:
+        element = product.find(tag)
+        if element is not None:
+            product.remove(element)
+
+    return put_api_xml(f'products/{product_id}', ET.tostring(xml, encoding='utf-8'), before=before)
+
+
+def load_fingerprints():
+    if FINGERPRINTS_FILE.exists():
+        with open(FINGERPRINTS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_fingerprints(fingerprints):
+    tmp_path = FINGERPRINTS_FILE.with_name(FINGERPRINTS_FILE.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprints, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, FINGERPRINTS_FILE)
+
+
+def forget_fingerprints(product_ids):
+    """Usuwa zapisane skróty podanych produktów (import --upsert porówna je ze sklepem od nowa)."""
+    fingerprints = load_fingerprints()
+    kept = {name: stored for name, stored in fingerprints.items() if stored.get('id') not in product_ids}
+    if len(kept) != len(fingerprints):
+        save_fingerprints(kept)
+
+
+def get_existing_products():
+    """Zwraca mapę nazwa -> ID wszystkich produktów w sklepie (jedno zapytanie)."""
+    records = get_api_records('products', {'display': '[id,name]'})
+    if records is None:
+        return None
+    return {product.get('name', ''): product.id for product in records}
+
+
+def import_product(item, product_id, stored):
+    """
+    Tworzy produkt lub aktualizuje zmienione pola istniejącego.
+
+    Args:
+        item: Produkt z pliku JSON
+        product_id: ID istniejącego produktu lub None (nowy produkt)
+        stored: Zapisany skrót pól produktu lub None
+
+    Returns:
+        Krotka (status, ID produktu, skrót pól) - status to 'created',
+        'updated', 'unchanged' lub 'error'
+    """
+    name = item.get('nazwa')
+    fields = product_source_fields(item)
+    prints = fingerprint(fields)
+
+    if product_id is None:
+        resolved = resolve_product_fields(fields)
+        new_product_xml = post_api_xml('products', build_product_xml(name, fields, resolved,
+                                                                     item.get('id_produktu', '')))
         if new_product_xml is None:
             print(f"BŁĄD: Nie udało się utworzyć produktu {name}", file=sys.stderr)
+            return 'error', None, prints
+        return 'created', _text(new_product_xml, './/product/id'), prints
+
+    if stored and stored.get('id') == product_id:
+        changed = [group for group in prints if stored['fields'].get(group) != prints[group]]
+        resolved = resolve_product_fields(fields) if set(changed) & RESOLVED_GROUPS else None
+    else:
+        # Brak zapisanego skrótu - porównanie z produktem w sklepie
+        xml = get_api_xml(f'products/{product_id}')
+        product = xml.find('product') if xml is not None else None
+        if product is None:
+            return 'error', product_id, prints
+        resolved = resolve_product_fields(fields)
+        changed = changed_groups_live(product, fields, resolved)
+
+    if not changed:
+        return 'unchanged', product_id, prints
+
+    print(f"  {name}: zmienione pola: {', '.join(changed)}")
+    if not update_product(product_id, changed, fields, resolved):
+        print(f"BŁĄD: Nie udało się zaktualizować produktu {name}", file=sys.stderr)
+        return 'error', product_id, prints
+    return 'updated', product_id, prints
+
+
+def main(upsert=False):
+    """
+    Importuje produkty z pliku JSON.
+
+    Najpierw wstępny przebieg (prefetch_references) tworzy wszystkich
+    brakujących producentów i cechy, a potem produkty są wysyłane
+    równolegle (API_WORKERS wątków).
+
+    Args:
+        upsert: Czy aktualizować istniejące produkty. Bez tej opcji istniejące
+                produkty są pomijane. Z nią wysyłane są tylko zmienione grupy
+                pól, a produkty, których skrót pól zgadza się z zapisanym
+                (import_fingerprints.json), są pomijane bez zapytań do API.
+    """
+    print("Rozpoczynanie importu produktów...")
+    import_journal.enable('import_products')
+    try:
+        with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        print(f"BŁĄD: Nie znaleziono pliku {INPUT_FILE}", file=sys.stderr)
+        return 1
+
+    fingerprints = load_fingerprints()
+    stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'errors': 0}
+
+    candidates = []
+    for item in data:
+        if not item.get('szczegoly_produktu'):
             continue
-            
+        stored = fingerprints.get(item.get('nazwa'))
+        if upsert and stored and stored['fields'] == fingerprint(product_source_fields(item)):
+            stats['unchanged'] += 1
+            continue
+        candidates.append(item)
+
+    existing = get_existing_products() if candidates else {}
+    if existing is None:
+        print("BŁĄD: Nie udało się pobrać listy produktów", file=sys.stderr)
+        return 1
+    found, _ = _match_existing([item['nazwa'] for item in candidates], existing)
+
+    jobs = []
+    for item in candidates:
+        product_id = found.get(item['nazwa'])
+        if product_id and not upsert:
+            stats['skipped'] += 1
+            continue
+        jobs.append((item, product_id, fingerprints.get(item['nazwa'])))
+
+    if stats['skipped']:
+        print(f"  Produkty już istnieją - pominięto: {stats['skipped']}")
+    print(f"  Produktów do przetworzenia: {len(jobs)}")
+    if jobs:
+        print("\n--- Wstępny przebieg: producenci i cechy ---")
+        references = prefetch_references([item for item, _, _ in jobs])
+        stats['errors'] += references['errors']
+
+        print("\n--- Tworzenie i aktualizacja produktów ---")
+        with ThreadPoolExecutor(max_workers=API_WORKERS) as executor:
+            results = executor.map(lambda job: import_product(*job), jobs)
+            for i, ((item, _, _), (status, product_id, prints)) in enumerate(zip(jobs, results), 1):
+                stats[status if status != 'error' else 'errors'] += 1
+                if product_id and status != 'error':
+                    fingerprints[item['nazwa']] = {'id': product_id, 'fields': prints}
+                if i % 100 == 0:
+                    print(f"  [{i}/{len(jobs)}] przetworzono")
+                    save_fingerprints(fingerprints)
+
+    save_fingerprints(fingerprints)
 
     print("\n--- Zakończono import produktów ---")
+    print(f"Utworzono: {stats['created']}, zaktualizowano: {stats['updated']}, "
+          f"bez zmian: {stats['unchanged']}, pominięto: {stats['skipped']}, błędów: {stats['errors']}")
+    api_resilience.print_failure_summary()
     print("Uruchom teraz skrypt update_stocks_images.py aby ustawić stany magazynowe i zdjęcia")
+    return 0
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Import produktów do PrestaShop')
+    parser.add_argument('--upsert', action='store_true',
+                        help='Aktualizuj zmienione pola istniejących produktów zamiast je pomijać')
+    args = parser.parse_args()
+    sys.exit(main(upsert=args.upsert))
@@ -10,9 +10,11 @@ Automatycznie wykonuje:
 4. Podsumowanie statystyk
 """
 
+import os
 import sys
 import subprocess
 import time
+from datetime import datetime
 from pathlib import Path
 
 class ImportManager:
@@ -43,12 +45,13 @@ class ImportManager:
 Dostępne opcje:
 
   [1] Pełny import
+  [2] Synchronizacja (bez czyszczenia bazy)
   [0] Wyjście
 
 """)
     
-    def run_script(self, script_name, description):
-        """Uruchamia skrypt pythonowy."""
+    def run_script(self, script_name, description, args=None):
+        """Uruchamia skrypt pythonowy (args - dodatkowe argumenty wiersza poleceń)."""
         print(f"\n{'─'*70}")
         print(f"► {description}")
         print(f"{'─'*70}\n")
@@ -64,7 +67,7 @@ Dostępne opcje:
         try:
             # Uruchom skrypt w tym samym interpreterze Python
             result = subprocess.run(
-                [sys.executable, str(script_path)],
+                [sys.executable, str(script_path)] + (args or []),
                 capture_output=False,
                 text=True
             )
@@ -120,7 +123,8 @@ Dostępne opcje:
     def update_stocks_images(self):
         """Aktualizuje stany magazynowe i zdjęcia."""
         self.print_header("AKTUALIZACJA STOCKÓW I ZDJĘĆ")
-        success = self.run_script('update_stocks_images.py', 'Aktualizacja stocków i zdjęć')
+        # Okładki wszystkich produktów przed galeriami - sklep szybciej wygląda na kompletny
+        success = self.run_script('update_stocks_images.py', 'Aktualizacja stocków i zdjęć', ['--covers-first'])
         if success:
             self.stats['stocks_updated'] = True
             self.stats['images_uploaded'] = True
@@ -138,6 +142,9 @@ Dostępne opcje:
         print()
         
         self.stats['start_time'] = time.time()
+        # Wspólne ID przebiegu - wszystkie skrypty zapisują zmiany do jednego dziennika
+        self.stats['run_id'] = datetime.now().strftime('%Y%m%d-%H%M%S')
+        os.environ['IMPORT_RUN_ID'] = self.stats['run_id']
         
         self.clean_database()
         self.import_categories()
@@ -151,6 +158,36 @@ Dostępne opcje:
         print("\n\n")
         self.show_summary()
     
+    def sync(self):
+        """
+        Synchronizuje sklep z plikami danych bez czyszczenia bazy.
+
+        Zmienione produkty są aktualizowane (import --upsert), a produkty,
+        których nie ma już w katalogu, wyłączane (prune_products.py), więc
+        sklep działa przez cały czas synchronizacji.
+        """
+        self.print_header("SYNCHRONIZACJA DANYCH")
+        
+        self.stats['start_time'] = time.time()
+        self.stats['run_id'] = datetime.now().strftime('%Y%m%d-%H%M%S')
+        os.environ['IMPORT_RUN_ID'] = self.stats['run_id']
+        
+        self.import_categories()
+        print("\n\n")
+        self.print_header("IMPORT PRODUKTÓW (AKTUALIZACJA)")
+        if self.run_script('import_products.py', 'Aktualizacja produktów', ['--upsert']):
+            self.stats['products_imported'] = True
+        print("\n\n")
+        self.print_header("WYŁĄCZANIE USUNIĘTYCH PRODUKTÓW")
+        self.run_script('prune_products.py', 'Wyłączanie produktów spoza katalogu')
+        print("\n\n")
+        self.update_stocks_images()
+        
+        self.stats['end_time'] = time.time()
+        
+        print("\n\n")
+        self.show_summary()
+    
     def show_summary(self):
         """Wyświetla podsumowanie importu."""
         self.print_header("PODSUMOWANIE IMPORTU")
@@ -161,6 +198,10 @@ Dostępne opcje:
             seconds = int(duration % 60)
             print(f"Czas trwania: {minutes}m {seconds}s\n")
         
+        if self.stats.get('run_id'):
+            print(f"ID przebiegu: {self.stats['run_id']}")
+            print(f"  (cofnięcie: python rollback_import.py --run {self.stats['run_id']})\n")
+        
         print("Status wykonanych operacji:\n")
         
         statuses = [
@@ -194,7 +235,7 @@ Dostępne opcje:
             self.print_menu()
             
             try:
-                choice = input("Wybierz opcję [0-1]: ").strip()
+                choice = input("Wybierz opcję [0-2]: ").strip()
                 
                 if choice == '0':
                     print("\nDo widzenia!\n")
@@ -204,6 +245,10 @@ Dostępne opcje:
                     self.full_import()
                     self.wait_for_user()
                     
+                elif choice == '2':
+                    self.sync()
+                    self.wait_for_user()
+                    
                 else:
                     print("\nNieprawidłowa opcja. Wybierz liczbę od 0 do 6.")
                     time.sleep(2)
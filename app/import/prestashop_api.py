@@ -6,9 +6,16 @@ import requests
 import xml.etree.ElementTree as ET
 import sys
 import os
+import mimetypes
+import threading
+import uuid
+import time
+from collections import OrderedDict
 from pathlib import Path
 from dotenv import load_dotenv
 
+import api_resilience
+
 env_path = Path(__file__).parent / '.env'
 load_dotenv(env_path)
 
@@ -18,13 +25,219 @@ API_KEY = os.getenv('API_KEY')
 if not API_KEY:
     raise ValueError("Brak API_KEY w pliku .env!")
 
+# Liczba równoległych zapytań skryptów importu (i rozmiar puli połączeń)
+API_WORKERS = int(os.getenv('API_WORKERS', '8'))
+# Format odczytów przez get_api_records(): JSON (mniejszy i szybciej parsowany) lub XML
+API_OUTPUT_FORMAT = os.getenv('API_OUTPUT_FORMAT', 'JSON').upper()
+# Język, którego tekst zwracają pola wielojęzyczne rekordów
+ID_LANG = '1'
+# Limit czasu pojedynczego zapytania w sekundach
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', '60'))
+# Pamięć podręczna odpowiedzi GET: liczba wpisów (0 wyłącza) i czas ważności w sekundach
+API_CACHE_SIZE = int(os.getenv('API_CACHE_SIZE', '256'))
+API_CACHE_TTL = float(os.getenv('API_CACHE_TTL', '60'))
+# Liczba produktów na stronę przy pobieraniu listy zdjęć całego sklepu
+IMAGE_INVENTORY_PAGE_SIZE = int(os.getenv('IMAGE_INVENTORY_PAGE_SIZE', '500'))
+
 session = requests.Session()
 session.auth = (API_KEY, '')
 session.verify = False
+# Listy zasobów są duże i dobrze się kompresują (serwer musi mieć włączony gzip/deflate)
+session.headers['Accept-Encoding'] = 'gzip, deflate'
+_adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=API_WORKERS)
+session.mount('https://', _adapter)
+session.mount('http://', _adapter)
 
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Funkcje wywoływane po każdej udanej zmianie danych w API (np. dziennik importu):
+# callback(action, resource, resource_id, before=None, record=None)
+_change_hooks = []
+
+
+def register_change_hook(callback):
+    """Rejestruje funkcję wywoływaną po każdym udanym POST/PUT/DELETE."""
+    _change_hooks.append(callback)
+
+
+def _notify_change(action, resource, resource_id, before=None, record=None):
+    for callback in _change_hooks:
+        callback(action, resource, resource_id, before=before, record=record)
+
+
+# (endpoint, parametry) -> (czas wygaśnięcia, zasób, odpowiedź); kolejność = LRU
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+# Zasób -> numer wersji zwiększany przy każdym zapisie (odpowiedź pobrana przed
+# zapisem nie trafi do pamięci podręcznej po unieważnieniu)
+_cache_versions = {}
+_cache_stats = {'hits': 0, 'misses': 0}
+
+# Zapis zasobu zmienia też odczyty zasobów zależnych
+# (np. nowy produkt dostaje stock_available, usunięta kategoria znika z produktów)
+CACHE_DEPENDENCIES = {
+    'products': ['stock_availables', 'images'],
+    'categories': ['products'],
+    'manufacturers': ['products'],
+    'product_features': ['product_feature_values', 'products'],
+    'product_feature_values': ['products'],
+    'images': ['products'],
+}
+
+
+def _cache_resource(endpoint):
+    """'products/12' -> 'products', 'images/products/12' -> 'images'."""
+    return endpoint.strip('/').split('/')[0]
+
+
+def invalidate_cache(endpoint):
+    """Usuwa z pamięci podręcznej odpowiedzi zasobu i zasobów od niego zależnych."""
+    resource = _cache_resource(endpoint)
+    affected = {resource, *CACHE_DEPENDENCIES.get(resource, [])}
+    with _cache_lock:
+        for name in affected:
+            _cache_versions[name] = _cache_versions.get(name, 0) + 1
+        for key in [key for key, entry in _cache.items() if entry[1] in affected]:
+            del _cache[key]
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def cache_stats():
+    """Zwraca liczbę trafień i chybień pamięci podręcznej."""
+    with _cache_lock:
+        return dict(_cache_stats, entries=len(_cache))
+
+
+def _send(method, endpoint, report=None, **kwargs):
+    """
+    Wysyła zapytanie przez warstwę odporności (api_resilience.py).
+
+    Błędy przejściowe są ponawiane z wykładniczym opóźnieniem, a przy
+    otwartym bezpieczniku zapytanie czeka. Zapytanie, które nie udało się
+    mimo ponowień, trafia do raportu niepowodzeń.
+
+    Args:
+        method: Metoda HTTP
+        endpoint: Endpoint API
+        report: Dodatkowe dane do raportu niepowodzeń (np. ścieżka zdjęcia)
+        **kwargs: Argumenty session.request (params, data, files)
+
+    Returns:
+        Obiekt requests.Response (także z kodem błędu, który nie jest przejściowy)
+
+    Raises:
+        requests.exceptions.RequestException: Gdy nie udało się połączyć
+    """
+    url = f"{PRESTASHOP_URL}/{endpoint}"
+    kwargs.setdefault('timeout', API_TIMEOUT)
+    files = kwargs.get('files')
+    attempt = 0
+
+    while True:
+        api_resilience.breaker.wait()
+        # Plik trzeba przeczytać od początku przy każdej próbie
+        if files:
+            for _, file_info in files.items():
+                file_info[1].seek(0)
+        if hasattr(kwargs.get('data'), 'seek'):
+            kwargs['data'].seek(0)
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if attempt < api_resilience.API_RETRIES and api_resilience.should_retry(method, None, _request_sent(e)):
+                api_resilience.breaker.failure()
+                time.sleep(api_resilience.backoff_delay(attempt))
+                attempt += 1
+                continue
+            api_resilience.record_failure(method, endpoint, kwargs.get('params'), kwargs.get('data'),
+                                          error=repr(e), extra=report)
+            raise
+
+        status = response.status_code
+        # PHP Notice #8 obsługuje post_api_xml - zasób został utworzony
+        php_notice = api_resilience.is_php_notice(status, response.content)
+        transient = api_resilience.is_transient(status, response.content)
+        if transient:
+            api_resilience.breaker.failure()
+        else:
+            api_resilience.breaker.success()
+        if (transient and attempt < api_resilience.API_RETRIES
+                and api_resilience.should_retry(method, status, body=response.content)):
+            time.sleep(api_resilience.backoff_delay(attempt, response.headers.get('Retry-After')))
+            attempt += 1
+            continue
+
+        if status >= 400 and not php_notice and (
+                transient or (method != 'GET' and not (method == 'DELETE' and status == 404))):
+            api_resilience.record_failure(method, endpoint, kwargs.get('params'), kwargs.get('data'),
+                                          status=status, extra=report)
+        return response
+
+
+def _request_sent(error):
+    """
+    Czy zapytanie mogło dotrzeć do sklepu mimo błędu połączenia.
+
+    Nie dotarło tylko, gdy nie udało się nawiązać połączenia (odmowa,
+    błąd DNS, przekroczony czas łączenia).
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return not isinstance(reason, urllib3.exceptions.NewConnectionError)
+    return True
+
+
+def _write(method, endpoint, report=None, **kwargs):
+    """POST/PUT/DELETE unieważniający pamięć podręczną zasobu po zakończeniu zapisu."""
+    try:
+        return _send(method, endpoint, report, **kwargs)
+    finally:
+        invalidate_cache(endpoint)
+
+
+def _cached_get(endpoint, params=None):
+    """
+    GET z pamięcią podręczną (LRU, API_CACHE_SIZE wpisów, ważność API_CACHE_TTL s).
+
+    Zapamiętywane są tylko odpowiedzi 200. Odpowiedź jest przechowywana
+    jako obiekt Response, a każdy odczyt parsuje ją od nowa, więc
+    wywołujący mogą modyfikować zwrócony XML.
+
+    Returns:
+        Obiekt requests.Response
+    """
+    if not API_CACHE_SIZE:
+        return _send('GET', endpoint, params=params)
+
+    resource = _cache_resource(endpoint)
+    key = (endpoint, tuple(sorted((params or {}).items())))
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            _cache.move_to_end(key)
+            _cache_stats['hits'] += 1
+            return entry[2]
+        _cache_stats['misses'] += 1
+        version = _cache_versions.get(resource, 0)
+
+    response = _send('GET', endpoint, params=params)
+
+    if response.status_code == 200:
+        with _cache_lock:
+            if _cache_versions.get(resource, 0) == version:
+                _cache[key] = (time.monotonic() + API_CACHE_TTL, resource, response)
+                _cache.move_to_end(key)
+                while len(_cache) > API_CACHE_SIZE:
+                    _cache.popitem(last=False)
+    return response
+
 
 def get_api_xml(endpoint, options=None):
     """
@@ -39,7 +252,7 @@ def get_api_xml(endpoint, options=None):
     """
     try:
         url = f"{PRESTASHOP_URL}/{endpoint}"
-        response = session.get(url, params=options)
+        response = _cached_get(endpoint, options)
         response.raise_for_status()
         return ET.fromstring(response.content)
     except requests.exceptions.RequestException as e:
@@ -47,6 +260,122 @@ def get_api_xml(endpoint, options=None):
         return None
 
 
+class Record(dict):
+    """
+    Rekord zasobu API niezależny od formatu odpowiedzi (XML lub JSON).
+
+    Pola są tekstami (pola wielojęzyczne - tekst języka ID_LANG, puste
+    pola - ''), a powiązania listami rekordów dostępnymi przez
+    associations(), np. record.associations('categories').
+    """
+
+    @property
+    def id(self):
+        return self.get('id', '')
+
+    def associations(self, name):
+        return self.get('associations', {}).get(name, [])
+
+
+def _language_text(languages):
+    texts = {str(lang.get('id')): lang.get('value') or '' for lang in languages}
+    return (texts.get(ID_LANG, next(iter(texts.values()), ''))).strip()
+
+
+def _record_from_json(data):
+    record = Record()
+    for field, value in data.items():
+        if field == 'associations':
+            record[field] = {name: [_record_from_json(item) for item in items or []]
+                             for name, items in value.items()}
+        elif isinstance(value, list):
+            record[field] = _language_text(value)
+        else:
+            record[field] = '' if value is None else str(value).strip()
+    return record
+
+
+def _record_from_xml(element):
+    record = Record()
+    if element.get('id'):
+        # Lista bez display - same ID w atrybutach
+        record['id'] = element.get('id')
+    for child in element:
+        if child.tag == 'associations':
+            record[child.tag] = {group.tag: [_record_from_xml(item) for item in group]
+                                 for group in child}
+        elif child.find('language') is not None:
+            record[child.tag] = _language_text(
+                {'id': lang.get('id'), 'value': lang.text} for lang in child.findall('language'))
+        else:
+            record[child.tag] = (child.text or '').strip()
+    return record
+
+
+def _get_parsed(endpoint, options):
+    """GET w formacie API_OUTPUT_FORMAT; zwraca (format, sparsowana odpowiedź) lub None."""
+    params = dict(options or {})
+    if API_OUTPUT_FORMAT == 'JSON':
+        params['output_format'] = 'JSON'
+    try:
+        url = f"{PRESTASHOP_URL}/{endpoint}"
+        response = _cached_get(endpoint, params)
+        response.raise_for_status()
+        if API_OUTPUT_FORMAT == 'JSON':
+            return 'JSON', response.json()
+        return 'XML', ET.fromstring(response.content)
+    except (requests.exceptions.RequestException, ValueError, ET.ParseError) as e:
+        print(f"Błąd GET {url}: {e}", file=sys.stderr)
+        return None
+
+
+def get_api_records(endpoint, options=None):
+    """
+    Pobiera listę zasobów jako rekordy (niezależnie od formatu odpowiedzi).
+
+    Args:
+        endpoint: Zasób API (np. 'products', 'categories')
+        options: Opcjonalne parametry zapytania (filter[...], display, limit, sort)
+
+    Returns:
+        Lista obiektów Record lub None w przypadku błędu
+    """
+    parsed = _get_parsed(endpoint, options)
+    if parsed is None:
+        return None
+    output_format, data = parsed
+    if output_format == 'JSON':
+        # Pusta lista w JSON to [] zamiast {"products": []}
+        items = data.get(endpoint, []) if isinstance(data, dict) else []
+        return [_record_from_json(item) for item in items]
+    listing = data.find(endpoint)
+    return [_record_from_xml(element) for element in listing] if listing is not None else []
+
+
+def get_api_record(endpoint):
+    """
+    Pobiera pojedynczy zasób jako rekord (np. 'products/12').
+
+    Returns:
+        Obiekt Record lub None w przypadku błędu
+    """
+    parsed = _get_parsed(endpoint, None)
+    if parsed is None:
+        return None
+    output_format, data = parsed
+    if output_format == 'JSON':
+        return _record_from_json(next(iter(data.values()))) if isinstance(data, dict) and data else None
+    return _record_from_xml(data[0]) if len(data) else None
+
+
+def _created(resource, xml):
+    """Powiadamia o utworzeniu zasobu i zwraca XML odpowiedzi."""
+    record = xml[0] if len(xml) else None
+    if record is not None and record.findtext('id'):
+        _notify_change('create', resource, record.findtext('id'), record=record)
+    return xml
+
+
 def post_api_xml(endpoint, xml_data):
     """
     Wysyła dane XML do API PrestaShop (POST).
@@ -60,38 +389,41 @@ def post_api_xml(endpoint, xml_data):
     """
     try:
         url = f"{PRESTASHOP_URL}/{endpoint}"
-        headers = {'Content-Type': 'application/xml'}
-        response = session.post(url, data=xml_data.encode('utf-8'))
+        response = _write('POST', endpoint, data=xml_data.encode('utf-8'))
         response.raise_for_status()
-        return ET.fromstring(response.content)
+        return _created(endpoint, ET.fromstring(response.content))
     except requests.exceptions.RequestException as e:
         if e.response is not None:
             response_text = e.response.content.decode()
             if 'PHP Notice #8' in response_text and 'Trying to access array offset on value of type bool' in response_text:
                 print(f"  Ignorowanie błędu PHP Notice #8", file=sys.stderr)
                 try:
-                    return ET.fromstring(e.response.content)
+                    return _created(endpoint, ET.fromstring(e.response.content))
                 except:
                     return None
         print(f"Błąd POST {url}: {e}\nOdpowiedź: {e.response.content.decode() if e.response else 'Brak odpowiedzi'}", file=sys.stderr)
         return None
 
 
-def put_api_xml(endpoint, xml_data):
+def put_api_xml(endpoint, xml_data, before=None):
     """
     Aktualizuje dane w API PrestaShop (PUT).
     
     Args:
         endpoint: Endpoint API
         xml_data: Dane XML (string lub bytes)
+        before: Poprzednia wersja zasobu (XML) - zapisywana w dzienniku importu,
+                aby można było cofnąć zmianę
         
     Returns:
         True jeśli sukces, False w przypadku błędu
     """
     try:
         url = f"{PRESTASHOP_URL}/{endpoint}"
-        response = session.put(url, data=xml_data)
+        response = _write('PUT', endpoint, data=xml_data)
         response.raise_for_status()
+        resource, _, resource_id = endpoint.rpartition('/')
+        _notify_change('update', resource, resource_id, before=before)
         return True
     except requests.exceptions.RequestException as e:
         print(f"Błąd PUT {url}: {e}", file=sys.stderr)
@@ -110,9 +442,11 @@ def delete_api_resource(endpoint, resource_id):
         True jeśli sukces, False w przypadku błędu
     """
     try:
-        url = f"{PRESTASHOP_URL}/{endpoint}/{resource_id}"
-        response = session.delete(url)
-        return response.status_code in [200, 204]
+        response = _write('DELETE', f'{endpoint}/{resource_id}')
+        if response.status_code in [200, 204]:
+            _notify_change('delete', endpoint, resource_id)
+            return True
+        return False
     except requests.exceptions.RequestException:
         return False
 
@@ -127,18 +461,7 @@ def has_product_images(product_id):
     Returns:
         True jeśli produkt ma zdjęcia, False w przeciwnym razie
     """
-    try:
-        url = f"{PRESTASHOP_URL}/images/products/{product_id}"
-        response = session.get(url)
-
-        if response.status_code == 200:
-            # Parsuj XML aby sprawdzić czy są jakieś zdjęcia
-            xml = ET.fromstring(response.content)
-            images = xml.findall('.//image')
-            return len(images) > 0
-        return False
-    except Exception:
-        return False
+    return len(get_product_image_ids(product_id)) > 0
 
 
 def get_product_images_count(product_id):
@@ -151,17 +474,7 @@ def get_product_images_count(product_id):
     Returns:
         Liczba zdjęć (int), 0 jeśli brak lub błąd
     """
-    try:
-        url = f"{PRESTASHOP_URL}/images/products/{product_id}"
-        response = session.get(url)
-
-        if response.status_code == 200:
-            xml = ET.fromstring(response.content)
-            images = xml.findall('.//image')
-            return len(images)
-        return 0
-    except Exception:
-        return 0
+    return len(get_product_image_ids(product_id))
 
 
 def get_product_image_ids(product_id):
@@ -175,8 +488,7 @@ def get_product_image_ids(product_id):
         Lista ID zdjęć (list of str), pusta lista jeśli brak lub błąd
     """
     try:
-        url = f"{PRESTASHOP_URL}/images/products/{product_id}"
-        response = session.get(url)
+        response = _cached_get(f'images/products/{product_id}')
 
         if response.status_code == 200:
             xml = ET.fromstring(response.content)
@@ -211,22 +523,148 @@ def delete_image(product_id, image_id):
         True jeśli sukces, False w przypadku błędu
     """
     try:
-        url = f"{PRESTASHOP_URL}/images/products/{product_id}/{image_id}"
-        response = session.delete(url)
-        return response.status_code in [200, 204]
+        response = _write('DELETE', f'images/products/{product_id}/{image_id}')
+        if response.status_code in [200, 204]:
+            _notify_change('delete', f'images/products/{product_id}', image_id)
+            return True
+        return False
     except requests.exceptions.RequestException as e:
         print(f"  Błąd usuwania obrazu: {e}", file=sys.stderr)
         return False
 
 
-def post_image(product_id, image_path):
+def get_all_product_image_ids(page_size=IMAGE_INVENTORY_PAGE_SIZE):
+    """
+    Pobiera listę ID zdjęć wszystkich produktów sklepu.
+
+    Zamiast osobnego zapytania images/products/{id} dla każdego produktu
+    czyta powiązania images z listy products (display=full), stronami po
+    page_size produktów - kilka zapytań na cały sklep.
+
+    Args:
+        page_size: Liczba produktów na stronę
+
+    Returns:
+        Słownik {ID produktu (str): lista ID zdjęć (str)} - także dla
+        produktów bez zdjęć - lub None w przypadku błędu
+    """
+    inventory = {}
+    offset = 0
+    while True:
+        products = get_api_records('products', {'display': 'full', 'sort': '[id_ASC]',
+                                                'limit': f'{offset},{page_size}'})
+        if products is None:
+            return None
+        for product in products:
+            inventory[product.id] = [image.id for image in product.associations('images') if image.id]
+        if len(products) < page_size:
+            return inventory
+        offset += page_size
+
+
+def image_content_type(image_path):
+    """Zwraca typ MIME zdjęcia na podstawie rozszerzenia pliku."""
+    return mimetypes.guess_type(str(image_path))[0] or 'application/octet-stream'
+
+
+class MultipartFileStream:
+    """
+    Treść zapytania multipart/form-data z jednym plikiem, czytana fragmentami.
+
+    requests wysyła obiekt z metodą read() kawałkami (Content-Length
+    z __len__), więc plik nie jest w całości ładowany do pamięci - zużycie
+    pamięci nie zależy od rozmiaru zdjęcia ani liczby równoległych wysyłek.
+    seek(0) pozwala wysłać treść ponownie (ponowienia w _send).
+    """
+
+    def __init__(self, field, file_path, content_type=None, progress=None):
+        """
+        Args:
+            field: Nazwa pola formularza (np. 'image')
+            file_path: Ścieżka do pliku
+            content_type: Typ MIME pliku (domyślnie z rozszerzenia)
+            progress: Opcjonalna funkcja progress(wysłane_bajty, wszystkie_bajty)
+        """
+        self.file_path = file_path
+        self.progress = progress
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        filename = os.path.basename(file_path).replace('"', '')
+        self._head = (f'--{self.boundary}\r\n'
+                      f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                      f'Content-Type: {content_type or image_content_type(file_path)}\r\n\r\n').encode('utf-8')
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        self._file_size = os.path.getsize(file_path)
+        self._file = None
+        self._position = 0
+
+    def __len__(self):
+        return len(self._head) + self._file_size + len(self._tail)
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            offset += len(self)
+        self._position = max(0, min(offset, len(self)))
+        if self._file is not None:
+            self._file.seek(min(max(0, self._position - len(self._head)), self._file_size))
+        return self._position
+
+    def read(self, size=-1):
+        remaining = len(self) - self._position
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        chunks = []
+        while size > 0:
+            file_start = len(self._head)
+            file_end = file_start + self._file_size
+            if self._position < file_start:
+                chunk = self._head[self._position:self._position + size]
+            elif self._position < file_end:
+                if self._file is None:
+                    self._file = open(self.file_path, 'rb')
+                    self._file.seek(self._position - file_start)
+                chunk = self._file.read(min(size, file_end - self._position))
+                if not chunk:
+                    raise IOError(f"Plik zmienił rozmiar podczas wysyłania: {self.file_path}")
+            else:
+                start = self._position - file_end
+                chunk = self._tail[start:start + size]
+            chunks.append(chunk)
+            self._position += len(chunk)
+            size -= len(chunk)
+        if chunks and self.progress:
+            self.progress(self._position, len(self))
+        return b''.join(chunks)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def post_image(product_id, image_path, progress=None):
     """
     Wgrywa zdjęcie produktu do PrestaShop.
-    
+
+    Plik jest wysyłany strumieniowo (MultipartFileStream), z typem MIME
+    i nazwą pliku na podstawie rzeczywistego rozszerzenia.
+
     Args:
         product_id: ID produktu
         image_path: Ścieżka do pliku zdjęcia
-        
+        progress: Opcjonalna funkcja progress(wysłane_bajty, wszystkie_bajty)
+
     Returns:
         True jeśli sukces, False w przypadku błędu
     """
@@ -240,16 +678,21 @@ def post_image(product_id, image_path):
             print(f"  Błąd: Plik jest pusty: {image_path}", file=sys.stderr)
             return False
 
-        url = f"{PRESTASHOP_URL}/images/products/{product_id}"
-
-        with open(image_path, 'rb') as img_file:
-            files = {'image': ('product.jpg', img_file, 'image/jpeg')}
-            response = session.post(url, files=files)
+        with MultipartFileStream('image', image_path, progress=progress) as body:
+            response = _write('POST', f'images/products/{product_id}', data=body,
+                              headers={'Content-Type': body.content_type},
+                              report={'image_path': str(image_path)})
 
             if response.status_code != 200:
                 print(f"  Błąd HTTP {response.status_code}: {response.text[:500]}", file=sys.stderr)
 
             response.raise_for_status()
+        try:
+            image_id = ET.fromstring(response.content).findtext('.//image/id')
+        except ET.ParseError:
+            image_id = None
+        if image_id:
+            _notify_change('create', f'images/products/{product_id}', image_id)
         return True
     except requests.exceptions.RequestException as e:
         print(f"  Błąd wgrywania obrazu: {e}", file=sys.stderr)
@@ -0,0 +1,323 @@
+"""
+Asynchroniczny klient webservice PrestaShop (asyncio + aiohttp).
+
+Udostępnia te same operacje co prestashop_api.py (GET/POST/PUT/DELETE XML,
+lista ID zdjęć, wgrywanie i usuwanie zdjęć) na wspólnej puli połączeń
+aiohttp. Liczbę zapytań w locie ogranicza semafor (API_ASYNC_CONCURRENCY),
+więc można zaplanować tysiące zadań z jednego procesu.
+
+Konfiguracja (PRESTASHOP_URL, API_KEY), hooki zmian (dziennik importu),
+unieważnianie pamięci podręcznej GET oraz ponowienia, bezpiecznik i raport
+niepowodzeń (api_resilience.py) są wspólne z prestashop_api.py.
+
+Wymaga pakietu aiohttp (pip install aiohttp).
+
+Przykład:
+    async with AsyncPrestaShopClient() as client:
+        results = await client.map(lambda pid: client.delete('products', pid), product_ids)
+"""
+
+import asyncio
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import aiohttp
+
+import api_resilience
+from prestashop_api import (API_KEY, PRESTASHOP_URL, _created, _notify_change,
+                            image_content_type, invalidate_cache)
+
+# Maksymalna liczba zapytań w locie
+API_ASYNC_CONCURRENCY = int(os.getenv('API_ASYNC_CONCURRENCY', '64'))
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', '60'))
+
+
+class AsyncPrestaShopClient:
+    """
+    Klient webservice PrestaShop dla asyncio.
+
+    Używany jako asynchroniczny menedżer kontekstu - sesja i pula połączeń
+    są tworzone przy wejściu i zamykane przy wyjściu.
+    """
+
+    def __init__(self, concurrency=API_ASYNC_CONCURRENCY, base_url=PRESTASHOP_URL,
+                 api_key=API_KEY, timeout=API_TIMEOUT):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        # Semafor tworzony w działającej pętli (Python < 3.10 wiąże go z pętlą)
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.session = aiohttp.ClientSession(
+            auth=aiohttp.BasicAuth(self.api_key, ''),
+            connector=aiohttp.TCPConnector(limit=self.concurrency, ssl=False),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={'Accept-Encoding': 'gzip, deflate'},
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def _request(self, method, endpoint, report=None, **kwargs):
+        """
+        Wysyła zapytanie (najwyżej `concurrency` jednocześnie).
+
+        Błędy przejściowe są ponawiane jak w prestashop_api._send()
+        (api_resilience.py); czekanie nie zajmuje miejsca w semaforze.
+
+        Returns:
+            Krotka (kod HTTP, treść odpowiedzi)
+        """
+        attempt = 0
+        while True:
+            delay = api_resilience.breaker.wait_time()
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = api_resilience.breaker.wait_time()
+            try:
+                # Formularz aiohttp można wysłać tylko raz - przy ponowieniu tworzony jest nowy
+                request_kwargs = dict(kwargs, data=kwargs['data']()) if callable(kwargs.get('data')) else kwargs
+                async with self.semaphore:
+                    async with self.session.request(method, f"{self.base_url}/{endpoint}",
+                                                    **request_kwargs) as response:
+                        status, body, retry_after = (response.status, await response.read(),
+                                                     response.headers.get('Retry-After'))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Bez nawiązanego połączenia zapytanie na pewno nie dotarło do sklepu
+                sent = not isinstance(e, aiohttp.ClientConnectorError)
+                if attempt < api_resilience.API_RETRIES and api_resilience.should_retry(method, None, sent):
+                    api_resilience.breaker.failure()
+                    await asyncio.sleep(api_resilience.backoff_delay(attempt))
+                    attempt += 1
+                    continue
+                api_resilience.record_failure(method, endpoint, kwargs.get('params'), _report_data(kwargs),
+                                              error=repr(e), extra=report)
+                raise
+
+            # PHP Notice #8 obsługuje post_xml - zasób został utworzony
+            php_notice = api_resilience.is_php_notice(status, body)
+            transient = api_resilience.is_transient(status, body)
+            if transient:
+                api_resilience.breaker.failure()
+            else:
+                api_resilience.breaker.success()
+            if (transient and attempt < api_resilience.API_RETRIES
+                    and api_resilience.should_retry(method, status, body=body)):
+                await asyncio.sleep(api_resilience.backoff_delay(attempt, retry_after))
+                attempt += 1
+                continue
+
+            if status >= 400 and not php_notice and (
+                    transient or (method != 'GET' and not (method == 'DELETE' and status == 404))):
+                api_resilience.record_failure(method, endpoint, kwargs.get('params'), _report_data(kwargs),
+                                              status=status, extra=report)
+            return status, body
+
+    async def _write(self, method, endpoint, report=None, **kwargs):
+        try:
+            return await self._request(method, endpoint, report, **kwargs)
+        finally:
+            invalidate_cache(endpoint)
+
+    async def get_xml(self, endpoint, options=None):
+        """
+        Pobiera dane z API jako XML.
+
+        Returns:
+            ElementTree XML lub None w przypadku błędu
+        """
+        try:
+            status, body = await self._request('GET', endpoint, params=options)
+            if status != 200:
+                print(f"Błąd GET {endpoint}: HTTP {status}", file=sys.stderr)
+                return None
+            return ET.fromstring(body)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ET.ParseError) as e:
+            print(f"Błąd GET {endpoint}: {e!r}", file=sys.stderr)
+            return None
+
+    async def post_xml(self, endpoint, xml_data):
+        """
+        Wysyła dane XML (POST).
+
+        Returns:
+            ElementTree XML odpowiedzi lub None w przypadku błędu
+        """
+        try:
+            status, body = await self._write('POST', endpoint, data=xml_data.encode('utf-8'),
+                                             headers={'Content-Type': 'application/xml'})
+            if api_resilience.is_php_notice(status, body):
+                print("  Ignorowanie błędu PHP Notice #8", file=sys.stderr)
+                return _created(endpoint, ET.fromstring(body))
+            if status not in (200, 201):
+                print(f"Błąd POST {endpoint}: HTTP {status}\nOdpowiedź: {body[:500].decode(errors='replace')}",
+                      file=sys.stderr)
+                return None
+            return _created(endpoint, ET.fromstring(body))
+        except (aiohttp.ClientError, asyncio.TimeoutError, ET.ParseError) as e:
+            print(f"Błąd POST {endpoint}: {e!r}", file=sys.stderr)
+            return None
+
+    async def put_xml(self, endpoint, xml_data, before=None):
+        """
+        Aktualizuje zasób (PUT).
+
+        Args:
+            endpoint: Endpoint API z ID zasobu (np. 'stock_availables/12')
+            xml_data: Dane XML (string lub bytes)
+            before: Poprzednia wersja zasobu do dziennika importu
+
+        Returns:
+            True jeśli sukces
+        """
+        try:
+            status, _ = await self._write('PUT', endpoint, data=xml_data)
+            if status != 200:
+                print(f"Błąd PUT {endpoint}: HTTP {status}", file=sys.stderr)
+                return False
+            resource, _, resource_id = endpoint.rpartition('/')
+            _notify_change('update', resource, resource_id, before=before)
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Błąd PUT {endpoint}: {e!r}", file=sys.stderr)
+            return False
+
+    async def delete(self, endpoint, resource_id):
+        """
+        Usuwa zasób (DELETE).
+
+        Returns:
+            True jeśli sukces
+        """
+        try:
+            status, _ = await self._write('DELETE', f'{endpoint}/{resource_id}')
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+        if status in (200, 204):
+            _notify_change('delete', endpoint, resource_id)
+            return True
+        return False
+
+    async def get_product_image_ids(self, product_id):
+        """
+        Pobiera listę ID zdjęć produktu.
+
+        Returns:
+            Lista ID zdjęć (str), pusta jeśli brak lub błąd
+        """
+        try:
+            status, body = await self._request('GET', f'images/products/{product_id}')
+            if status != 200:
+                return []
+            xml = ET.fromstring(body)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ET.ParseError) as e:
+            print(f"  Błąd pobierania ID zdjęć: {e!r}", file=sys.stderr)
+            return []
+        ids = [node.get('id') for node in xml.findall('.//declination') if node.get('id')]
+        return ids or [node.get('id') for node in xml.findall('.//image') if node.get('id')]
+
+    async def post_image(self, product_id, image_path):
+        """
+        Wgrywa zdjęcie produktu.
+
+        aiohttp wysyła otwarty plik fragmentami, więc zdjęcie nie jest
+        w całości ładowane do pamięci; typ MIME i nazwa pliku pochodzą
+        z rzeczywistego rozszerzenia.
+
+        Returns:
+            True jeśli sukces
+        """
+        if not os.path.exists(image_path) or os.path.getsize(image_path) == 0:
+            print(f"  Błąd: Brak pliku lub plik pusty: {image_path}", file=sys.stderr)
+            return False
+
+        opened = []
+
+        def make_form():
+            image_file = open(image_path, 'rb')
+            opened.append(image_file)
+            form = aiohttp.FormData()
+            form.add_field('image', image_file, filename=os.path.basename(image_path),
+                           content_type=image_content_type(image_path))
+            return form
+
+        endpoint = f'images/products/{product_id}'
+        try:
+            status, body = await self._write('POST', endpoint, report={'image_path': str(image_path)},
+                                             data=make_form)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"  Błąd wgrywania obrazu: {e!r}", file=sys.stderr)
+            return False
+        finally:
+            for image_file in opened:
+                image_file.close()
+        if status != 200:
+            print(f"  Błąd HTTP {status}: {body[:500].decode(errors='replace')}", file=sys.stderr)
+            return False
+        try:
+            image_id = ET.fromstring(body).findtext('.//image/id')
+        except ET.ParseError:
+            image_id = None
+        if image_id:
+            _notify_change('create', endpoint, image_id)
+        return True
+
+    async def delete_image(self, product_id, image_id):
+        """
+        Usuwa zdjęcie produktu.
+
+        Returns:
+            True jeśli sukces
+        """
+        try:
+            status, _ = await self._write('DELETE', f'images/products/{product_id}/{image_id}')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"  Błąd usuwania obrazu: {e!r}", file=sys.stderr)
+            return False
+        if status in (200, 204):
+            _notify_change('delete', f'images/products/{product_id}', image_id)
+            return True
+        return False
+
+    async def map(self, function, items, progress=None):
+        """
+        Uruchamia function(item) dla wszystkich elementów jednocześnie.
+
+        Współbieżność ogranicza semafor klienta. Jeśli wywołujący zostanie
+        anulowany (np. Ctrl+C) lub zadanie rzuci wyjątek, pozostałe zadania
+        są anulowane, a zapytania w locie przerywane.
+
+        Args:
+            function: Funkcja zwracająca korutynę (np. lambda pid: client.delete('products', pid))
+            items: Elementy do przetworzenia
+            progress: Opcjonalna funkcja wywoływana po każdym zakończonym zadaniu
+
+        Returns:
+            Lista wyników w kolejności elementów
+        """
+        async def run(item):
+            result = await function(item)
+            if progress:
+                progress()
+            return result
+
+        tasks = [asyncio.ensure_future(run(item)) for item in items]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+
+def _report_data(kwargs):
+    """Treść zapytania do raportu niepowodzeń (formularze ze zdjęciem są pomijane)."""
+    data = kwargs.get('data')
+    return data if isinstance(data, (str, bytes)) else None
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synchronizacja usuwająca ze sklepu produkty, których nie ma już w katalogu.
+
+Lista produktów sklepu jest pobierana stronami (PAGE_SIZE produktów na
+zapytanie) i porównywana z plikiem importu po stałym kluczu - polu
+reference, w które import_products wpisuje id_produktu. Produkty bez
+reference (zaimportowane przed wprowadzeniem klucza) są porównywane
+po nazwie.
+
+Osierocone produkty są domyślnie wyłączane (active=0 - zmiana zapisana
+w dzienniku importu, więc rollback_import.py może ją cofnąć), a z opcją
+--delete usuwane. Zmiany są wysyłane równolegle, partiami po BATCH_SIZE.
+
+Przykład:
+    python prune_products.py --dry-run
+    python prune_products.py --delete
+"""
+
+import json
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+import api_resilience
+import import_journal
+import import_products
+from prestashop_api import API_WORKERS, get_api_records, get_api_xml, put_api_xml, delete_api_resource
+
+PAGE_SIZE = 1000
+BATCH_SIZE = 200
+# Bez --force przerwij, jeśli do usunięcia jest więcej niż ta część sklepu
+# (np. niepełny plik katalogu nie może wyczyścić sklepu)
+MAX_ORPHAN_RATIO = 0.5
+
+
+def iter_shop_products(page_size=PAGE_SIZE):
+    """
+    Pobiera produkty sklepu stronami.
+
+    Yields:
+        Słowniki z kluczami id, reference, name, active
+    """
+    offset = 0
+    while True:
+        products = get_api_records('products', {'display': '[id,reference,name,active]',
+                                                'sort': '[id_ASC]', 'limit': f'{offset},{page_size}'})
+        if products is None:
+            raise RuntimeError("Nie udało się pobrać listy produktów")
+        for product in products:
+            yield {
+                'id': product.id,
+                'reference': product.get('reference', ''),
+                'name': product.get('name', ''),
+                'active': product.get('active') != '0',
+            }
+        if len(products) < page_size:
+            return
+        offset += page_size
+
+
+def find_orphans(catalog, shop_products):
+    """
+    Wyznacza produkty sklepu, których nie ma w katalogu.
+
+    Args:
+        catalog: Produkty z pliku importu
+        shop_products: Produkty sklepu (iter_shop_products)
+
+    Returns:
+        Krotka (osierocone produkty, liczba produktów w sklepie)
+    """
+    references = {str(item['id_produktu']) for item in catalog if item.get('id_produktu')}
+    names = {item['nazwa'] for item in catalog if item.get('nazwa')}
+
+    orphans = []
+    total = 0
+    for product in shop_products:
+        total += 1
+        if product['reference']:
+            known = product['reference'] in references
+        else:
+            known = product['name'] in names
+        if not known:
+            orphans.append(product)
+    return orphans, total
+
+
+def deactivate_product(product_id):
+    """
+    Wyłącza produkt (active=0).
+
+    Returns:
+        True jeśli sukces
+    """
+    xml = get_api_xml(f'products/{product_id}')
+    product = xml.find('product') if xml is not None else None
+    if product is None:
+        return False
+    before = import_journal.snapshot(xml)
+
+    import_products._set_text(product, 'active', '0')
+    for tag in import_products.READONLY_PRODUCT_FIELDS:
+        element = product.find(tag)
+        if element is not None:
+            product.remove(element)
+
+    return put_api_xml(f'products/{product_id}', ET.tostring(xml, encoding='utf-8'), before=before)
+
+
+def delete_product(product_id):
+    return delete_api_resource('products', product_id)
+
+
+def prune(orphans, delete=False):
+    """
+    Wyłącza lub usuwa osierocone produkty równolegle, partiami.
+
+    Returns:
+        Lista ID produktów, które udało się wyłączyć/usunąć
+    """
+    action = delete_product if delete else deactivate_product
+    done = []
+
+    with ThreadPoolExecutor(max_workers=API_WORKERS) as executor:
+        for start in range(0, len(orphans), BATCH_SIZE):
+            batch = [product['id'] for product in orphans[start:start + BATCH_SIZE]]
+            for product_id, ok in zip(batch, executor.map(action, batch)):
+                if ok:
+                    done.append(product_id)
+                else:
+                    print(f"  ✗ Błąd produktu ID {product_id}", file=sys.stderr)
+            print(f"  Partia {start // BATCH_SIZE + 1}: {min(start + BATCH_SIZE, len(orphans))}/{len(orphans)}")
+
+    return done
+
+
+def main(delete=False, dry_run=False, force=False):
+    """
+    Wyłącza (lub usuwa) produkty sklepu, których nie ma w pliku importu.
+
+    Returns:
+        Kod wyjścia
+    """
+    print("Rozpoczynanie synchronizacji usuniętych produktów...")
+    try:
+        with open(import_products.INPUT_FILE, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+    except FileNotFoundError:
+        print(f"BŁĄD: Nie znaleziono pliku {import_products.INPUT_FILE}", file=sys.stderr)
+        return 1
+
+    try:
+        orphans, total = find_orphans(catalog, iter_shop_products())
+    except RuntimeError as e:
+        print(f"BŁĄD: {e}", file=sys.stderr)
+        return 1
+
+    if not delete:
+        # Już wyłączonych nie trzeba zmieniać
+        orphans = [product for product in orphans if product['active']]
+
+    print(f"Produktów w sklepie: {total}, w katalogu: {len(catalog)}, "
+          f"do {'usunięcia' if delete else 'wyłączenia'}: {len(orphans)}")
+    for product in orphans[:10]:
+        print(f"  • {product['id']}: {product['name']} (reference: {product['reference'] or 'brak'})")
+    if len(orphans) > 10:
+        print(f"  ... i {len(orphans) - 10} więcej")
+
+    if not orphans or dry_run:
+        return 0
+    if not force and len(orphans) > total * MAX_ORPHAN_RATIO:
+        print(f"BŁĄD: Do zmiany jest ponad {MAX_ORPHAN_RATIO:.0%} produktów sklepu - "
+              f"sprawdź plik katalogu lub użyj --force", file=sys.stderr)
+        return 1
+
+    import_journal.enable('prune_products')
+    done = prune(orphans, delete)
+    # Przy ponownym pojawieniu się w katalogu produkt musi zostać porównany ze sklepem
+    import_products.forget_fingerprints(set(done))
+
+    print(f"\n--- Zakończono synchronizację ---")
+    print(f"{'Usunięto' if delete else 'Wyłączono'}: {len(done)}, błędów: {len(orphans) - len(done)}")
+    api_resilience.print_failure_summary()
+    return 0 if len(done) == len(orphans) else 1
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Wyłączanie produktów, których nie ma już w katalogu')
+    parser.add_argument('--delete', action='store_true',
+                        help='Usuń osierocone produkty zamiast je wyłączać')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Tylko pokaż produkty do zmiany')
+    parser.add_argument('--force', action='store_true',
+                        help=f'Pozwól zmienić więcej niż {MAX_ORPHAN_RATIO:.0%} produktów sklepu')
+    args = parser.parse_args()
+    exit(main(delete=args.delete, dry_run=args.dry_run, force=args.force))
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ponowne wysłanie zapytań z raportu niepowodzeń (api_resilience.py).
+
+Zapytania zapisujące (POST/PUT/DELETE, także wgrywanie i usuwanie zdjęć)
+są wysyłane ponownie w kolejności z raportu, równolegle (API_WORKERS
+wątków) w obrębie jednej metody - najpierw POST, potem PUT i DELETE.
+Zmiany trafiają do dziennika importu, więc rollback_import.py może je
+cofnąć.
+
+Przed ponowieniem POST zasób jest szukany po kluczu naturalnym (reference
+produktu, nazwa producenta lub cechy, cecha i wartość, nazwa i rodzic
+kategorii) - błąd 500 PrestaShop może przyjść już po zapisaniu zasobu,
+a import mógł go w międzyczasie utworzyć. Istniejące zasoby są pomijane. Nieudane odczyty (GET) nie mają treści do ponowienia - dla nich
+trzeba uruchomić ponownie skrypt wymieniony w raporcie (import z --upsert
+pominie to, co już jest w sklepie).
+
+Zapytania, które znów się nie udadzą, trafiają do raportu bieżącego
+przebiegu, więc można je ponawiać aż do skutku.
+
+Przykład:
+    python retry_failures.py --list
+    python retry_failures.py --run 20261019-141500 --dry-run
+    python retry_failures.py --last
+"""
+
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+import api_resilience
+import import_journal
+from prestashop_api import (API_WORKERS, delete_api_resource, delete_image, get_api_records,
+                            post_api_xml, post_image, put_api_xml)
+
+METHOD_ORDER = ['POST', 'PUT', 'DELETE']
+# Klucz naturalny zasobów tworzonych przez POST: pole filtra -> ścieżka w XML zasobu
+NATURAL_KEYS = {
+    'products': {'reference': 'reference'},
+    'manufacturers': {'name': 'name'},
+    'product_features': {'name': 'name/language'},
+    'product_feature_values': {'id_feature': 'id_feature', 'value': 'value/language'},
+    'categories': {'name': 'name/language', 'id_parent': 'id_parent'},
+}
+
+
+def find_existing(endpoint, data):
+    """
+    Szuka w sklepie zasobu z zapisanego POST po jego kluczu naturalnym.
+
+    Args:
+        endpoint: Zasób API (np. 'product_features')
+        data: XML zapytania z raportu
+
+    Returns:
+        ID istniejącego zasobu, '' jeśli go nie ma (lub zasób nie ma klucza
+        naturalnego), None jeśli nie udało się tego sprawdzić
+    """
+    keys = NATURAL_KEYS.get(endpoint)
+    if not keys:
+        return ''
+    try:
+        element = ET.fromstring(data.encode('utf-8'))[0]
+    except (ET.ParseError, IndexError):
+        return ''
+    options = {'display': '[id]'}
+    for field, path in keys.items():
+        value = (element.findtext(path) or '').strip()
+        if not value:
+            return ''
+        options[f'filter[{field}]'] = value
+    records = get_api_records(endpoint, options)
+    if records is None:
+        return None
+    return records[0].id if records else ''
+
+
+def replay(entry):
+    """
+    Wysyła ponownie jedno zapytanie z raportu.
+
+    Returns:
+        True jeśli sukces
+    """
+    method, endpoint = entry['method'], entry['endpoint']
+    parts = endpoint.split('/')
+
+    if parts[0] == 'images':
+        product_id = parts[2]
+        if method == 'POST':
+            return post_image(product_id, entry['image_path']) if entry.get('image_path') else False
+        if method == 'DELETE':
+            return delete_image(product_id, parts[3])
+        return False
+
+    if method == 'POST':
+        if not entry.get('data'):
+            return False
+        existing = find_existing(endpoint, entry['data'])
+        if existing is None:
+            return False
+        if existing:
+            print(f"  = {endpoint}: już istnieje (ID {existing}) - pominięto")
+            return True
+        return post_api_xml(endpoint, entry['data']) is not None
+    if method == 'PUT':
+        return put_api_xml(endpoint, entry['data'].encode('utf-8')) if entry.get('data') else False
+    if method == 'DELETE':
+        resource, _, resource_id = endpoint.rpartition('/')
+        return delete_api_resource(resource, resource_id)
+    return False
+
+
+def plan_batches(entries):
+    """
+    Dzieli wpisy raportu na partie do ponowienia.
+
+    Kolejne nieudane PUT tego samego zasobu są zastępowane ostatnim
+    (zawiera pełny zasób), a powtórzone POST i DELETE wysyłane raz
+    (równoległe POST tego samego zasobu nie znalazłyby się nawzajem).
+
+    Returns:
+        Krotka (partie {metoda: [wpisy]}, wpisy GET do ponownego uruchomienia skryptu)
+    """
+    batches = {method: [] for method in METHOD_ORDER}
+    reads = []
+    latest_put = {}
+    seen_deletes = set()
+    seen_posts = set()
+
+    for entry in entries:
+        method = entry['method']
+        if method == 'GET':
+            reads.append(entry)
+        elif method == 'PUT':
+            latest_put[entry['endpoint']] = entry
+        elif method == 'DELETE':
+            if entry['endpoint'] not in seen_deletes:
+                seen_deletes.add(entry['endpoint'])
+                batches['DELETE'].append(entry)
+        elif method == 'POST':
+            key = (entry['endpoint'], entry.get('data'), entry.get('image_path'))
+            if key not in seen_posts:
+                seen_posts.add(key)
+                batches['POST'].append(entry)
+    batches['PUT'] = list(latest_put.values())
+    return batches, reads
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Ponowne wysłanie nieudanych zapytań do PrestaShop')
+    parser.add_argument('--list', action='store_true', help='Pokaż zapisane raporty')
+    parser.add_argument('--run', help='ID przebiegu, którego raport ponowić')
+    parser.add_argument('--last', action='store_true', help='Ponów ostatni raport')
+    parser.add_argument('--dry-run', action='store_true', help='Tylko pokaż zapytania do ponowienia')
+    args = parser.parse_args()
+
+    reports = api_resilience.list_reports()
+    if args.list:
+        if not reports:
+            print("Brak raportów niepowodzeń")
+        for path in reports:
+            entries = api_resilience.read_failures(path)
+            scripts = sorted({entry['script'] for entry in entries})
+            print(f"{path.stem:<20} {len(entries):>6} zapytań  {', '.join(scripts)}")
+        return 0
+
+    run_id = args.run or (reports[-1].stem if args.last and reports else None)
+    if not run_id:
+        print(" Błąd: Podaj --run ID lub --last (lista: --list)")
+        return 1
+    path = api_resilience.failures_path(run_id)
+    try:
+        entries = api_resilience.read_failures(path)
+    except FileNotFoundError:
+        print(f" Błąd: Nie znaleziono raportu {path}")
+        return 1
+
+    batches, reads = plan_batches(entries)
+    print(f"Raport {path}: {len(entries)} wpisów")
+    for method in METHOD_ORDER:
+        print(f"  {method}: {len(batches[method])}")
+    if reads:
+        scripts = sorted({entry['script'] for entry in reads})
+        print(f"  Nieudane odczyty: {len(reads)} - uruchom ponownie: {', '.join(scripts)}")
+    if args.dry_run:
+        return 0
+
+    import_journal.enable('retry_failures')
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=API_WORKERS) as executor:
+        for method in METHOD_ORDER:
+            for entry, ok in zip(batches[method], executor.map(replay, batches[method])):
+                if ok:
+                    done += 1
+                else:
+                    failed += 1
+                    print(f"  ✗ {method} {entry['endpoint']}", file=sys.stderr)
+
+    print(f"\n✓ Ponowiono: {done}, nieudanych: {failed}")
+    api_resilience.print_failure_summary()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cofanie jednego przebiegu importu na podstawie dziennika (import_journal.py).
+
+W przeciwieństwie do clean_prestashop.py usuwa tylko zasoby utworzone
+w wybranym przebiegu, a zmienione zasoby przywraca do stanu sprzed
+przebiegu:
+1. Przywrócenie zmienionych zasobów (PUT wersji zapisanej w dzienniku)
+2. Usunięcie utworzonych zasobów w kolejności zależności: zdjęcia,
+   produkty, wartości cech, cechy, producenci, kategorie (od najgłębszych)
+
+Zasoby jednego rodzaju (i jednego poziomu kategorii) są usuwane
+równolegle (API_WORKERS wątków). Odpowiedź 404 oznacza, że zasób
+został już usunięty, więc ponowne uruchomienie jest bezpieczne.
+
+Przykład:
+    python rollback_import.py --list
+    python rollback_import.py --last --dry-run
+    python rollback_import.py --run 20261019-141500
+"""
+
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+import import_journal
+import import_products
+from prestashop_api import API_WORKERS, PRESTASHOP_URL, invalidate_cache, put_api_xml, session
+
+# Kolejność usuwania - najpierw zasoby zależne od pozostałych
+DELETE_ORDER = ['images', 'products', 'product_feature_values', 'product_features',
+                'manufacturers', 'categories']
+
+
+def _kind(resource):
+    """'images/products/12' -> 'images'."""
+    return resource.split('/')[0]
+
+
+def build_plan(entries):
+    """
+    Wyznacza zmiany do cofnięcia na podstawie wpisów dziennika.
+
+    Args:
+        entries: Wpisy dziennika przebiegu
+
+    Returns:
+        Słownik z kluczami:
+        - restore: {(zasób, ID): XML sprzed przebiegu}
+        - delete: {rodzaj: [(zasób, ID), ...]}
+        - parents: {ID kategorii: ID rodzica} dla utworzonych kategorii
+        - irreversible: lista usuniętych zasobów, których nie da się odtworzyć
+    """
+    created = {}
+    restore = {}
+    irreversible = []
+
+    for entry in entries:
+        key = (entry['resource'], entry['id'])
+        action = entry['action']
+        if action == 'create':
+            created[key] = entry
+        elif action == 'update':
+            # Pierwsza zapisana wersja to stan sprzed przebiegu
+            if key not in created and entry.get('before'):
+                restore.setdefault(key, entry['before'])
+        elif action == 'delete':
+            if created.pop(key, None) is None:
+                irreversible.append(key)
+
+    created_products = {resource_id for resource, resource_id in created if resource == 'products'}
+    delete = {}
+    for resource, resource_id in created:
+        kind = _kind(resource)
+        # Usunięcie produktu usuwa też jego zdjęcia
+        if kind == 'images' and resource.rsplit('/', 1)[-1] in created_products:
+            continue
+        delete.setdefault(kind, []).append((resource, resource_id))
+
+    parents = {entry['id']: entry.get('parent') for (resource, _), entry in created.items()
+               if resource == 'categories'}
+
+    return {'restore': restore, 'delete': delete, 'parents': parents, 'irreversible': irreversible}
+
+
+def category_levels(category_ids, parents):
+    """
+    Dzieli utworzone kategorie na poziomy od najgłębszego.
+
+    Returns:
+        Lista list ID kategorii - najpierw najgłębsze
+    """
+    created = set(category_ids)
+    depths = {}
+
+    def depth(category_id):
+        if category_id not in depths:
+            parent = parents.get(category_id)
+            depths[category_id] = depth(parent) + 1 if parent in created and parent != category_id else 0
+        return depths[category_id]
+
+    levels = {}
+    for category_id in category_ids:
+        levels.setdefault(depth(category_id), []).append(category_id)
+    return [levels[d] for d in sorted(levels, reverse=True)]
+
+
+def delete_resource(resource, resource_id):
+    """
+    Usuwa zasób bez zapisu w dzienniku.
+
+    Returns:
+        True jeśli zasób usunięto lub już nie istniał (404)
+    """
+    url = f"{PRESTASHOP_URL}/{resource}/{resource_id}"
+    try:
+        response = session.delete(url)
+        invalidate_cache(resource)
+        return response.status_code in [200, 204, 404]
+    except requests.exceptions.RequestException as e:
+        print(f"  Błąd DELETE {url}: {e}", file=sys.stderr)
+        return False
+
+
+def restore_resource(resource, resource_id, before):
+    """Przywraca zasób do wersji zapisanej w dzienniku."""
+    xml = ET.fromstring(before)
+    if resource == 'products':
+        product = xml.find('product')
+        for tag in import_products.READONLY_PRODUCT_FIELDS:
+            element = product.find(tag) if product is not None else None
+            if element is not None:
+                product.remove(element)
+    return put_api_xml(f'{resource}/{resource_id}', ET.tostring(xml, encoding='utf-8'))
+
+
+def _run_all(executor, function, items):
+    """Wykonuje funkcję równolegle i zwraca listę elementów, dla których się nie powiodła."""
+    return [item for item, ok in zip(items, executor.map(lambda item: function(*item), items)) if not ok]
+
+
+def rollback(plan):
+    """
+    Cofa przebieg według planu z build_plan().
+
+    Returns:
+        Słownik statystyk: przywrócone, usunięte, błędy
+    """
+    stats = {'restored': 0, 'deleted': 0, 'errors': 0}
+
+    with ThreadPoolExecutor(max_workers=API_WORKERS) as executor:
+        items = [(resource, resource_id, before) for (resource, resource_id), before in plan['restore'].items()]
+        if items:
+            failed = _run_all(executor, restore_resource, items)
+            stats['restored'] += len(items) - len(failed)
+            stats['errors'] += len(failed)
+            print(f"  Przywrócono: {len(items) - len(failed)}/{len(items)}")
+
+        for kind in DELETE_ORDER:
+            items = plan['delete'].get(kind, [])
+            if not items:
+                continue
+            if kind == 'categories':
+                batches = [[('categories', category_id) for category_id in level]
+                           for level in category_levels([i for _, i in items], plan['parents'])]
+            else:
+                batches = [items]
+
+            deleted = 0
+            for batch in batches:
+                failed = _run_all(executor, delete_resource, batch)
+                deleted += len(batch) - len(failed)
+                stats['errors'] += len(failed)
+                for resource, resource_id in failed:
+                    print(f"    ✗ Nie udało się usunąć {resource}/{resource_id}")
+            stats['deleted'] += deleted
+            print(f"  Usunięto ({kind}): {deleted}/{len(items)}")
+
+    return stats
+
+
+def print_plan(plan):
+    print(f"  Do przywrócenia: {len(plan['restore'])}")
+    for kind in DELETE_ORDER:
+        if plan['delete'].get(kind):
+            print(f"  Do usunięcia ({kind}): {len(plan['delete'][kind])}")
+    if plan['irreversible']:
+        print(f"  Nie do odtworzenia (usunięte w przebiegu): {len(plan['irreversible'])}")
+        for resource, resource_id in plan['irreversible'][:10]:
+            print(f"    • {resource}/{resource_id}")
+
+
+def list_runs():
+    runs = import_journal.list_runs()
+    if not runs:
+        print("Brak zapisanych przebiegów importu")
+        return
+    print(f"{'ID przebiegu':<20} {'wpisów':>8}  skrypty")
+    for run_id in runs:
+        entries = import_journal.read_journal(run_id)
+        scripts = sorted({e['script'] for e in entries if e['action'] != 'rollback'})
+        status = '  (cofnięty)' if any(e['action'] == 'rollback' for e in entries) else ''
+        print(f"{run_id:<20} {len(entries):>8}  {', '.join(scripts)}{status}")
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Cofanie przebiegu importu na podstawie dziennika',
+        epilog="""
+Przykłady:
+  # Lista zapisanych przebiegów
+  python rollback_import.py --list
+
+  # Podgląd cofnięcia ostatniego przebiegu
+  python rollback_import.py --last --dry-run
+
+  # Cofnięcie wybranego przebiegu bez pytania o potwierdzenie
+  python rollback_import.py --run 20261019-141500 --force
+        """
+    )
+    parser.add_argument('--list', action='store_true', help='Pokaż zapisane przebiegi')
+    parser.add_argument('--run', help='ID przebiegu do cofnięcia')
+    parser.add_argument('--last', action='store_true', help='Cofnij ostatni przebieg')
+    parser.add_argument('--dry-run', action='store_true', help='Pokaż plan bez zmian w sklepie')
+    parser.add_argument('--force', action='store_true',
+                        help='Nie pytaj o potwierdzenie (także dla przebiegu już cofniętego)')
+    args = parser.parse_args()
+
+    if args.list:
+        list_runs()
+        return 0
+
+    run_id = args.run
+    if args.last:
+        runs = import_journal.list_runs()
+        run_id = runs[-1] if runs else None
+    if not run_id:
+        print(" Błąd: Podaj --run ID lub --last (lista: --list)")
+        return 1
+
+    try:
+        entries = import_journal.read_journal(run_id)
+    except FileNotFoundError:
+        print(f" Błąd: Nie znaleziono dziennika {import_journal.journal_path(run_id)}")
+        return 1
+
+    already = any(e['action'] == 'rollback' for e in entries)
+    plan = build_plan([e for e in entries if e['action'] != 'rollback'])
+
+    print(f"\n{'='*60}")
+    print(f"  COFANIE PRZEBIEGU {run_id}")
+    print(f"{'='*60}")
+    print(f"Adres: {PRESTASHOP_URL}")
+    if already:
+        print("  UWAGA: Ten przebieg został już cofnięty")
+    print_plan(plan)
+
+    if args.dry_run:
+        return 0
+    if not args.force:
+        if already:
+            print("\n Użyj --force, aby cofnąć go ponownie")
+            return 1
+        if input("\nCofnąć przebieg? [t/N]: ").strip().lower() != 't':
+            print("Anulowano")
+            return 0
+
+    stats = rollback(plan)
+
+    product_ids = {resource_id for resource, resource_id in plan['restore'] if resource == 'products'}
+    product_ids.update(resource_id for _, resource_id in plan['delete'].get('products', []))
+    import_products.forget_fingerprints(product_ids)
+
+    import_journal.append_entry(run_id, {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'script': 'rollback_import',
+        'action': 'rollback',
+        'restored': stats['restored'],
+        'deleted': stats['deleted'],
+        'errors': stats['errors'],
+    })
+
+    print(f"\n✓ Przywrócono: {stats['restored']}, usunięto: {stats['deleted']}, błędów: {stats['errors']}")
+    if plan['irreversible']:
+        print(f"  Nie odtworzono {len(plan['irreversible'])} usuniętych zasobów (zdjęcia trzeba wgrać ponownie)")
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == "__main__":
+    try:
+        exit(main())
+    except KeyboardInterrupt:
+        print("\n\n Przerwano przez użytkownika")
+        exit(130)
@@ -1,9 +1,16 @@
+import itertools
 import json
 import os
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
 import random
-from prestashop_api import get_api_xml, put_api_xml, post_image, get_product_image_ids, delete_image
+from prestashop_api import (API_WORKERS, get_all_product_image_ids, get_api_records, put_api_xml, post_image,
+                            get_product_image_ids, delete_image)
+import api_resilience
+import import_journal
 
 INPUT_FILE = Path(__file__).parent.parent / 'data' / 'products_with_details.json'
 IMAGES_DIR = Path(__file__).parent.parent / 'data' / 'images'
@@ -27,51 +34,169 @@ def set_stock(product_id):
     """Ustawia stan magazynowy produktu przy użyciu czystego szablonu XML."""
     print(f"  Ustawianie stanu magazynowego ({quantity} szt.)")
 
-    options = {'filter[id_product]': product_id, 'display': '[id]'}
-    xml_list = get_api_xml('stock_availables', options)
+    options = {'filter[id_product]': product_id, 'display': '[id,quantity]'}
+    stocks = get_api_records('stock_availables', options)
 
-    if xml_list is None or xml_list.find('.//stock_available') is None:
+    if not stocks:
         print(f"    Błąd: Nie znaleziono 'stock_available' dla produktu {product_id}")
         return False
 
-    stock_id = xml_list.find('.//stock_available/id').text
+    stock_id = stocks[0].id
+    old_quantity = stocks[0].get('quantity') or '0'
 
     xml_data = STOCK_TEMPLATE.format(
         stock_id=stock_id,
         product_id=product_id,
         quantity=quantity
     )
-
-    return put_api_xml(f'stock_availables/{stock_id}', xml_data)
-
-
-
-def main():
+    before = STOCK_TEMPLATE.format(stock_id=stock_id, product_id=product_id, quantity=old_quantity)
+
+    return put_api_xml(f'stock_availables/{stock_id}', xml_data, before=before)
+
+
+# Priorytety kolejki wgrywania (mniejszy = wcześniej)
+COVER_PRIORITY = 0
+GALLERY_PRIORITY = 1
+
+
+class UploadQueue:
+    """
+    Kolejka wgrywania zdjęć w tle: najpierw okładki, potem galerie.
+
+    Zadania obsługuje API_WORKERS wątków, a kolejka priorytetowa sprawia,
+    że okładka (product.jpg) każdego produktu jest wgrywana przed
+    jakąkolwiek galerią. Galeria produktu trafia do kolejki dopiero po
+    wgraniu jego okładki i jest wgrywana po kolei - PrestaShop ustawia
+    okładkę i pozycje zdjęć według kolejności wgrania.
+    """
+
+    def __init__(self, workers=API_WORKERS):
+        self.queue = queue.PriorityQueue()
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.uploaded = 0
+        self.failed = 0
+        self.pending_covers = 0
+        self.started = time.perf_counter()
+        self.covers_done_at = None
+        self.threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def add(self, product_id, images, has_cover):
+        """
+        Dodaje zdjęcia produktu do wgrania.
+
+        Args:
+            product_id: ID produktu w PrestaShop
+            images: Ścieżki zdjęć w kolejności wgrywania
+            has_cover: Czy produkt ma już zdjęcia (wtedy wszystkie są galerią)
+        """
+        if not images:
+            return
+        if has_cover:
+            self._put(GALLERY_PRIORITY, product_id, images)
+        else:
+            with self.lock:
+                self.pending_covers += 1
+            self._put(COVER_PRIORITY, product_id, images)
+
+    def _put(self, priority, product_id, images):
+        self.queue.put((priority, next(self.counter), product_id, images))
+
+    def _upload(self, product_id, image_path):
+        ok = post_image(product_id, image_path)
+        with self.lock:
+            if ok:
+                self.uploaded += 1
+            else:
+                self.failed += 1
+        if not ok:
+            print(f"      ✗ Błąd wgrywania: produkt {product_id}, {image_path.name}")
+        return ok
+
+    def _worker(self):
+        while True:
+            priority, _, product_id, images = self.queue.get()
+            try:
+                if product_id is None:
+                    return
+                if priority == COVER_PRIORITY:
+                    cover_ok = self._upload(product_id, images[0])
+                    if cover_ok and images[1:]:
+                        self._put(GALLERY_PRIORITY, product_id, images[1:])
+                    elif images[1:]:
+                        # Bez okładki pierwsze zdjęcie galerii stałoby się okładką
+                        with self.lock:
+                            self.failed += len(images) - 1
+                    self._cover_done()
+                else:
+                    for image_path in images:
+                        self._upload(product_id, image_path)
+            finally:
+                self.queue.task_done()
+
+    def _cover_done(self):
+        with self.lock:
+            self.pending_covers -= 1
+            if self.pending_covers == 0:
+                self.covers_done_at = time.perf_counter() - self.started
+
+    def finish(self):
+        """
+        Czeka na wgranie wszystkich zdjęć i zatrzymuje wątki.
+
+        Returns:
+            Krotka (wgrane, nieudane)
+        """
+        self.queue.join()
+        for _ in self.threads:
+            self.queue.put((GALLERY_PRIORITY + 1, next(self.counter), None, None))
+        for thread in self.threads:
+            thread.join()
+        total = time.perf_counter() - self.started
+        if self.covers_done_at is not None:
+            print(f"Okładki wgrane po {self.covers_done_at:.1f} s, wszystkie zdjęcia po {total:.1f} s")
+        return self.uploaded, self.failed
+
+
+def main(covers_first=False):
+    """
+    Ustawia stany magazynowe i wgrywa brakujące zdjęcia produktów.
+
+    Args:
+        covers_first: Wgrywaj zdjęcia w tle (UploadQueue) - najpierw okładki
+                      wszystkich produktów, potem galerie
+    """
     print("Rozpoczynanie aktualizacji stanów magazynowych i zdjęć...")
+    import_journal.enable('update_stocks_images')
 
     try:
         with open(INPUT_FILE, 'r', encoding='utf-8') as f:
             data = json.load(f)
     except FileNotFoundError:
         print(f"BŁĄD: Nie znaleziono pliku {INPUT_FILE}", file=sys.stderr)
-        return
+        return 1
 
     print("Pobieranie listy wszystkich produktów z PrestaShop...")
-    all_products_xml = get_api_xml('products', {'display': '[id,name]'})
+    all_products = get_api_records('products', {'display': '[id,name]'})
 
-    if all_products_xml is None:
+    if all_products is None:
         print("BŁĄD: Nie udało się pobrać listy produktów", file=sys.stderr)
-        return
+        return 1
 
     products_map = {}
-    for product in all_products_xml.findall('.//product'):
-        prod_id = product.find('id').text
-        prod_name_elem = product.find('.//language')
-        if prod_name_elem is not None:
-            prod_name = prod_name_elem.text
-            products_map[prod_name] = prod_id
+    for product in all_products:
+        if product.get('name'):
+            products_map[product['name']] = product.id
 
     print(f"Znaleziono {len(products_map)} produktów w PrestaShop")
+
+    print("Pobieranie listy zdjęć wszystkich produktów...")
+    image_inventory = get_all_product_image_ids()
+    if image_inventory is None:
+        print("  Nie udało się pobrać listy zdjęć - sprawdzanie produktów pojedynczo", file=sys.stderr)
+    upload_queue = UploadQueue() if covers_first else None
     images_uploaded = 0
     images_deleted = 0
     images_skipped = 0
@@ -99,7 +224,10 @@ def main():
         product_id_from_json = item.get('id_produktu', '')
 
         if product_id_from_json:
-            current_image_ids = get_product_image_ids(product_id)
+            if image_inventory is not None:
+                current_image_ids = list(image_inventory.get(product_id, []))
+            else:
+                current_image_ids = get_product_image_ids(product_id)
             existing_images_count = len(current_image_ids)
             
 
@@ -156,6 +284,10 @@ def main():
                 if not images_to_upload:
                     print(f"  Produkt ma już wszystkie zdjęcia ({existing_images_count}/{len(available_images)})")
                     images_skipped += 1
+                elif upload_queue is not None:
+                    print(f"  Produkt ma {existing_images_count} zdjęć, dostępnych {len(available_images)}, "
+                          f"w kolejce do wgrania: {len(images_to_upload)}")
+                    upload_queue.add(product_id, images_to_upload, has_cover=existing_images_count > 0)
                 else:
                     print(f"  Produkt ma {existing_images_count} zdjęć, dostępnych {len(available_images)}, wgrywam {len(images_to_upload)}")
 
@@ -169,11 +301,25 @@ def main():
             else:
                 print(f"    Nie znaleziono folderu dla ID: {product_id_from_json}")
 
+    if upload_queue is not None:
+        print("\nOczekiwanie na wgranie zdjęć z kolejki...")
+        uploaded, failed = upload_queue.finish()
+        images_uploaded += uploaded
+        print(f"Nieudanych wgrań z kolejki: {failed}")
+
     print("\n--- Zakończono aktualizację ---")
     print(f"Łącznie wgrano zdjęć: {images_uploaded}")
     print(f"Łącznie usunięto zdjęć: {images_deleted}")
     print(f"Pominięto produktów ze zdjęciami: {images_skipped}")
+    api_resilience.print_failure_summary()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Aktualizacja stanów magazynowych i zdjęć produktów')
+    parser.add_argument('--covers-first', action='store_true',
+                        help='Wgrywaj zdjęcia w tle: najpierw okładki wszystkich produktów, potem galerie')
+    args = parser.parse_args()
+    sys.exit(main(covers_first=args.covers_first))
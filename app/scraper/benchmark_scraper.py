@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark scraperów na lokalnej stronie testowej (fixture_site.py).
+
+Każdy tryb jest uruchamiany w osobnym procesie skierowanym na stronę
+testową (SCRAPER_BASE_URL), więc prawdziwy sklep nie dostaje żadnego
+zapytania. Tryby:
+- categories - category_scraper (strona główna z menu),
+- products   - product_scraper (strony kategorii),
+- details    - product_details_scraper (strony produktów),
+- images     - ImageDownloader (zdjęcia produktów).
+
+Dla każdego trybu mierzone są: strony/s, zdjęcia/s, czas CPU na stronę
+(lub zdjęcie) i szczytowe zużycie pamięci (RSS). Wyniki są dopisywane
+do benchmarks/scraper_history.jsonl.
+
+Przykład:
+    python benchmark_scraper.py --latency 0.05 --limit 300
+    python benchmark_scraper.py --modes details --workers 4,8,16
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+DATA_DIR = BASE_DIR.parent / 'data'
+RESULTS_DIR = BASE_DIR / 'benchmarks'
+HISTORY_FILE = RESULTS_DIR / 'scraper_history.jsonl'
+
+MODES = ['categories', 'products', 'details', 'images']
+
+
+def run_mode(mode, limit, workers, work_dir):
+    """
+    Wykonuje tryb w bieżącym procesie (wywoływane w procesie potomnym).
+
+    Returns:
+        Słownik z czasem CPU i szczytowym RSS
+    """
+    import resource
+    import http_client
+
+    http_client.enable_dns_cache()
+    work_dir = Path(work_dir)
+    cpu_start = time.process_time()
+
+    if mode == 'categories':
+        from category_scraper import scrape_categories
+        scrape_categories()
+
+    elif mode == 'products':
+        from product_scraper import collect_all_categories, scrape_all_categories
+        with open(DATA_DIR / 'categories.json', 'r', encoding='utf-8') as f:
+            categories = collect_all_categories(json.load(f))
+        scrape_all_categories(categories[:limit] if limit else categories, workers)
+
+    elif mode == 'details':
+        from product_details_scraper import scrape_all_products
+        with open(DATA_DIR / 'products.json', 'r', encoding='utf-8') as f:
+            products = json.load(f)
+        products_file = work_dir / 'products.json'
+        with open(products_file, 'w', encoding='utf-8') as f:
+            json.dump(products[:limit] if limit else products, f, ensure_ascii=False)
+        scrape_all_products(str(products_file), str(work_dir / 'details.json'), workers)
+
+    elif mode == 'images':
+        from image_downloader import ImageDownloader
+        downloader = ImageDownloader(output_dir=str(work_dir / 'images'),
+                                     duplicates_file=str(work_dir / 'duplicates.json'))
+        downloader.process_products_file(str(DATA_DIR / 'products_with_details.json'),
+                                         limit, force=True, workers=workers)
+
+    else:
+        raise ValueError(f"Nieznany tryb: {mode}")
+
+    return {
+        'cpu_time': time.process_time() - cpu_start,
+        # ru_maxrss jest w KB na Linuksie
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def benchmark(modes, latency, image_latency, limit, workers_list, verbose=False):
+    """
+    Uruchamia pomiary wszystkich trybów dla każdej liczby wątków.
+
+    Returns:
+        Lista słowników z wynikami
+    """
+    from fixture_site import start_server
+
+    server = start_server(latency=latency, image_latency=image_latency, seed=0)
+    env = dict(os.environ, SCRAPER_BASE_URL=server.base_url)
+    results = []
+
+    try:
+        for mode in modes:
+            for workers in workers_list:
+                with tempfile.TemporaryDirectory(prefix='bench_scraper_') as tmp:
+                    result_file = Path(tmp) / 'result.json'
+                    with server.stats_lock:
+                        server.stats.clear()
+
+                    command = [sys.executable, __file__, '--run-mode', mode,
+                               '--work-dir', tmp, '--result', str(result_file)]
+                    if limit:
+                        command += ['--limit', str(limit)]
+                    if workers:
+                        command += ['--workers', str(workers)]
+
+                    start = time.perf_counter()
+                    process = subprocess.run(
+                        command, cwd=BASE_DIR, env=env,
+                        stdout=None if verbose else subprocess.DEVNULL,
+                        stderr=None if verbose else subprocess.DEVNULL
+                    )
+                    wall_time = time.perf_counter() - start
+
+                    with server.stats_lock:
+                        stats = dict(server.stats)
+                    measured = {}
+                    if result_file.exists():
+                        measured = json.loads(result_file.read_text())
+
+                pages = stats.get('pages', 0)
+                images = stats.get('images', 0)
+                units = pages + images
+                cpu_time = measured.get('cpu_time')
+                result = {
+                    'timestamp': datetime.now().isoformat(timespec='seconds'),
+                    'mode': mode,
+                    'workers': workers,
+                    'latency': latency,
+                    'image_latency': image_latency,
+                    'limit': limit,
+                    'wall_time': round(wall_time, 3),
+                    'pages': pages,
+                    'images': images,
+                    'not_found': stats.get('not_found', 0),
+                    'megabytes': round(stats.get('bytes', 0) / 1024 / 1024, 2),
+                    'pages_per_s': round(pages / wall_time, 1) if wall_time else 0,
+                    'images_per_s': round(images / wall_time, 1) if wall_time else 0,
+                    'cpu_ms_per_item': round(cpu_time / units * 1000, 2) if cpu_time and units else None,
+                    'peak_rss_mb': round(measured['peak_rss_mb'], 1) if measured else None,
+                    'exit_code': process.returncode,
+                }
+                results.append(result)
+
+                if process.returncode:
+                    print(f"  ✗ {mode} zakończony kodem {process.returncode} (szczegóły: --verbose)")
+                print(f"  {mode:<11} wątki {str(workers or 'auto'):>4}  {wall_time:>7.2f} s  "
+                      f"{result['pages_per_s']:>7.1f} stron/s  {result['images_per_s']:>7.1f} zdjęć/s  "
+                      f"CPU {result['cpu_ms_per_item']} ms/szt.  RSS {result['peak_rss_mb']} MB")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return results
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Benchmark scraperów na lokalnej stronie testowej',
+        epilog="""
+Przykłady:
+  # Wszystkie tryby, 300 produktów, opóźnienie 50 ms
+  python benchmark_scraper.py --latency 0.05 --limit 300
+
+  # Porównanie liczby wątków dla stron produktów
+  python benchmark_scraper.py --modes details --workers 4,8,16
+        """
+    )
+
+    parser.add_argument('--modes', default=','.join(MODES),
+                        help='Tryby oddzielone przecinkami (categories,products,details,images)')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Opóźnienie odpowiedzi HTML w sekundach (domyślnie 0.05)')
+    parser.add_argument('--image-latency', type=float,
+                        help='Opóźnienie odpowiedzi ze zdjęciem (domyślnie jak --latency)')
+    parser.add_argument('--limit', type=int,
+                        help='Maksymalna liczba kategorii/produktów w trybie')
+    parser.add_argument('--workers', default='',
+                        help='Liczby wątków do porównania oddzielone przecinkami (domyślnie limit puli)')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Pokaż wyjście scraperów')
+    # Argumenty wewnętrzne - uruchomienie pojedynczego trybu w procesie potomnym
+    parser.add_argument('--run-mode', help=argparse.SUPPRESS)
+    parser.add_argument('--work-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.run_mode:
+        workers = int(args.workers) if args.workers else None
+        measured = run_mode(args.run_mode, args.limit, workers, args.work_dir)
+        with open(args.result, 'w') as f:
+            json.dump(measured, f)
+        return 0
+
+    modes = [m for m in args.modes.split(',') if m]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        print(f" Błąd: Nieznane tryby: {', '.join(sorted(unknown))}")
+        return 1
+    workers_list = [int(w) for w in args.workers.split(',') if w] or [None]
+
+    print(f"\n{'='*70}")
+    print(f"⏱  BENCHMARK SCRAPERÓW")
+    print(f"{'='*70}")
+    print(f"Opóźnienie: {args.latency * 1000:.0f} ms, limit: {args.limit or 'brak'}\n")
+
+    results = benchmark(modes, args.latency, args.image_latency, args.limit, workers_list, args.verbose)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    with open(HISTORY_FILE, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result) + '\n')
+    print(f"\n✓ Wyniki dopisano do {HISTORY_FILE}\n")
+    return 0 if all(r['exit_code'] == 0 for r in results) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
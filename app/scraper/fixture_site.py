@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lokalna strona testowa udająca dobreziele.pl dla scraperów.
+
+Serwuje stronę główną z menu kategorii, strony kategorii, strony produktów
+i zdjęcia w takim układzie HTML, jakiego oczekują category_scraper.py,
+product_scraper.py, product_details_scraper.py i image_downloader.py.
+
+Źródła treści (w kolejności):
+1. nagrane strony z katalogu --recordings (opcja --record pobiera je
+   z prawdziwego sklepu),
+2. strony odtworzone z danych zebranych wcześniej przez scrapery
+   (categories.json, products.json, products_with_details.json),
+3. zdjęcia z app/data/images (brakujące zastępowane wygenerowanym JPEG).
+
+Scrapery kierujemy na stronę testową zmienną środowiskową:
+    SCRAPER_BASE_URL=http://127.0.0.1:8082 python product_scraper.py
+
+Statystyki zapytań: GET /__stats, zerowanie: POST /__reset.
+"""
+
+import html
+import io
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+DEFAULT_RECORDINGS_DIR = DATA_DIR / 'fixtures'
+
+
+def url_path(url: str) -> str:
+    """Zwraca ścieżkę adresu bez parametrów (klucz stron i zdjęć)."""
+    return urlsplit(url).path or '/'
+
+
+def load_json(path: Path):
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def recording_file(recordings_dir: Path, path: str) -> Path:
+    """Zwraca plik nagrania dla ścieżki strony (/ -> index.html)."""
+    return recordings_dir / path.strip('/') / 'index.html'
+
+
+def image_variants(path: str):
+    """Zwraca ścieżki wariantów zdjęcia, o które pyta ImageDownloader."""
+    directory, _, name = path.rpartition('/')
+    if name.startswith('b_shop_'):
+        suffix = name[len('b_shop_'):]
+        return [f"{directory}/{prefix}{suffix}" for prefix in ('o_shop_', 'shop_', 'b_shop_')]
+    return [path]
+
+
+def render_menu(categories) -> str:
+    items = []
+    for category in categories:
+        sub = render_menu(category['subcategories']) if category.get('subcategories') else ''
+        items.append(f'<li><a href="{html.escape(category["url"])}">{html.escape(category["name"])}</a>{sub}</li>')
+    return f"<ul>{''.join(items)}</ul>"
+
+
+def render_page(title: str, body: str) -> bytes:
+    return (f'<!DOCTYPE html><html lang="pl"><head><meta charset="utf-8">'
+            f'<title>{html.escape(title)}</title></head><body>{body}</body></html>').encode('utf-8')
+
+
+def render_category(products) -> str:
+    items = []
+    for product in products:
+        items.append(
+            f'<div class="shop-item">'
+            f'<a href="{html.escape(product["url_produktu"])}" title="{html.escape(product["nazwa"])}">'
+            f'<img src="/img/blank.gif" alt=""></a>'
+            f'<a href="{html.escape(product["url_produktu"])}">{html.escape(product["nazwa"])}</a>'
+            f'<form action="/koszyk" method="post"><input type="hidden" name="id" '
+            f'value="{html.escape(product.get("id_produktu", ""))}"></form>'
+            f'</div>'
+        )
+    return f'<div class="shop-items">{"".join(items)}</div>'
+
+
+def render_product(details) -> str:
+    breadcrumbs = ''.join(f'<a href="#">{html.escape(name)}</a> » '
+                          for name in (details.get('kategoria') or '').split(' > ') if name)
+    images = ''.join(f'<a class="fancybox" href="{html.escape(url)}"><img src="{html.escape(url)}" alt=""></a>'
+                     for url in details.get('zdjecia', []))
+    description = ''.join(f'<p>{html.escape(line)}</p>' for line in (details.get('opis') or '').split('\n'))
+    rows = ''.join(f'<tr><td>{html.escape(key)}:</td><td>{html.escape(value)}</td></tr>'
+                   for key, value in details.get('szczegoly', {}).items())
+    return (
+        f'<h3 class="breadcrumbs">{breadcrumbs}</h3>'
+        f'<h1>{html.escape(details.get("nazwa") or "")}</h1>'
+        f'<div class="picture">{images}</div>'
+        f'<div class="promoprice">{html.escape(details.get("cena") or "")}</div>'
+        f'<p>Marka: <strong><a href="#">{html.escape(details.get("marka") or "")}</a></strong></p>'
+        f'<div class="moredesc">{description}</div>'
+        f'<table>{rows}</table>'
+    )
+
+
+def placeholder_image(size: int = 600) -> bytes:
+    """Tworzy zdjęcie JPEG z szumem (większe niż próg 15 KB ImageDownloadera)."""
+    from PIL import Image
+
+    img = Image.frombytes('RGB', (size, size), random.Random(size).randbytes(size * size * 3))
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class FixtureSite:
+    """Treść strony testowej: mapa ścieżka -> strona HTML lub plik zdjęcia."""
+
+    def __init__(self, data_dir: Path = DATA_DIR, recordings_dir: Path = DEFAULT_RECORDINGS_DIR):
+        self.recordings_dir = recordings_dir
+        self.pages = {}
+        self.images = {}
+        self._placeholder = None
+        self._load(data_dir)
+
+    def _load(self, data_dir: Path):
+        categories = load_json(data_dir / 'categories.json')
+        products = load_json(data_dir / 'products.json')
+        detailed = load_json(data_dir / 'products_with_details.json')
+
+        self.pages['/'] = render_page(
+            'Dobre Ziele', f'<div class="container hidden-xs">{render_menu(categories)}</div>')
+
+        by_category = {}
+        for product in products:
+            by_category.setdefault(url_path(product.get('url_kategorii', '')), []).append(product)
+
+        def add_categories(items):
+            for category in items:
+                path = url_path(category.get('url', '#'))
+                if path != '/':
+                    self.pages[path] = render_page(category['name'],
+                                                   render_category(by_category.get(path, [])))
+                add_categories(category.get('subcategories', []))
+
+        add_categories(categories)
+
+        image_dir = data_dir / 'images'
+        folders = {}
+        if image_dir.exists():
+            folders = {entry.name.split('_', 1)[0]: entry for entry in image_dir.iterdir() if entry.is_dir()}
+
+        for product in detailed:
+            details = product.get('szczegoly_produktu') or {}
+            self.pages[url_path(product['url_produktu'])] = render_page(
+                details.get('nazwa') or '', render_product(details))
+
+            folder = folders.get(product.get('id_produktu', ''))
+            for idx, image_url in enumerate(details.get('zdjecia', []), start=1):
+                name = 'product.jpg' if idx == 1 else f'product_{idx}.jpg'
+                local = folder / name if folder else None
+                for variant in image_variants(url_path(image_url)):
+                    self.images[variant] = local if local and local.exists() else None
+
+    def page(self, path: str):
+        """Zwraca treść strony HTML (nagranie ma pierwszeństwo) lub None."""
+        recorded = recording_file(self.recordings_dir, path)
+        if recorded.exists():
+            return recorded.read_bytes()
+        return self.pages.get(path)
+
+    def image(self, path: str):
+        """Zwraca treść zdjęcia lub None."""
+        if path not in self.images:
+            return None
+        local = self.images[path]
+        if local is not None:
+            return local.read_bytes()
+        if self._placeholder is None:
+            self._placeholder = placeholder_image()
+        return self._placeholder
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Serwer strony testowej z opóźnieniem i statystykami zapytań."""
+
+    daemon_threads = True
+
+    def __init__(self, address, site: FixtureSite, latency: float = 0.0, jitter: float = 0.0,
+                 image_latency: float = None, seed=None):
+        super().__init__(address, FixtureHandler)
+        self.site = site
+        self.latency = latency
+        self.jitter = jitter
+        self.image_latency = latency if image_latency is None else image_latency
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str, amount: int = 1):
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def delay(self, base: float) -> float:
+        with self.random_lock:
+            return base + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Bez tego odpowiedzi keep-alive czekają na opóźnione ACK (algorytm Nagle'a)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_image(self, body: bytes):
+        """Wysyła zdjęcie, z obsługą zapytań Range (bytes=N- i bytes=N-M)."""
+        match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        if not match:
+            self.server.count('bytes', len(body))
+            self._send(200, body, 'image/jpeg', {'Accept-Ranges': 'bytes'})
+            return
+        start = int(match.group(1))
+        end = min(int(match.group(2)), len(body) - 1) if match.group(2) else len(body) - 1
+        if start >= len(body):
+            self._send(416, b'', 'image/jpeg', {'Content-Range': f'bytes */{len(body)}'})
+            return
+        self.server.count('bytes', end + 1 - start)
+        self._send(206, body[start:end + 1], 'image/jpeg',
+                   {'Accept-Ranges': 'bytes', 'Content-Range': f'bytes {start}-{end}/{len(body)}'})
+
+    def do_GET(self):
+        path = url_path(self.path)
+
+        if path == '/__stats':
+            with self.server.stats_lock:
+                payload = dict(self.server.stats)
+            self._send(200, json.dumps(payload).encode('utf-8'), 'application/json')
+            return
+
+        if path in self.server.site.images:
+            time.sleep(self.server.delay(self.server.image_latency))
+            body = self.server.site.image(path)
+            self.server.count('images')
+            self._send_image(body)
+            return
+
+        time.sleep(self.server.delay(self.server.latency))
+        body = self.server.site.page(path)
+        if body is None:
+            self.server.count('not_found')
+            self._send(404, render_page('404', '<h1>Nie znaleziono strony</h1>'), 'text/html; charset=utf-8')
+            return
+        self.server.count('pages')
+        self.server.count('bytes', len(body))
+        self._send(200, body, 'text/html; charset=utf-8')
+
+    def do_POST(self):
+        if url_path(self.path) == '/__reset':
+            with self.server.stats_lock:
+                self.server.stats.clear()
+            self._send(204, b'', 'text/plain')
+            return
+        self._send(405, b'', 'text/plain')
+
+
+def start_server(host='127.0.0.1', port=0, latency=0.0, jitter=0.0, image_latency=None,
+                 recordings_dir=DEFAULT_RECORDINGS_DIR, seed=None):
+    """
+    Uruchamia stronę testową w wątku w tle.
+
+    Args:
+        host: Adres nasłuchiwania
+        port: Port (0 = dowolny wolny)
+        latency: Opóźnienie odpowiedzi HTML w sekundach
+        jitter: Maksymalne dodatkowe losowe opóźnienie w sekundach
+        image_latency: Opóźnienie odpowiedzi ze zdjęciem (None = jak latency)
+        recordings_dir: Katalog z nagranymi stronami
+        seed: Ziarno generatora losowego
+
+    Returns:
+        Obiekt FixtureServer (adres: server.base_url)
+    """
+    site = FixtureSite(recordings_dir=Path(recordings_dir))
+    server = FixtureServer((host, port), site, latency, jitter, image_latency, seed)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def record_pages(recordings_dir: Path, max_products: int = 20) -> int:
+    """
+    Nagrywa stronę główną, strony kategorii i pierwsze produkty z prawdziwego sklepu.
+
+    Returns:
+        Liczba nagranych stron
+    """
+    import http_client
+    from category_scraper import url as home_url
+    from product_scraper import collect_all_categories
+
+    urls = [home_url]
+    categories = load_json(DATA_DIR / 'categories.json')
+    urls.extend(category['url'] for category in collect_all_categories(categories))
+    products = load_json(DATA_DIR / 'products.json')
+    urls.extend(product['url_produktu'] for product in products[:max_products])
+
+    recorded = 0
+    for page_url in urls:
+        try:
+            response = http_client.get(page_url, 'html')
+            response.raise_for_status()
+        except Exception as e:
+            print(f"✗ {page_url}: {e}")
+            continue
+        target = recording_file(recordings_dir, url_path(page_url))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(response.content)
+        recorded += 1
+        print(f"✓ {page_url}")
+    return recorded
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Lokalna strona testowa dla scraperów',
+        epilog="""
+Przykłady:
+  # Strona testowa z opóźnieniem 50 ms
+  python fixture_site.py --latency 0.05
+
+  # Nagranie stron kategorii i 20 produktów z prawdziwego sklepu
+  python fixture_site.py --record 20
+        """
+    )
+
+    parser.add_argument('--host', default='127.0.0.1', help='Adres nasłuchiwania')
+    parser.add_argument('--port', type=int, default=8082, help='Port (domyślnie 8082)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Opóźnienie odpowiedzi HTML w sekundach')
+    parser.add_argument('--image-latency', type=float,
+                        help='Opóźnienie odpowiedzi ze zdjęciem (domyślnie jak --latency)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Dodatkowe losowe opóźnienie w sekundach')
+    parser.add_argument('--recordings', default=str(DEFAULT_RECORDINGS_DIR),
+                        help='Katalog z nagranymi stronami')
+    parser.add_argument('--record', type=int, metavar='N',
+                        help='Nagraj strony z prawdziwego sklepu (N pierwszych produktów) i zakończ')
+
+    args = parser.parse_args()
+
+    if args.record is not None:
+        recorded = record_pages(Path(args.recordings), args.record)
+        print(f"\nNagrano stron: {recorded} ({args.recordings})")
+        return 0
+
+    server = start_server(args.host, args.port, args.latency, args.jitter,
+                          args.image_latency, args.recordings)
+    site = server.site
+    print(f"Strona testowa działa pod adresem: {server.base_url}")
+    print(f"  • Stron: {len(site.pages)}, zdjęć: {len(site.images)}")
+    print(f"  • Użycie: SCRAPER_BASE_URL={server.base_url} python product_scraper.py")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
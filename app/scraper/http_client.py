@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Wspólny klient HTTP dla scraperów.
+
+Wszystkie scrapery i ImageDownloader korzystają z jednej sesji z pulą
+połączeń keep-alive, więc kolejne strony i zdjęcia nie otwierają nowego
+połączenia TCP+TLS. Moduł zapewnia też:
+- wspólne nagłówki i timeouty dla stron HTML i zdjęć,
+- pamięć podręczną DNS (jedno zapytanie o adres hosta na TTL) - włączaną
+  przez skrypty scraperów wywołaniem enable_dns_cache(), bo podmienia
+  socket.getaddrinfo w całym procesie,
+- opcjonalne HTTP/2 (multipleksowanie) dla stron HTML przez bibliotekę httpx,
+  włączane zmienną środowiskową SCRAPER_HTTP2=1,
+- ograniczanie tempa przez adaptacyjny limiter (rate_limiter.py),
+- przekierowanie zapytań do innego adresu sklepu (zmienna SCRAPER_BASE_URL),
+  np. do lokalnej strony testowej fixture_site.py.
+"""
+
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import get_limiter, limited_get, limited_stream
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+SHOP_URL = 'https://dobreziele.pl'
+SHOP_HOSTS = ('dobreziele.pl', 'www.dobreziele.pl')
+
+# Adres, pod który trafiają zapytania do sklepu (domyślnie prawdziwy sklep)
+BASE_URL = os.getenv('SCRAPER_BASE_URL', SHOP_URL).rstrip('/')
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
+
+# Timeout (połączenie, odczyt) w sekundach
+DEFAULT_TIMEOUT = (5, 30)
+
+# Rozmiar puli połączeń - tyle, ile maksymalnie równoległych zapytań dopuszcza limiter
+POOL_SIZE = max(get_limiter('html').max_concurrency, get_limiter('images').max_concurrency)
+
+DNS_CACHE_TTL = 300
+
+KIND_HEADERS = {
+    'html': {
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'pl,en;q=0.8',
+    },
+    'images': {
+        'User-Agent': USER_AGENT,
+        'Accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
+        'Referer': f'{SHOP_URL}/',
+    },
+}
+
+USE_HTTP2 = os.getenv('SCRAPER_HTTP2', '0') == '1'
+
+
+_dns_cache = {}
+_dns_lock = threading.Lock()
+_original_getaddrinfo = socket.getaddrinfo
+
+
+def _cached_getaddrinfo(host, port, *args, **kwargs):
+    """Wersja socket.getaddrinfo zapamiętująca wyniki na DNS_CACHE_TTL sekund."""
+    key = (host, port, args, tuple(sorted(kwargs.items())))
+    now = time.monotonic()
+    with _dns_lock:
+        cached = _dns_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+    result = _original_getaddrinfo(host, port, *args, **kwargs)
+    with _dns_lock:
+        _dns_cache[key] = (now + DNS_CACHE_TTL, result)
+    return result
+
+
+def enable_dns_cache():
+    """
+    Włącza pamięć podręczną DNS dla całego procesu.
+
+    Nie jest wywoływana przy imporcie modułu - włączają ją punkty wejścia
+    scraperów (main), żeby import http_client nie zmieniał rozwiązywania
+    nazw w innych programach.
+    """
+    socket.getaddrinfo = _cached_getaddrinfo
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    # Ponawianiem zajmuje się limiter, więc adapter nie powtarza zapytań sam
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+class _Http2Response:
+    """Odpowiedź httpx z interfejsem odpowiedzi requests używanym przez scrapery."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = response.content
+        self.url = str(response.url)
+        self.encoding = response.encoding
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def iter_content(self, chunk_size: int = 8192):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        self._response.close()
+
+
+class _Http2Session:
+    """Sesja HTTP/2 (httpx) z interfejsem get() zgodnym z requests."""
+
+    def __init__(self):
+        self.client = httpx.Client(
+            http2=True,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+        )
+
+    def get(self, url, headers=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        try:
+            response = self.client.get(url, headers=headers,
+                                       timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+        except httpx.HTTPError as e:
+            # Limiter i scrapery obsługują wyjątki requests
+            raise requests.ConnectionError(str(e)) from e
+        return _Http2Response(response)
+
+
+session = _create_session()
+http2_session = None
+
+if USE_HTTP2:
+    if httpx is None:
+        print("Uwaga: SCRAPER_HTTP2=1, ale brak biblioteki httpx - używam HTTP/1.1")
+    else:
+        try:
+            http2_session = _Http2Session()
+        except ImportError:
+            print("Uwaga: brak pakietu h2 (pip install httpx[http2]) - używam HTTP/1.1")
+
+
+def resolve_url(url: str) -> str:
+    """
+    Zamienia adres sklepu na BASE_URL.
+
+    Dane ze scraperów zawierają adresy https://dobreziele.pl/..., więc
+    przekierowanie odbywa się tutaj, a zapisywane wyniki pozostają takie same
+    jak przy scrapowaniu prawdziwego sklepu.
+    """
+    if BASE_URL == SHOP_URL:
+        return url
+    parts = urlsplit(url)
+    if parts.hostname not in SHOP_HOSTS:
+        return url
+    return BASE_URL + url[len(f"{parts.scheme}://{parts.netloc}"):]
+
+
+def _headers(kind: str, headers: dict = None) -> dict:
+    request_headers = dict(KIND_HEADERS[kind])
+    if headers:
+        request_headers.update(headers)
+    return request_headers
+
+
+def get(url: str, kind: str = 'html', headers: dict = None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    Pobiera adres przez wspólną sesję i limiter danej puli.
+
+    Treść jest pobierana w całości przed zwolnieniem miejsca w limiterze -
+    do pobierania strumieniowego służy stream().
+
+    Args:
+        url: Adres do pobrania
+        kind: Rodzaj zasobu ('html' lub 'images') - wybiera nagłówki i limiter
+        headers: Dodatkowe nagłówki nadpisujące domyślne
+        timeout: Timeout (połączenie, odczyt) w sekundach
+        **kwargs: Dodatkowe argumenty dla get()
+
+    Returns:
+        Obiekt odpowiedzi (requests.Response lub zgodny)
+    """
+    client = http2_session if http2_session is not None and kind == 'html' else session
+    return limited_get(resolve_url(url), kind, session=client, headers=_headers(kind, headers),
+                       timeout=timeout, **kwargs)
+
+
+def stream(url: str, kind: str = 'images', headers: dict = None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    Pobiera adres strumieniowo (zawsze przez HTTP/1.1) - kontekst with.
+
+    Miejsce w limiterze jest zajęte do wyjścia z bloku with, czyli do
+    przeczytania treści lub zamknięcia odpowiedzi (rate_limiter.limited_stream).
+
+    Przykład:
+        with http_client.stream(url, 'images') as response:
+            for chunk in response.iter_content(chunk_size=8192):
+                f.write(chunk)
+
+    Args:
+        url: Adres do pobrania
+        kind: Rodzaj zasobu ('html' lub 'images') - wybiera nagłówki i limiter
+        headers: Dodatkowe nagłówki nadpisujące domyślne
+        timeout: Timeout (połączenie, odczyt) w sekundach
+        **kwargs: Dodatkowe argumenty dla get()
+    """
+    return limited_stream(resolve_url(url), kind, session=session, headers=_headers(kind, headers),
+                          timeout=timeout, **kwargs)
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Wykrywanie prawie identycznych zdjęć produktów (perceptual hash).
+
+Wiele produktów ma to samo zdjęcie opakowania, np. Amanda Despalada 1kg
+i 500g. Skrypt liczy dla każdego zdjęcia w app/data/images dHash i pHash
+(równolegle, w puli procesów) i zapisuje je w trwałym indeksie - przy
+kolejnym uruchomieniu liczone są tylko nowe lub zmienione pliki.
+
+Zdjęcie różnego produktu trafia do grupy pliku wzorcowego, jeśli oba
+hashe różnią się od hashy wzorca o najwyżej --threshold bitów. Podobieństwo
+nie jest przechodnie - każdy członek grupy jest porównywany z wzorcem, a nie
+z innymi członkami. Wynik trafia do pliku duplicates.json: identyczne pliki
+(ta sama suma SHA-1) jako 'duplicates', pozostałe jako 'similar' (tylko do
+przejrzenia). Z identycznych korzysta ImageDownloader (zamiast pobierać
+duplikat, kopiuje plik wzorcowy), a opcja --collapse zastępuje je twardymi
+dowiązaniami do pliku wzorcowego.
+"""
+
+import filecmp
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from image_processor import find_images
+
+DEFAULT_INDEX_FILE = 'app/data/image_hashes.json'
+DEFAULT_DUPLICATES_FILE = 'app/data/duplicates.json'
+DEFAULT_THRESHOLD = 4
+
+HASH_BITS = 64
+
+
+def dhash(img: Image.Image, size: int = 8) -> int:
+    """Hash różnicowy: porównuje jasność sąsiednich pikseli w poziomie."""
+    pixels = np.asarray(img.convert('L').resize((size + 1, size), Image.LANCZOS), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(''.join('1' if b else '0' for b in bits), 2)
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    matrix[0] *= 1 / np.sqrt(2)
+    return matrix * np.sqrt(2 / n)
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def phash(img: Image.Image) -> int:
+    """Hash percepcyjny: znaki niskich częstotliwości DCT względem mediany."""
+    pixels = np.asarray(img.convert('L').resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    dct = _DCT_32 @ pixels @ _DCT_32.T
+    low = dct[:8, :8].flatten()
+    median = np.median(low[1:])
+    bits = low > median
+    return int(''.join('1' if b else '0' for b in bits), 2)
+
+
+def file_sha1(path) -> str:
+    """Suma SHA-1 zawartości pliku."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_image(image_path: str) -> Tuple[str, Optional[str], Optional[str], Optional[str], str]:
+    """
+    Liczy hashe jednego zdjęcia.
+
+    Returns:
+        Krotka (ścieżka, dhash hex, phash hex, sha1 hex, błąd lub '')
+    """
+    try:
+        with Image.open(image_path) as img:
+            img.draft('L', (64, 64))
+            return image_path, f"{dhash(img):016x}", f"{phash(img):016x}", file_sha1(image_path), ''
+    except Exception as e:
+        return image_path, None, None, None, str(e)
+
+
+def load_index(index_file: Path) -> Dict:
+    if index_file.exists():
+        with open(index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_index(index: Dict, index_file: Path):
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_file.with_name(index_file.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, index_file)
+
+
+def update_index(images_dir: Path, index_file: Path, workers: Optional[int] = None) -> Dict:
+    """
+    Aktualizuje indeks hashy - liczy tylko nowe i zmienione zdjęcia.
+
+    Args:
+        images_dir: Katalog ze zdjęciami
+        index_file: Plik indeksu JSON
+        workers: Liczba procesów (None = liczba rdzeni)
+
+    Returns:
+        Indeks {ścieżka względna: {'size', 'mtime', 'dhash', 'phash', 'sha1'}}
+    """
+    old_index = load_index(index_file)
+    index = {}
+    to_hash = []
+
+    for image in find_images(images_dir):
+        relative = image.relative_to(images_dir).as_posix()
+        stat = image.stat()
+        entry = old_index.get(relative)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime and 'sha1' in entry:
+            index[relative] = entry
+        else:
+            to_hash.append((relative, stat))
+
+    print(f" Zdjęć w indeksie: {len(index)}, do przeliczenia: {len(to_hash)}")
+
+    if to_hash:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            paths = [str(images_dir / relative) for relative, _ in to_hash]
+            for (relative, stat), (path, dh, ph, sha1, error) in zip(
+                    to_hash, executor.map(hash_image, paths, chunksize=32)):
+                if error:
+                    print(f"✗ {path}: {error}")
+                    continue
+                index[relative] = {'size': stat.st_size, 'mtime': stat.st_mtime,
+                                   'dhash': dh, 'phash': ph, 'sha1': sha1}
+        save_index(index, index_file)
+
+    return index
+
+
+def _bands(value: int, count: int) -> List[Tuple[int, int]]:
+    """Dzieli hash na count rozłącznych pasm bitów."""
+    width = HASH_BITS // count
+    bands = []
+    for i in range(count):
+        bits = width if i < count - 1 else HASH_BITS - width * (count - 1)
+        bands.append((i, (value >> (i * width)) & ((1 << bits) - 1)))
+    return bands
+
+
+def find_duplicate_groups(index: Dict, threshold: int = DEFAULT_THRESHOLD) -> List[List[str]]:
+    """
+    Grupuje zdjęcia różnych produktów, których dHash i pHash różnią się od
+    hashy pliku wzorcowego grupy o najwyżej threshold bitów.
+
+    Kandydaci są wybierani przez podział pHash na threshold+1 pasm - dwa
+    hashe o odległości <= threshold muszą mieć co najmniej jedno identyczne
+    pasmo, więc nie trzeba porównywać każdej pary. Wzorcem zostaje pierwsze
+    (w kolejności ścieżek) zdjęcie spoza grup, a do grupy trafiają tylko
+    jego bezpośredni sąsiedzi - bez łańcuchów A≈B≈C, w których A i C mogą
+    się znacznie różnić.
+
+    Returns:
+        Lista grup ścieżek względnych (pierwsza ścieżka to plik wzorcowy)
+    """
+    paths = sorted(index)
+    phashes = [int(index[p]['phash'], 16) for p in paths]
+    dhashes = [int(index[p]['dhash'], 16) for p in paths]
+    folders = [p.split('/', 1)[0] for p in paths]
+
+    buckets = {}
+    for i, value in enumerate(phashes):
+        for band in _bands(value, min(threshold + 1, HASH_BITS)):
+            buckets.setdefault(band, []).append(i)
+
+    neighbours = [set() for _ in paths]
+    checked = set()
+    for members in buckets.values():
+        for a_pos, a in enumerate(members):
+            for b in members[a_pos + 1:]:
+                if folders[a] == folders[b] or (a, b) in checked:
+                    continue
+                checked.add((a, b))
+                if ((phashes[a] ^ phashes[b]).bit_count() <= threshold
+                        and (dhashes[a] ^ dhashes[b]).bit_count() <= threshold):
+                    neighbours[a].add(b)
+                    neighbours[b].add(a)
+
+    grouped = set()
+    groups = []
+    for i in range(len(paths)):
+        if i in grouped or not neighbours[i]:
+            continue
+        members = sorted(j for j in neighbours[i] if j not in grouped)
+        if not members:
+            continue
+        grouped.add(i)
+        grouped.update(members)
+        groups.append([paths[i]] + [paths[j] for j in members])
+    return groups
+
+
+def split_identical(group: List[str], index: Dict) -> Tuple[List[str], List[str]]:
+    """
+    Dzieli członków grupy (bez wzorca) na identyczne z wzorcem (ta sama
+    suma SHA-1) i tylko podobne.
+
+    Returns:
+        Krotka (identyczne, podobne)
+    """
+    canonical, *members = group
+    identical = [m for m in members if index[m].get('sha1') and index[m]['sha1'] == index[canonical].get('sha1')]
+    similar = [m for m in members if m not in identical]
+    return identical, similar
+
+
+def collapse_duplicates(groups: List[List[str]], images_dir: Path, index: Dict) -> int:
+    """
+    Zastępuje identyczne duplikaty twardymi dowiązaniami do pliku wzorcowego.
+
+    Zastępowane są tylko pliki o tej samej sumie SHA-1 co wzorzec, a przed
+    zastąpieniem zawartość jest jeszcze porównywana bajt po bajcie - zdjęcia
+    tylko podobne nigdy nie są nadpisywane.
+
+    Returns:
+        Liczba zaoszczędzonych bajtów
+    """
+    saved = 0
+    for group in groups:
+        canonical_path = images_dir / group[0]
+        identical, _ = split_identical(group, index)
+        for duplicate in identical:
+            duplicate_path = images_dir / duplicate
+            if os.path.samefile(canonical_path, duplicate_path):
+                continue
+            if not filecmp.cmp(canonical_path, duplicate_path, shallow=False):
+                continue
+            size = duplicate_path.stat().st_size
+            tmp_path = duplicate_path.with_name(duplicate_path.name + '.tmp')
+            os.link(canonical_path, tmp_path)
+            os.replace(tmp_path, duplicate_path)
+            saved += size
+    return saved
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Wykrywanie prawie identycznych zdjęć różnych produktów',
+        epilog="""
+Przykłady:
+  # Raport duplikatów
+  python image_dedup.py
+
+  # Raport i zastąpienie duplikatów dowiązaniami
+  python image_dedup.py --collapse
+        """
+    )
+
+    parser.add_argument('--input', default='app/data/images',
+                        help='Katalog ze zdjęciami')
+    parser.add_argument('--index', default=DEFAULT_INDEX_FILE,
+                        help='Plik indeksu hashy')
+    parser.add_argument('--duplicates', default=DEFAULT_DUPLICATES_FILE,
+                        help='Plik wynikowy z grupami duplikatów')
+    parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD,
+                        help=f'Maksymalna odległość Hamminga od pliku wzorcowego (domyślnie {DEFAULT_THRESHOLD})')
+    parser.add_argument('--collapse', action='store_true',
+                        help='Zastąp identyczne duplikaty twardymi dowiązaniami do pliku wzorcowego')
+    parser.add_argument('--workers', type=int,
+                        help='Liczba procesów (domyślnie liczba rdzeni)')
+
+    args = parser.parse_args()
+
+    images_dir = Path(args.input)
+    if not images_dir.is_dir():
+        print(f" Błąd: Katalog {args.input} nie istnieje!")
+        return 1
+
+    print(f"\n{'='*70}")
+    print(f"🔍 WYKRYWANIE DUPLIKATÓW ZDJĘĆ")
+    print(f"{'='*70}\n")
+
+    index = update_index(images_dir, Path(args.index), args.workers)
+    groups = find_duplicate_groups(index, args.threshold)
+
+    duplicate_bytes = 0
+    report = {}
+    for group in groups:
+        canonical = group[0]
+        identical, similar = split_identical(group, index)
+        report[canonical] = {'sha1': index[canonical]['sha1'], 'duplicates': identical, 'similar': similar}
+        print(f"\n{canonical}")
+        for duplicate in identical:
+            duplicate_bytes += index[duplicate]['size']
+            print(f"  = {duplicate}")
+        for duplicate in similar:
+            print(f"  ≈ {duplicate}")
+
+    duplicates_file = Path(args.duplicates)
+    with open(duplicates_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n📊 Statystyki:")
+    print(f"  • Zdjęć: {len(index)}")
+    print(f"  • Grup podobnych zdjęć: {len(groups)}")
+    print(f"  • Identycznych duplikatów: {sum(len(r['duplicates']) for r in report.values())} "
+          f"({duplicate_bytes / 1024 / 1024:.1f} MB)")
+    print(f"  • Tylko podobnych: {sum(len(r['similar']) for r in report.values())}")
+    print(f"  • Zapisano: {duplicates_file}")
+
+    if args.collapse:
+        saved = collapse_duplicates(groups, images_dir, index)
+        print(f"  • Zastąpiono dowiązaniami: {saved / 1024 / 1024:.1f} MB")
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generowanie pochodnych WebP (i opcjonalnie AVIF) zdjęć produktów.
+
+Dla każdego zdjęcia pobranego przez ImageDownloader tworzy wersje w każdym
+rozmiarze produktów zdefiniowanym w theme.yml (home_default, large_default...)
+tak samo jak PrestaShop: obraz jest dopasowywany do ramki bez powiększania
+i wyśrodkowany na białym tle.
+
+Struktura wynikowa:
+    app/data/derivatives/<folder_produktu>/<nazwa_zdjecia>-<typ>.webp
+    np. 1423_Aguamate_500g/product-home_default.webp
+
+Pliki trafiają do sklepu skryptem app/import/deploy_image_derivatives.py,
+a szablony motywu serwują je przez <picture>.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+from image_processor import find_images, load_theme_image_types
+
+DEFAULT_OUTPUT_DIR = 'app/data/derivatives'
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+
+def get_product_image_types() -> Dict[str, Tuple[int, int]]:
+    """Zwraca rozmiary obrazów produktów z motywu: {nazwa: (szerokość, wysokość)}."""
+    return {
+        name: (spec['width'], spec['height'])
+        for name, spec in load_theme_image_types().items()
+        if 'products' in spec.get('scope', [])
+    }
+
+
+def fit_to_box(img: Image.Image, width: int, height: int) -> Image.Image:
+    """Dopasowuje obraz do ramki jak PrestaShop (bez powiększania, białe tło)."""
+    img = img.copy()
+    img.thumbnail((width, height), Image.LANCZOS)
+    canvas = Image.new('RGB', (width, height), (255, 255, 255))
+    canvas.paste(img, ((width - img.width) // 2, (height - img.height) // 2))
+    return canvas
+
+
+def derivative_path(output_dir: Path, image_path: Path, input_dir: Path,
+                    type_name: str, fmt: str) -> Path:
+    """Zwraca ścieżkę pliku pochodnego dla danego zdjęcia, rozmiaru i formatu."""
+    relative = image_path.relative_to(input_dir)
+    return output_dir / relative.parent / f"{relative.stem}-{type_name}.{fmt}"
+
+
+def generate_derivatives(image_path: str, targets: List[Tuple[str, int, int, str, int]]) -> Tuple[str, int, str]:
+    """
+    Tworzy pochodne jednego zdjęcia.
+
+    Args:
+        image_path: Ścieżka do zdjęcia źródłowego
+        targets: Lista (ścieżka wynikowa, szerokość, wysokość, format, jakość)
+
+    Returns:
+        Krotka (ścieżka, liczba utworzonych plików, błąd lub '')
+    """
+    created = 0
+    try:
+        with Image.open(image_path) as img:
+            img = ImageOps.exif_transpose(img).convert('RGB')
+            for output_path, width, height, fmt, quality in targets:
+                output = Path(output_path)
+                output.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = output.with_name(output.name + '.tmp')
+                fit_to_box(img, width, height).save(tmp_path, fmt.upper(), quality=quality)
+                os.replace(tmp_path, output)
+                created += 1
+    except Exception as e:
+        return image_path, created, str(e)
+    return image_path, created, ''
+
+
+def process_directory(input_dir: str, output_dir: str = DEFAULT_OUTPUT_DIR,
+                      formats: Tuple[str, ...] = ('webp',), force: bool = False,
+                      workers: Optional[int] = None) -> Dict:
+    """
+    Generuje brakujące lub nieaktualne pochodne dla wszystkich zdjęć.
+
+    Args:
+        input_dir: Katalog ze zdjęciami (np. app/data/images)
+        output_dir: Katalog na pliki pochodne
+        formats: Formaty do wygenerowania ('webp', 'avif')
+        force: Czy generować ponownie istniejące pliki
+        workers: Liczba procesów (None = liczba rdzeni)
+
+    Returns:
+        Słownik ze statystykami
+    """
+    input_path = Path(input_dir)
+    output_path = Path(output_dir)
+    image_types = get_product_image_types()
+    quality = {'webp': WEBP_QUALITY, 'avif': AVIF_QUALITY}
+
+    jobs = []
+    skipped = 0
+    for image in find_images(input_path):
+        source_mtime = image.stat().st_mtime
+        targets = []
+        for type_name, (width, height) in image_types.items():
+            for fmt in formats:
+                target = derivative_path(output_path, image, input_path, type_name, fmt)
+                # Plik pochodny jest aktualny, jeśli jest nowszy od źródła
+                if not force and target.exists() and target.stat().st_mtime >= source_mtime:
+                    skipped += 1
+                    continue
+                targets.append((str(target), width, height, fmt, quality[fmt]))
+        if targets:
+            jobs.append((str(image), targets))
+
+    stats = {'created': 0, 'skipped': skipped, 'errors': 0}
+
+    print(f" Rozmiary: {', '.join(image_types)}")
+    print(f" Formaty: {', '.join(formats)}")
+    print(f" Zdjęć do przetworzenia: {len(jobs)}\n")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(generate_derivatives,
+                               [image for image, _ in jobs],
+                               [targets for _, targets in jobs],
+                               chunksize=8)
+        for idx, (path, created, error) in enumerate(results, start=1):
+            stats['created'] += created
+            if error:
+                stats['errors'] += 1
+                print(f"✗ {path}: {error}")
+            if idx % 200 == 0:
+                print(f"[{idx}/{len(jobs)}] przetworzono")
+
+    return stats
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Generowanie pochodnych WebP/AVIF zdjęć produktów dla motywu sklepu',
+        epilog="""
+Przykłady:
+  # Tylko WebP
+  python image_derivatives.py
+
+  # WebP i AVIF
+  python image_derivatives.py --avif
+        """
+    )
+
+    parser.add_argument('--input', default='app/data/images',
+                        help='Katalog ze zdjęciami')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_DIR,
+                        help='Katalog na pliki pochodne')
+    parser.add_argument('--avif', action='store_true',
+                        help='Generuj także pliki AVIF')
+    parser.add_argument('--force', action='store_true',
+                        help='Generuj ponownie istniejące pliki')
+    parser.add_argument('--workers', type=int,
+                        help='Liczba procesów (domyślnie liczba rdzeni)')
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input):
+        print(f" Błąd: Katalog {args.input} nie istnieje!")
+        return 1
+
+    formats = ['webp']
+    if args.avif:
+        if features.check('avif'):
+            formats.append('avif')
+        else:
+            print(" Uwaga: Pillow nie obsługuje AVIF w tym środowisku - generuję tylko WebP")
+
+    print(f"\n{'='*70}")
+    print(f"🖼  GENEROWANIE POCHODNYCH ZDJĘĆ")
+    print(f"{'='*70}\n")
+
+    stats = process_directory(args.input, args.output, tuple(formats), args.force, args.workers)
+
+    print(f"\n📊 Statystyki:")
+    print(f"  • Utworzono plików: {stats['created']}")
+    print(f"  • Aktualnych (pominięto): {stats['skipped']}")
+    print(f"  • Błędów: {stats['errors']}\n")
+    return 0 if stats['errors'] == 0 else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -10,25 +10,67 @@ Zgodny z wymaganiami:
 - Organizuje obrazy według kategorii i produktów
 """
 
+import hashlib
 import json
 import os
-import requests
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse
-import time
 from typing import Dict, List, Optional
 import re
+from PIL import Image
+import http_client
+from image_dedup import file_sha1
+from rate_limiter import get_limiter
+
+CHUNK_SIZE = 8192
+# Liczba wątków pobierających - niezależna od limitera, który sam ogranicza
+# liczbę równoległych transferów. Nadmiarowe wątki czekają w limiterze albo
+# sprawdzają i zapisują już pobrane pliki, nie zajmując miejsca w puli.
+DEFAULT_WORKERS = 32
+CONTENT_RANGE_RE = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+
+
+def part_path(output_path: Path, url: str) -> Path:
+    """
+    Ścieżka pliku tymczasowego pobierania.
+
+    Nazwa zawiera skrót adresu, żeby przerwane pobieranie jednego wariantu
+    (np. o_shop_) nie zostało wznowione bajtami innego wariantu.
+    """
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]
+    return output_path.with_name(f"{output_path.name}.{digest}.part")
+
+
+def is_valid_image(path: Path) -> bool:
+    """
+    Sprawdza, czy plik jest kompletnym, dekodowalnym obrazem.
+
+    JPEG jest dekodowany w trybie draft (skala 1/8), co jest dużo szybsze
+    od pełnego dekodowania, a obcięty plik i tak kończy się błędem.
+    """
+    try:
+        with Image.open(path) as img:
+            img.draft('RGB', (max(1, img.width // 8), max(1, img.height // 8)))
+            img.load()
+        return True
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return False
 
 
 class ImageDownloader:
     """Klasa do pobierania i zarządzania zdjęciami produktów."""
     
-    def __init__(self, output_dir: str = "app/data/images"):
+    def __init__(self, output_dir: str = "app/data/images", duplicates_file: Optional[str] = None):
         """
         Inicjalizacja downloadera.
         
         Args:
             output_dir: Katalog główny dla pobranych obrazów
+            duplicates_file: Plik z grupami duplikatów z image_dedup.py
+                             (domyślnie duplicates.json obok katalogu zdjęć)
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -37,14 +79,52 @@ class ImageDownloader:
             'total_products': 0,
             'downloaded_images': 0,
             'failed_downloads': 0,
-            'skipped_existing': 0
+            'skipped_existing': 0,
+            'linked_duplicates': 0,
+            'resumed_downloads': 0
         }
+        self._stats_lock = threading.Lock()
         
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36',
-            'Accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
-            'Referer': 'https://dobreziele.pl/'
-        }
+        # Mapa: ścieżka duplikatu -> (ścieżka pliku wzorcowego względem output_dir, SHA-1 wzorca).
+        # Tylko identyczne pliki ('duplicates') - zdjęcia podobne ('similar') są pobierane.
+        self.duplicates = {}
+        duplicates_path = Path(duplicates_file) if duplicates_file else self.output_dir.parent / 'duplicates.json'
+        if duplicates_path.exists():
+            with open(duplicates_path, 'r', encoding='utf-8') as f:
+                for canonical, group in json.load(f).items():
+                    # Stary format (lista) grupował także zdjęcia tylko podobne
+                    if not isinstance(group, dict):
+                        continue
+                    for duplicate in group['duplicates']:
+                        self.duplicates[duplicate] = (canonical, group['sha1'])
+    
+    def _count(self, key: str):
+        """Zwiększa licznik statystyk (bezpiecznie dla wielu wątków)."""
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def link_duplicate(self, output_path: Path) -> bool:
+        """
+        Tworzy znany duplikat z pliku wzorcowego zamiast go pobierać.
+        
+        Plik wzorcowy jest używany tylko wtedy, gdy jego suma SHA-1 nadal
+        zgadza się z zapisaną przez image_dedup.py.
+        
+        Returns:
+            True jeśli plik utworzono z pliku wzorcowego
+        """
+        entry = self.duplicates.get(output_path.relative_to(self.output_dir).as_posix())
+        if not entry:
+            return False
+        canonical, sha1 = entry
+        canonical_path = self.output_dir / canonical
+        if not canonical_path.exists() or file_sha1(canonical_path) != sha1:
+            return False
+        try:
+            os.link(canonical_path, output_path)
+        except OSError:
+            shutil.copyfile(canonical_path, output_path)
+        return True
     
     def sanitize_filename(self, name: str) -> str:
         """Oczyszcza nazwę pliku z niedozwolonych znaków."""
@@ -76,39 +156,71 @@ class ImageDownloader:
     def download_image(self, url: str, output_path: Path, min_size_kb: int = 15) -> bool:
         """
         Pobiera obraz z URL.
-        
+
+        Plik jest zapisywany jako .part i przenoszony na miejsce (os.replace)
+        dopiero po sprawdzeniu długości z nagłówków i dekodowania obrazu, więc
+        przerwane pobieranie nie zostawia uciętego product.jpg. Istniejący
+        plik .part jest wznawiany zapytaniem Range; uszkodzony jest usuwany.
+
         Args:
             url: URL obrazu
             output_path: Ścieżka zapisu
             min_size_kb: Minimalny rozmiar w KB
-            
+
         Returns:
             True jeśli sukces
         """
+        temp_path = part_path(output_path, url)
+        offset = temp_path.stat().st_size if temp_path.exists() else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else None
+
         try:
-            response = requests.get(url, headers=self.headers, timeout=30, stream=True)
-            
-            if response.status_code == 200:
-                content_length = int(response.headers.get('content-length', 0))
-                
-                if content_length < min_size_kb * 1024:
+            with http_client.stream(url, 'images', headers=headers) as response:
+                if response.status_code == 206:
+                    match = CONTENT_RANGE_RE.match(response.headers.get('content-range', ''))
+                    if not match or int(match.group(1)) != offset:
+                        # Serwer zwrócił inny fragment niż prosiliśmy - od nowa przy następnej próbie
+                        temp_path.unlink()
+                        return False
+                    expected_size = int(match.group(3)) if match.group(3) != '*' else None
+                    mode = 'ab'
+                    self._count('resumed_downloads')
+                elif response.status_code == 200:
+                    # Serwer bez obsługi Range wysyła cały plik
+                    expected_size = int(response.headers.get('content-length', 0)) or None
+                    mode = 'wb'
+                elif response.status_code == 416 and offset:
+                    # Plik .part jest już kompletny (przerwano przed zmianą nazwy)
+                    expected_size = None
+                    mode = None
+                else:
                     return False
-                
-                with open(output_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                
-                file_size = output_path.stat().st_size
-                if file_size < min_size_kb * 1024:
-                    output_path.unlink()
+
+                if expected_size is not None and expected_size < min_size_kb * 1024:
+                    temp_path.unlink(missing_ok=True)
                     return False
-                
-                print(f"✓ {output_path.name} ({file_size / 1024:.1f} KB)")
-                return True
-            
-            return False
-                
+
+                if mode:
+                    with open(temp_path, mode) as f:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            f.write(chunk)
+
+            file_size = temp_path.stat().st_size
+            if expected_size is not None and file_size < expected_size:
+                print(f"✗ {output_path.name}: pobrano {file_size / 1024:.1f} z "
+                      f"{expected_size / 1024:.1f} KB (zostanie wznowione)")
+                return False
+            if (expected_size is not None and file_size != expected_size) \
+                    or file_size < min_size_kb * 1024 or not is_valid_image(temp_path):
+                temp_path.unlink()
+                return False
+
+            os.replace(temp_path, output_path)
+            print(f"✓ {output_path.name} ({file_size / 1024:.1f} KB)")
+            return True
+
         except Exception as e:
+            # Częściowy plik .part zostaje do wznowienia
             print(f"✗ Błąd: {e}")
             return False
     
@@ -155,16 +267,24 @@ class ImageDownloader:
             if output_path.exists() and not force:
                 file_size = output_path.stat().st_size
                 skipped_count += 1
-                self.stats['skipped_existing'] += 1
+                self._count('skipped_existing')
+                continue
+
+            if not output_path.exists() and self.link_duplicate(output_path):
+                skipped_count += 1
+                self._count('linked_duplicates')
                 continue
 
             success = False
             for variant_url in variants:
                 if self.download_image(variant_url, output_path):
+                    # Porzucone pliki .part innych wariantów nie są już potrzebne
+                    for stale in product_dir.glob(f"{output_path.name}.*.part"):
+                        stale.unlink(missing_ok=True)
                     if idx > 1:
                         print(f"  ✓ Zdjęcie {idx}/{len(image_urls)}")
                     downloaded_count += 1
-                    self.stats['downloaded_images'] += 1
+                    self._count('downloaded_images')
                     success = True
                     break
 
@@ -172,7 +292,7 @@ class ImageDownloader:
                 if idx > 1:
                     print(f"  ✗ Nie udało się pobrać zdjęcia {idx}/{len(image_urls)}")
                 failed_count += 1
-                self.stats['failed_downloads'] += 1
+                self._count('failed_downloads')
 
         if downloaded_count == 0 and skipped_count == 0:
             print(f"⊙ Wszystkie zdjęcia już pobrane ({len(image_urls)} szt.)")
@@ -188,14 +308,18 @@ class ImageDownloader:
         return True
 
     def process_products_file(self, json_file: str, max_products: Optional[int] = None,
-                             force: bool = False):
+                             force: bool = False, workers: Optional[int] = None):
         """
         Przetwarza plik JSON i pobiera zdjęcia.
         
+        Produkty są przetwarzane równolegle, a tempo pobierania reguluje
+        adaptacyjny limiter puli 'images' (rate_limiter.py).
+        
         Args:
             json_file: Plik JSON z produktami
             max_products: Limit produktów (None = wszystkie)
             force: Czy nadpisać istniejące
+            workers: Liczba wątków (None = DEFAULT_WORKERS)
         """
         print(f"\n{'='*70}")
         print(f"📥 POBIERANIE ZDJĘĆ PRODUKTÓW")
@@ -212,22 +336,29 @@ class ImageDownloader:
         print(f" Produktów: {len(products)}")
         print(f" Katalog: {self.output_dir.absolute()}\n")
         
-        for idx, product in enumerate(products, start=1):
+        limiter = get_limiter('images')
+        if workers is None:
+            workers = DEFAULT_WORKERS
+        
+        def process(item):
+            idx, product = item
             product_name = product.get('nazwa', 'unknown')
             product_id = product.get('id_produktu', 'unknown')
             
             print(f"[{idx}/{len(products)}] {product_name} (ID: {product_id})")
             self.download_product_image(product, force)
-            
-            time.sleep(0.1)  # Przerwa między requestami
-            
-            if idx % 20 == 0:
-                self.print_stats(True)
+            return idx
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for idx in executor.map(process, enumerate(products, start=1)):
+                if idx % 20 == 0:
+                    self.print_stats(True)
         
         print(f"\n{'='*70}")
         print(f"✓ ZAKOŃCZONO")
         print(f"{'='*70}\n")
         self.print_stats()
+        print(f"  {limiter.summary()}\n")
     
     def print_stats(self, interim: bool = False):
         """Wyświetla statystyki."""
@@ -237,6 +368,8 @@ class ImageDownloader:
         print(f"  • Produktów: {self.stats['total_products']}")
         print(f"  • Pobrano: {self.stats['downloaded_images']}")
         print(f"  • Pominięto: {self.stats['skipped_existing']}")
+        print(f"  • Wznowiono: {self.stats['resumed_downloads']}")
+        print(f"  • Duplikaty z pliku wzorcowego: {self.stats['linked_duplicates']}")
         print(f"  • Błędów: {self.stats['failed_downloads']}\n")
 
 
@@ -256,6 +389,9 @@ Przykłady:
   
   # Nadpisz istniejące
   python image_downloader.py --force
+  
+  # Pobierz i od razu zoptymalizuj zdjęcia przed wgraniem
+  python image_downloader.py --optimize
         """
     )
     
@@ -267,6 +403,11 @@ Przykłady:
                        help='Maksymalna liczba produktów')
     parser.add_argument('--force', action='store_true',
                        help='Nadpisz istniejące pliki')
+    parser.add_argument('--workers', type=int,
+                       help=f'Liczba wątków pobierających (domyślnie {DEFAULT_WORKERS}; '
+                            f'równoległe transfery ogranicza limiter)')
+    parser.add_argument('--optimize', action='store_true',
+                       help='Po pobraniu zmniejsz i zoptymalizuj zdjęcia (image_processor.py)')
     
     args = parser.parse_args()
     
@@ -274,10 +415,14 @@ Przykłady:
         print(f" Błąd: Plik {args.input} nie istnieje!")
         return 1
     
+    http_client.enable_dns_cache()
     downloader = ImageDownloader(output_dir=args.output)
     
     try:
-        downloader.process_products_file(args.input, args.max_products, args.force)
+        downloader.process_products_file(args.input, args.max_products, args.force, args.workers)
+        if args.optimize:
+            from image_processor import process_directory, print_stats
+            print_stats(process_directory(args.output))
         return 0
     except KeyboardInterrupt:
         print("\n\n Przerwano")
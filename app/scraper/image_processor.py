@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Przygotowanie pobranych zdjęć produktów przed wgraniem do PrestaShop.
+
+Dla każdego zdjęcia:
+- zmniejsza je do największego rozmiaru wyświetlanego przez motyw
+  (large_default z app/shop/classic/config/theme.yml),
+- usuwa metadane EXIF (po uwzględnieniu orientacji),
+- zapisuje jako progresywny JPEG o zadanej jakości,
+- pomija pliki, które już spełniają te warunki.
+
+Zdjęcia są przetwarzane równolegle w puli procesów. Przy przetwarzaniu
+w miejscu wynik każdego pliku (także oryginału zostawionego, bo ponowne
+kodowanie go nie zmniejszyło) trafia do indeksu processed_images.json obok
+katalogu zdjęć - kolejne uruchomienia pomijają niezmienione pliki bez
+dekodowania.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+THEME_CONFIG = Path(__file__).resolve().parent.parent / 'shop' / 'classic' / 'config' / 'theme.yml'
+DEFAULT_IMAGE_TYPE = 'large_default'
+DEFAULT_MAX_SIZE = 800
+DEFAULT_QUALITY = 85
+
+# Wynik jest zawsze zapisywany jako JPEG pod tą samą nazwą, więc przetwarzamy
+# tylko pliki .jpg (tak zapisuje je ImageDownloader)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg')
+
+
+def load_theme_image_types(theme_config: Path = THEME_CONFIG) -> Dict[str, Dict]:
+    """
+    Odczytuje rozmiary obrazów zdefiniowane w theme.yml motywu.
+
+    Args:
+        theme_config: Ścieżka do pliku theme.yml
+
+    Returns:
+        Słownik {nazwa: {'width': int, 'height': int, 'scope': [..]}}
+        (pusty jeśli pliku nie ma)
+    """
+    if not theme_config.exists():
+        return {}
+
+    image_types = {}
+    current = None
+    in_section = False
+    for line in theme_config.read_text(encoding='utf-8').splitlines():
+        if re.match(r'^\s{2}image_types:\s*$', line):
+            in_section = True
+            continue
+        if not in_section:
+            continue
+        if line.strip() and not line.startswith('    '):
+            break
+        name_match = re.match(r'^\s{4}(\w+):\s*$', line)
+        value_match = re.match(r'^\s{6}(width|height|scope):\s*(.+)$', line)
+        if name_match:
+            current = image_types.setdefault(name_match.group(1), {})
+        elif value_match and current is not None:
+            key, value = value_match.groups()
+            if key == 'scope':
+                current[key] = [s.strip() for s in value.strip('[] ').split(',')]
+            else:
+                current[key] = int(value)
+    return image_types
+
+
+def get_max_display_size() -> int:
+    """Zwraca największy bok obrazu wyświetlanego przez motyw (large_default)."""
+    image_type = load_theme_image_types().get(DEFAULT_IMAGE_TYPE)
+    if not image_type:
+        return DEFAULT_MAX_SIZE
+    return max(image_type.get('width', 0), image_type.get('height', 0)) or DEFAULT_MAX_SIZE
+
+
+def _is_optimal(img: Image.Image, max_size: int) -> bool:
+    """Sprawdza czy obraz jest już progresywnym JPEG bez EXIF w docelowym rozmiarze."""
+    return (img.format == 'JPEG'
+            and max(img.size) <= max_size
+            and 'exif' not in img.info
+            and bool(img.info.get('progressive') or img.info.get('progression')))
+
+
+def process_image(image_path: str, max_size: int = DEFAULT_MAX_SIZE,
+                  quality: int = DEFAULT_QUALITY,
+                  output_path: Optional[str] = None) -> Tuple[str, str, int, int]:
+    """
+    Normalizuje pojedyncze zdjęcie.
+
+    Args:
+        image_path: Ścieżka do zdjęcia źródłowego
+        max_size: Maksymalny bok obrazu w pikselach
+        quality: Jakość JPEG (1-95)
+        output_path: Ścieżka wynikowa (None = nadpisanie pliku źródłowego)
+
+    Returns:
+        Krotka (ścieżka, status, rozmiar przed, rozmiar po), gdzie status to
+        'processed', 'skipped' lub 'error: ...'
+    """
+    source = Path(image_path)
+    target = Path(output_path) if output_path else source
+    size_before = source.stat().st_size
+
+    try:
+        with Image.open(source) as img:
+            if _is_optimal(img, max_size):
+                if target != source:
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    target.write_bytes(source.read_bytes())
+                return str(source), 'skipped', size_before, size_before
+
+            needs_resize = max(img.size) > max_size
+            img = ImageOps.exif_transpose(img)
+
+            if img.mode in ('RGBA', 'LA', 'P'):
+                img = img.convert('RGBA')
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                background.paste(img, mask=img.split()[-1])
+                img = background
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
+
+            if needs_resize:
+                img.thumbnail((max_size, max_size), Image.LANCZOS)
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(target.name + '.tmp')
+            # Bez parametru exif= Pillow nie zapisuje metadanych
+            img.save(tmp_path, 'JPEG', quality=quality, optimize=True, progressive=True)
+    except Exception as e:
+        return str(source), f'error: {e}', size_before, size_before
+
+    size_after = tmp_path.stat().st_size
+    if not needs_resize and size_after >= size_before and target == source:
+        # Ponowne kodowanie nic nie daje - zostawiamy oryginał
+        tmp_path.unlink()
+        return str(source), 'skipped', size_before, size_before
+
+    os.replace(tmp_path, target)
+    return str(source), 'processed', size_before, size_after
+
+
+def load_processed_index(index_file: Path) -> Dict:
+    """Wczytuje indeks przetworzonych zdjęć {ścieżka względna: {size, mtime, max_size, quality}}."""
+    if index_file.exists():
+        with open(index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_processed_index(index: Dict, index_file: Path):
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_file.with_name(index_file.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, index_file)
+
+
+def find_images(input_dir: Path):
+    """Zwraca posortowaną listę zdjęć w katalogu (rekurencyjnie)."""
+    return sorted(p for p in input_dir.rglob('*')
+                  if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def process_directory(input_dir: str, output_dir: Optional[str] = None,
+                      max_size: Optional[int] = None, quality: int = DEFAULT_QUALITY,
+                      workers: Optional[int] = None, index_file: Optional[str] = None) -> Dict:
+    """
+    Przetwarza wszystkie zdjęcia w katalogu w puli procesów.
+
+    Args:
+        input_dir: Katalog ze zdjęciami (np. app/data/images)
+        output_dir: Katalog wynikowy (None = przetwarzanie w miejscu)
+        max_size: Maksymalny bok obrazu (None = rozmiar large_default z motywu)
+        quality: Jakość JPEG
+        workers: Liczba procesów (None = liczba rdzeni)
+        index_file: Indeks przetworzonych zdjęć (None = processed_images.json
+                    obok katalogu zdjęć); używany tylko przy przetwarzaniu w miejscu
+
+    Returns:
+        Słownik ze statystykami
+    """
+    input_path = Path(input_dir)
+    if max_size is None:
+        max_size = get_max_display_size()
+
+    all_images = find_images(input_path)
+    stats = {'processed': 0, 'skipped': 0, 'errors': 0, 'bytes_before': 0, 'bytes_after': 0}
+
+    index_path = None
+    index = {}
+    if not output_dir:
+        index_path = Path(index_file) if index_file else input_path.parent / 'processed_images.json'
+        old_index = load_processed_index(index_path)
+    images = []
+    for img in all_images:
+        if index_path is None:
+            images.append(img)
+            continue
+        relative = img.relative_to(input_path).as_posix()
+        stat = img.stat()
+        entry = old_index.get(relative)
+        if entry == {'size': stat.st_size, 'mtime': stat.st_mtime, 'max_size': max_size, 'quality': quality}:
+            index[relative] = entry
+            stats['skipped'] += 1
+            stats['bytes_before'] += stat.st_size
+            stats['bytes_after'] += stat.st_size
+        else:
+            images.append(img)
+
+    print(f" Zdjęć: {len(all_images)} (z indeksu pominięto: {len(all_images) - len(images)})")
+    print(f" Maksymalny rozmiar: {max_size}px, jakość: {quality}\n")
+
+    outputs = [
+        str(Path(output_dir) / img.relative_to(input_path)) if output_dir else None
+        for img in images
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(process_image, map(str, images),
+                               [max_size] * len(images), [quality] * len(images),
+                               outputs, chunksize=16)
+
+        for idx, (path, status, before, after) in enumerate(results, start=1):
+            stats['bytes_before'] += before
+            stats['bytes_after'] += after
+            if status == 'processed':
+                stats['processed'] += 1
+            elif status == 'skipped':
+                stats['skipped'] += 1
+            else:
+                stats['errors'] += 1
+                print(f"✗ {path}: {status}")
+
+            if index_path is not None and status in ('processed', 'skipped'):
+                stat = os.stat(path)
+                index[Path(path).relative_to(input_path).as_posix()] = {
+                    'size': stat.st_size, 'mtime': stat.st_mtime, 'max_size': max_size, 'quality': quality}
+
+            if idx % 200 == 0:
+                print(f"[{idx}/{len(images)}] przetworzono")
+
+    if index_path is not None:
+        save_processed_index(index, index_path)
+    return stats
+
+
+def print_stats(stats: Dict):
+    """Wyświetla statystyki przetwarzania."""
+    before_mb = stats['bytes_before'] / 1024 / 1024
+    after_mb = stats['bytes_after'] / 1024 / 1024
+    print(f"\n📊 Statystyki:")
+    print(f"  • Przetworzono: {stats['processed']}")
+    print(f"  • Pominięto (już optymalne): {stats['skipped']}")
+    print(f"  • Błędów: {stats['errors']}")
+    print(f"  • Rozmiar: {before_mb:.1f} MB → {after_mb:.1f} MB\n")
+
+
+def main():
+    """Główna funkcja."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Zmniejszanie i optymalizacja zdjęć produktów przed wgraniem',
+        epilog="""
+Przykłady:
+  # Przetwarzanie w miejscu z domyślnymi ustawieniami
+  python image_processor.py
+
+  # Zapis do osobnego katalogu z niższą jakością
+  python image_processor.py --output app/data/images_optimized --quality 80
+        """
+    )
+
+    parser.add_argument('--input', default='app/data/images',
+                        help='Katalog ze zdjęciami')
+    parser.add_argument('--output',
+                        help='Katalog wynikowy (domyślnie nadpisuje pliki źródłowe)')
+    parser.add_argument('--max-size', type=int,
+                        help='Maksymalny bok obrazu w px (domyślnie large_default z motywu)')
+    parser.add_argument('--quality', type=int, default=DEFAULT_QUALITY,
+                        help='Jakość JPEG (domyślnie 85)')
+    parser.add_argument('--workers', type=int,
+                        help='Liczba procesów (domyślnie liczba rdzeni)')
+    parser.add_argument('--index',
+                        help='Indeks przetworzonych zdjęć (domyślnie processed_images.json obok katalogu zdjęć)')
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.input):
+        print(f" Błąd: Katalog {args.input} nie istnieje!")
+        return 1
+
+    print(f"\n{'='*70}")
+    print(f"🖼  OPTYMALIZACJA ZDJĘĆ PRODUKTÓW")
+    print(f"{'='*70}\n")
+
+    stats = process_directory(args.input, args.output, args.max_size, args.quality, args.workers, args.index)
+    print_stats(stats)
+    return 0 if stats['errors'] == 0 else 1
+
+
+if __name__ == "__main__":
+    exit(main())
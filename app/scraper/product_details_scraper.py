@@ -1,12 +1,11 @@
-import requests
 from bs4 import BeautifulSoup
 import re
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict
-
-
-headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+import http_client
+from rate_limiter import get_limiter
 
 
 def scrape_product_details(product_url: str) -> Dict:
@@ -27,7 +26,7 @@ def scrape_product_details(product_url: str) -> Dict:
         - szczegoly: dodatkowe szczegóły (skład, kraj pochodzenia, etc.)
     """
     try:
-        response = requests.get(product_url, headers=headers)
+        response = http_client.get(product_url, 'html')
         response.raise_for_status()
         response.encoding = 'utf-8'
 
@@ -110,15 +109,18 @@ def scrape_product_details(product_url: str) -> Dict:
         return None
 
 
-def scrape_all_products(products_file: str, output_file: str, delay: float = 1.0):
+def scrape_all_products(products_file: str, output_file: str, max_workers: int = None):
     """
     Scrapuje szczegóły wszystkich produktów z pliku products.json
 
+    Tempo zapytań nie jest stałe - dobiera je adaptacyjny limiter puli 'html'
+    (rate_limiter.py), który przyspiesza, dopóki serwer odpowiada szybko,
+    i zwalnia po 429/503 lub wzroście czasu odpowiedzi.
+
     Args:
         products_file: Ścieżka do pliku JSON z listą produktów
         output_file: Ścieżka do pliku wyjściowego z szczegółami produktów
-        delay: Opóźnienie między requestami w sekundach (domyślnie 1.0)
-        max_products: Maksymalna liczba produktów do przetworzenia (None = wszystkie)
+        max_workers: Liczba wątków roboczych (None = maksymalny limit puli 'html')
 
     Returns:
         Lista produktów z szczegółami
@@ -146,29 +148,40 @@ def scrape_all_products(products_file: str, output_file: str, delay: float = 1.0
     enriched_products = []
     failed_products = []
 
-    start_time = time.time()
+    limiter = get_limiter('html')
+    if max_workers is None:
+        max_workers = limiter.max_concurrency
 
-    for i, product in enumerate(products, 1):
+    def fetch(product):
         product_url = product.get('url_produktu')
         if not product_url:
-            print(f"[{i}/{len(products)}] Brak URL dla produktu, pomijam")
-            failed_products.append({
-                'product': product,
-                'error': 'Brak URL'
-            })
-            continue
+            return None
+        return scrape_product_details(product_url)
+
+    start_time = time.time()
 
-        if i % 50 == 0 or i == 1:
-            elapsed = time.time() - start_time
-            rate = i / elapsed if elapsed > 0 else 0
-            remaining = (len(products) - i) / rate if rate > 0 else 0
-            print(f"\n[{i}/{len(products)}] Postęp: {i/len(products)*100:.1f}% | "
-                  f"Tempo: {rate:.2f} prod/s | Pozostało: ~{remaining/60:.0f} min\n")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # map zachowuje kolejność produktów z pliku wejściowego
+        results = executor.map(fetch, products)
 
-        print(f"[{i}/{len(products)}] Scrapuję: {product.get('nazwa', 'Unknown')}...")
+        for i, (product, details) in enumerate(zip(products, results), 1):
+            if not product.get('url_produktu'):
+                print(f"[{i}/{len(products)}] Brak URL dla produktu, pomijam")
+                failed_products.append({
+                    'product': product,
+                    'error': 'Brak URL'
+                })
+                continue
 
-        try:
-            details = scrape_product_details(product_url)
+            if i % 50 == 0 or i == 1:
+                elapsed = time.time() - start_time
+                rate = i / elapsed if elapsed > 0 else 0
+                remaining = (len(products) - i) / rate if rate > 0 else 0
+                print(f"\n[{i}/{len(products)}] Postęp: {i/len(products)*100:.1f}% | "
+                      f"Tempo: {rate:.2f} prod/s | Pozostało: ~{remaining/60:.0f} min | "
+                      f"Limit równoległości: {limiter.limit:.1f}\n")
+
+            print(f"[{i}/{len(products)}] Scrapuję: {product.get('nazwa', 'Unknown')}...")
 
             if details and details.get('nazwa'):
                 enriched_product = {
@@ -184,19 +197,10 @@ def scrape_all_products(products_file: str, output_file: str, delay: float = 1.0
                     'error': 'Brak danych ze strony'
                 })
 
-            if i < len(products):
-                time.sleep(delay)
-
-        except Exception as e:
-            print(f"    ✗ Błąd: {e}")
-            failed_products.append({
-                'product': product,
-                'error': str(e)
-            })
-
     print(f"\n=== Podsumowanie ===")
     print(f"Pomyślnie przetworzono: {len(enriched_products)}/{len(products)} produktów")
     print(f"Niepowodzenia: {len(failed_products)}")
+    print(limiter.summary())
 
     try:
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -209,6 +213,7 @@ def scrape_all_products(products_file: str, output_file: str, delay: float = 1.0
 
 def main():
     """Główna funkcja - pobiera szczegóły wszystkich produktów"""
+    http_client.enable_dns_cache()
 
     import sys
 
@@ -224,7 +229,6 @@ def main():
     scrape_all_products(
         products_file=str(products_file),
         output_file=str(output_file),
-        delay=1.0,  # 1.0 sekundy między requestami
     )
 
 
@@ -2,10 +2,10 @@ import requests
 from bs4 import BeautifulSoup
 from pathlib import Path
 import json
-import time
 import re
-
-headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+from concurrent.futures import ThreadPoolExecutor
+import http_client
+from rate_limiter import get_limiter
 
 
 def collect_all_categories(categories, parent_name=''):
@@ -45,7 +45,7 @@ def scrape_products_from_category(category_url):
     products = []
 
     try:
-        response = requests.get(category_url, headers=headers)
+        response = http_client.get(category_url, 'html')
         response.raise_for_status()
         response.encoding = 'utf-8'
 
@@ -88,12 +88,54 @@ def scrape_products_from_category(category_url):
     return products
 
 
-if __name__ == '__main__':
-    categories_path = Path(__file__).resolve().parent.parent / 'data' / 'categories.json'
+def scrape_all_categories(all_categories, max_workers=None):
+    """
+    Scrapuje produkty ze wszystkich kategorii równolegle.
+
+    Args:
+        all_categories: Lista kategorii z collect_all_categories()
+        max_workers: Liczba wątków (None = maksymalny limit puli 'html')
+
+    Returns:
+        Lista produktów z przypisanymi kategoriami
+    """
+    # Tempo i liczbę równoległych zapytań dobiera limiter puli 'html'
+    limiter = get_limiter('html')
+    if max_workers is None:
+        max_workers = limiter.max_concurrency
+
+    all_products = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(scrape_products_from_category,
+                               [category['url'] for category in all_categories])
+
+        for i, (category, products) in enumerate(zip(all_categories, results), 1):
+            print(f"\n[{i}/{len(all_categories)}] {'='*60}")
+            print(f"Kategoria: {category['full_path']}")
+            print(f"URL: {category['url']}")
+            print(f"{'='*60}")
+
+            for product in products:
+                product['kategoria'] = category['name']
+                product['kategoria_pelna_sciezka'] = category['full_path']
+                product['url_kategorii'] = category['url']
+
+            all_products.extend(products)
+            print(f"Zescrapowano {len(products)} produktów z tej kategorii")
+
+    print(f"\n{limiter.summary()}")
+    return all_products
+
+
+def main(categories_path=None, output_path=None):
+    http_client.enable_dns_cache()
+    data_dir = Path(__file__).resolve().parent.parent / 'data'
+    categories_path = categories_path or data_dir / 'categories.json'
+    output_path = output_path or data_dir / 'products.json'
 
     if not categories_path.exists():
         print(f"Nie znaleziono pliku {categories_path}")
-        exit(1)
+        return 1
 
     with open(categories_path, 'r', encoding='utf-8') as f:
         categories_data = json.load(f)
@@ -104,26 +146,8 @@ if __name__ == '__main__':
     print(f"Znaleziono {len(all_categories)} kategorii do zescrapowania")
     print(f"{'='*60}\n")
 
-    all_products = []
-    for i, category in enumerate(all_categories, 1):
-        print(f"\n[{i}/{len(all_categories)}] {'='*60}")
-        print(f"Kategoria: {category['full_path']}")
-        print(f"URL: {category['url']}")
-        print(f"{'='*60}")
-
-        products = scrape_products_from_category(category['url'])
-
-        for product in products:
-            product['kategoria'] = category['name']
-            product['kategoria_pelna_sciezka'] = category['full_path']
-            product['url_kategorii'] = category['url']
+    all_products = scrape_all_categories(all_categories)
 
-        all_products.extend(products)
-        print(f"Zescrapowano {len(products)} produktów z tej kategorii")
-
-        time.sleep(1)
-
-    output_path = Path(__file__).resolve().parent.parent / 'data' / 'products.json'
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(all_products, f, indent=2, ensure_ascii=False)
 
@@ -136,3 +160,8 @@ if __name__ == '__main__':
     if all_products:
         print("\nPrzykładowy produkt:")
         print(json.dumps(all_products[0], indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adaptacyjne ograniczanie tempa zapytań dla scraperów.
+
+Zamiast stałych przerw (time.sleep) każde zapytanie przechodzi przez limiter,
+który dobiera liczbę równoległych zapytań metodą AIMD:
+- każda udana odpowiedź zwiększa limit współbieżności addytywnie,
+- odpowiedzi 429/503, błędy połączenia i rosnące opóźnienia zmniejszają go
+  multiplikatywnie,
+- nagłówek Retry-After wstrzymuje wszystkie zapytania danej puli na wskazany czas.
+
+Strony HTML i zdjęcia mają osobne pule ('html' i 'images'), więc wolne
+pobieranie obrazów nie spowalnia scrapowania stron i odwrotnie.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+# Statusy, które oznaczają przeciążenie serwera źródłowego
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Zamienia nagłówek Retry-After na liczbę sekund.
+
+    Args:
+        value: Wartość nagłówka (liczba sekund lub data HTTP)
+
+    Returns:
+        Liczba sekund oczekiwania lub None jeśli brak/niepoprawny nagłówek
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class _Ticket:
+    """Miejsce na odpowiedź zapytania wykonanego w ramach limitera."""
+
+    def __init__(self):
+        self.response = None
+
+    def record(self, response):
+        self.response = response
+
+
+class AdaptiveRateLimiter:
+    """Limiter współbieżności AIMD z reakcją na odpowiedzi serwera."""
+
+    def __init__(self, name: str, initial_concurrency: int = 2, min_concurrency: int = 1,
+                 max_concurrency: int = 8, min_interval: float = 0.0,
+                 target_latency: float = 2.0, decrease_factor: float = 0.5,
+                 latency_decrease_factor: float = 0.8, max_backoff: float = 120.0):
+        """
+        Inicjalizacja limitera.
+
+        Args:
+            name: Nazwa puli (np. 'html', 'images')
+            initial_concurrency: Początkowa liczba równoległych zapytań
+            min_concurrency: Minimalna liczba równoległych zapytań
+            max_concurrency: Maksymalna liczba równoległych zapytań
+            min_interval: Minimalny odstęp między startami zapytań w sekundach
+            target_latency: Czas odpowiedzi (s), powyżej którego zwalniamy
+            decrease_factor: Mnożnik limitu po 429/503 lub błędzie połączenia
+            latency_decrease_factor: Mnożnik limitu po zbyt wolnej odpowiedzi
+            max_backoff: Maksymalna przerwa (s) po przeciążeniu bez Retry-After
+        """
+        self.name = name
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.latency_decrease_factor = latency_decrease_factor
+        self.max_backoff = max_backoff
+
+        self.limit = float(initial_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.next_start_at = 0.0
+        self.last_decrease_at = 0.0
+        self.backoff = 0.0
+
+        self.stats = {
+            'requests': 0,
+            'throttled': 0,
+            'errors': 0,
+            'slow': 0
+        }
+
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Czeka na wolne miejsce w puli i koniec ewentualnej blokady."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self.blocked_until, self.next_start_at) - now
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    self.next_start_at = now + self.min_interval
+                    self.stats['requests'] += 1
+                    return
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, status_code: Optional[int] = None, latency: Optional[float] = None,
+                retry_after: Optional[float] = None, error: bool = False):
+        """
+        Zwalnia miejsce w puli i dostosowuje limit do odpowiedzi serwera.
+
+        Args:
+            status_code: Kod HTTP odpowiedzi (None przy błędzie połączenia)
+            latency: Czas odpowiedzi w sekundach
+            retry_after: Czas oczekiwania z nagłówka Retry-After
+            error: Czy zapytanie zakończyło się błędem połączenia
+        """
+        with self._cond:
+            now = time.monotonic()
+            self.in_flight -= 1
+
+            if error or status_code in THROTTLE_STATUSES:
+                self.stats['errors' if error else 'throttled'] += 1
+                self._decrease(self.decrease_factor, now)
+                if retry_after is None:
+                    self.backoff = min(self.max_backoff, max(1.0, self.backoff * 2))
+                    retry_after = self.backoff
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            elif latency is not None and latency > self.target_latency:
+                self.stats['slow'] += 1
+                # Zwalniamy najwyżej raz na "okno" - inaczej seria wolnych
+                # odpowiedzi z jednej fali zapytań zbiłaby limit do minimum
+                if now - self.last_decrease_at > latency:
+                    self._decrease(self.latency_decrease_factor, now)
+            else:
+                self.backoff = 0.0
+                # Wzrost addytywny: +1 po pełnym oknie udanych zapytań
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+
+            self._cond.notify_all()
+
+    def _decrease(self, factor: float, now: float):
+        self.limit = max(self.min_concurrency, self.limit * factor)
+        self.last_decrease_at = now
+
+    @contextmanager
+    def request(self):
+        """
+        Kontekst pojedynczego zapytania.
+
+        Przykład:
+            with limiter.request() as ticket:
+                ticket.record(session.get(url))
+        """
+        self.acquire()
+        ticket = _Ticket()
+        start = time.monotonic()
+        try:
+            yield ticket
+        except requests.RequestException:
+            self.release(latency=time.monotonic() - start, error=True)
+            raise
+        except BaseException:
+            self.release(latency=time.monotonic() - start)
+            raise
+        else:
+            response = ticket.response
+            if response is None:
+                self.release(latency=time.monotonic() - start)
+            else:
+                self.release(
+                    status_code=response.status_code,
+                    latency=time.monotonic() - start,
+                    retry_after=parse_retry_after(response.headers.get('Retry-After'))
+                )
+
+    def summary(self) -> str:
+        """Zwraca krótki opis stanu limitera."""
+        return (f"{self.name}: limit {self.limit:.1f}, zapytań {self.stats['requests']}, "
+                f"429/503: {self.stats['throttled']}, błędów: {self.stats['errors']}, "
+                f"wolnych: {self.stats['slow']}")
+
+
+LIMITERS = {
+    'html': AdaptiveRateLimiter('html', initial_concurrency=2, max_concurrency=8,
+                                target_latency=2.0),
+    'images': AdaptiveRateLimiter('images', initial_concurrency=4, max_concurrency=16,
+                                  target_latency=5.0),
+}
+
+
+def get_limiter(kind: str) -> AdaptiveRateLimiter:
+    """Zwraca limiter dla danego rodzaju zasobów ('html' lub 'images')."""
+    return LIMITERS[kind]
+
+
+def limited_get(url: str, kind: str = 'html', max_attempts: int = 4, session=None, **kwargs):
+    """
+    Wykonuje GET przez limiter danej puli.
+
+    Odpowiedzi 429/503 są ponawiane po czasie wskazanym przez serwer
+    (Retry-After) lub po wykładniczej przerwie.
+
+    Args:
+        url: Adres do pobrania
+        kind: Pula limitera ('html' lub 'images')
+        max_attempts: Maksymalna liczba prób
+        session: Obiekt z metodą get() (domyślnie moduł requests)
+        **kwargs: Dodatkowe argumenty dla get()
+
+    Returns:
+        Obiekt odpowiedzi requests
+    """
+    limiter = get_limiter(kind)
+    client = session if session is not None else requests
+    for attempt in range(1, max_attempts + 1):
+        with limiter.request() as ticket:
+            response = client.get(url, **kwargs)
+            ticket.record(response)
+        if response.status_code not in THROTTLE_STATUSES or attempt == max_attempts:
+            return response
+        response.close()
+    return response
+
+
+@contextmanager
+def limited_stream(url: str, kind: str = 'html', max_attempts: int = 4, session=None, **kwargs):
+    """
+    Jak limited_get, ale dla pobierania strumieniowego (stream=True).
+
+    Miejsce w puli jest zajęte aż do wyjścia z bloku with, więc limit
+    obejmuje także czytanie treści, a czas zapytania mierzony przez limiter
+    to cały transfer, nie tylko czas do pierwszego bajtu. Odpowiedź jest
+    zamykana przy wyjściu z bloku.
+
+    Przykład:
+        with limited_stream(url, 'images') as response:
+            for chunk in response.iter_content(chunk_size=8192):
+                f.write(chunk)
+
+    Args:
+        url: Adres do pobrania
+        kind: Pula limitera ('html' lub 'images')
+        max_attempts: Maksymalna liczba prób
+        session: Obiekt z metodą get() (domyślnie moduł requests)
+        **kwargs: Dodatkowe argumenty dla get()
+
+    Yields:
+        Obiekt odpowiedzi requests
+    """
+    limiter = get_limiter(kind)
+    client = session if session is not None else requests
+    kwargs['stream'] = True
+    for attempt in range(1, max_attempts + 1):
+        with limiter.request() as ticket:
+            response = client.get(url, **kwargs)
+            ticket.record(response)
+            if response.status_code in THROTTLE_STATUSES and attempt < max_attempts:
+                response.close()
+                continue
+            with response:
+                yield response
+            return
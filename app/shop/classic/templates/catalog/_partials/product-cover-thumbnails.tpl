@@ -26,19 +26,40 @@
   {block name='product_cover'}
     <div class="product-cover">
       {if $product.default_image}
-        <img
-          class="js-qv-product-cover img-fluid"
-          src="{$product.default_image.bySize.large_default.url}"
-          {if !empty($product.default_image.legend)}
-            alt="{$product.default_image.legend}"
-            title="{$product.default_image.legend}"
-          {else}
-            alt="{$product.name}"
-          {/if}
-          loading="lazy"
-          width="{$product.default_image.bySize.large_default.width}"
-          height="{$product.default_image.bySize.large_default.height}"
-        >
+        <picture>
+          <source class="js-qv-product-cover-source" data-format="avif" srcset="{$product.default_image.bySize.large_default.url|replace:'.jpg':'.avif'}" type="image/avif">
+          <source class="js-qv-product-cover-source" data-format="webp" srcset="{$product.default_image.bySize.large_default.url|replace:'.jpg':'.webp'}" type="image/webp">
+          <img
+            class="js-qv-product-cover img-fluid"
+            src="{$product.default_image.bySize.large_default.url}"
+            {if !empty($product.default_image.legend)}
+              alt="{$product.default_image.legend}"
+              title="{$product.default_image.legend}"
+            {else}
+              alt="{$product.name}"
+            {/if}
+            loading="lazy"
+            width="{$product.default_image.bySize.large_default.width}"
+            height="{$product.default_image.bySize.large_default.height}"
+          >
+        </picture>
+        {* theme.js podmienia tylko src okładki - źródła <picture> aktualizujemy tutaj *}
+        <script>
+          {literal}
+          if (!window.coverSourcesSwap) {
+            window.coverSourcesSwap = true;
+            document.addEventListener('click', function (event) {
+              var thumb = event.target.closest('.js-thumb');
+              if (!thumb || !thumb.dataset.imageLargeSrc) {
+                return;
+              }
+              document.querySelectorAll('.js-qv-product-cover-source').forEach(function (source) {
+                source.srcset = thumb.dataset.imageLargeSrc.replace(/\.jpg$/, '.' + source.dataset.format);
+              });
+            });
+          }
+          {/literal}
+        </script>
         <div class="layer hidden-sm-down" data-toggle="modal" data-target="#product-modal">
           <i class="material-icons zoom-in">search</i>
         </div>